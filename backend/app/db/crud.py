@@ -11,6 +11,7 @@ from ..models.recipe_interactions import (
 )
 from ..models.recipes import RecipeData, RecipeResponse
 from ..models.user_profile import UserProfile, UserProfileUpdate
+from ..metrics import instrument_async_methods
 from .supabase import get_supabase
 
 logger = logging.getLogger(__name__)
@@ -19,6 +20,11 @@ logger = logging.getLogger(__name__)
 class BaseCRUD:
     """Base class for CRUD operations"""
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Every public async method is a query, time them all
+        instrument_async_methods(cls)
+
     def __init__(self):
         self.supabase = get_supabase()
 
@@ -487,3 +493,136 @@ class UserContentCRUD(BaseCRUD):
         except Exception as e:
             logger.error(f"Error fetching user content: {str(e)}")
             raise
+
+
+class LLMCacheCRUD(BaseCRUD):
+    def __init__(self):
+        super().__init__()
+        self.table = "llm_cache"
+
+    async def get_entry(
+        self, cache_key: str, include_expired: bool = False
+    ) -> Optional[dict]:
+        """Get a cache entry by its key, unexpired unless include_expired is set"""
+        try:
+            query = (
+                self.supabase.table(self.table)
+                .select("response, request_type, expires_at")
+                .eq("cache_key", cache_key)
+            )
+            if not include_expired:
+                query = query.gt("expires_at", datetime.utcnow().isoformat())
+            result = query.limit(1).execute()
+            return result.data[0] if result.data else None
+        except Exception as e:
+            logger.error(f"Error getting llm cache entry: {str(e)}")
+            raise
+
+    async def upsert_entry(
+        self,
+        cache_key: str,
+        response: dict,
+        request_type: str,
+        expires_at: datetime,
+        response_model: Optional[str] = None,
+        user_id: Optional[UUID] = None,
+    ) -> None:
+        try:
+            self.supabase.table(self.table).upsert(
+                {
+                    "cache_key": cache_key,
+                    "request_type": request_type,
+                    "response_model": response_model,
+                    "response": response,
+                    "user_id": str(user_id) if user_id else None,
+                    "created_at": datetime.utcnow().isoformat(),
+                    "expires_at": expires_at.isoformat(),
+                },
+                on_conflict="cache_key",
+            ).execute()
+        except Exception as e:
+            logger.error(f"Error writing llm cache entry: {str(e)}")
+            raise
+
+    async def get_recent_entries(self, request_types: List[str], limit: int) -> List[dict]:
+        """Most recently written responses of the given request types, expired or not"""
+        try:
+            result = (
+                self.supabase.table(self.table)
+                .select("response, created_at")
+                .in_("request_type", request_types)
+                .order("created_at", desc=True)
+                .limit(limit)
+                .execute()
+            )
+            return result.data or []
+        except Exception as e:
+            logger.error(f"Error getting recent llm cache entries: {str(e)}")
+            raise
+
+    async def delete_expired(self, before: Optional[datetime] = None) -> int:
+        """Delete entries that expired before `before` (default now), returns the number removed"""
+        try:
+            result = (
+                self.supabase.table(self.table)
+                .delete()
+                .lte("expires_at", (before or datetime.utcnow()).isoformat())
+                .execute()
+            )
+            return len(result.data or [])
+        except Exception as e:
+            logger.error(f"Error evicting expired llm cache entries: {str(e)}")
+            raise
+
+
+class ReceiptDictionaryCRUD(BaseCRUD):
+    """Users' votes on what receipt strings are, written only from LLM parses"""
+
+    # PostgREST returns at most this many rows per request
+    PAGE_SIZE = 1000
+
+    def __init__(self):
+        super().__init__()
+        self.table = "receipt_dictionary_votes"
+
+    async def upsert_votes(self, votes: List[dict]) -> None:
+        try:
+            self.supabase.table(self.table).upsert(
+                votes, on_conflict="receipt_key,signature,user_id"
+            ).execute()
+        except Exception as e:
+            logger.error(f"Error saving receipt dictionary votes: {str(e)}")
+            raise
+
+    async def get_votes(self) -> List[dict]:
+        """Every vote, oldest first"""
+        try:
+            votes: List[dict] = []
+            while True:
+                result = (
+                    self.supabase.table(self.table)
+                    .select("receipt_key, data, nutrition, user_id, seen_at")
+                    .order("seen_at")
+                    .range(len(votes), len(votes) + self.PAGE_SIZE - 1)
+                    .execute()
+                )
+                votes.extend(result.data or [])
+                if len(result.data or []) < self.PAGE_SIZE:
+                    return votes
+        except Exception as e:
+            logger.error(f"Error getting receipt dictionary votes: {str(e)}")
+            raise
+
+    async def delete_votes_before(self, before: datetime) -> int:
+        """Delete votes last seen before `before`, returns the number removed"""
+        try:
+            result = (
+                self.supabase.table(self.table)
+                .delete()
+                .lt("seen_at", before.isoformat())
+                .execute()
+            )
+            return len(result.data or [])
+        except Exception as e:
+            logger.error(f"Error deleting old receipt dictionary votes: {str(e)}")
+            raise
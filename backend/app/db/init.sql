@@ -203,4 +203,37 @@ CREATE POLICY "Users can manage their own content" ON public.user_content
 
 -- Create indexes
 CREATE INDEX idx_user_content_user ON user_content(user_id);
-CREATE INDEX idx_user_content_type ON user_content(type);
\ No newline at end of file
+CREATE INDEX idx_user_content_type ON user_content(type);
+
+-- Content-addressed LLM response cache (shared across users)
+CREATE TABLE IF NOT EXISTS public.llm_cache (
+    cache_key text PRIMARY KEY,
+    request_type text NOT NULL DEFAULT 'default',
+    response_model text,
+    response jsonb NOT NULL,
+    user_id uuid REFERENCES auth.users(id) ON DELETE SET NULL,
+    created_at timestamptz DEFAULT now(),
+    expires_at timestamptz NOT NULL
+);
+
+-- Only the service role reads and writes the cache
+ALTER TABLE public.llm_cache ENABLE ROW LEVEL SECURITY;
+
+CREATE INDEX idx_llm_cache_expires ON llm_cache(expires_at);
+CREATE INDEX idx_llm_cache_type ON llm_cache(request_type);
+
+-- Which item each user's LLM parse turned a receipt string into, shared across users
+CREATE TABLE IF NOT EXISTS public.receipt_dictionary_votes (
+    receipt_key text NOT NULL,
+    signature text NOT NULL,
+    user_id uuid NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    data jsonb NOT NULL,
+    nutrition jsonb NOT NULL,
+    seen_at timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (receipt_key, signature, user_id)
+);
+
+-- Only the service role reads and writes votes
+ALTER TABLE public.receipt_dictionary_votes ENABLE ROW LEVEL SECURITY;
+
+CREATE INDEX idx_receipt_dictionary_votes_seen ON receipt_dictionary_votes(seen_at);
@@ -0,0 +1,152 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Payloads (prompts, responses, request params) are cut to this many characters
+MAX_PAYLOAD_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "2000"))
+
+# Share of records kept per category, e.g. LOG_SAMPLE_RATES="llm.prompt=0.1,http.request=0"
+DEFAULT_SAMPLE_RATES: Dict[str, float] = {"http.request": 0.1}
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    rates = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        category, _, rate = entry.partition("=")
+        rates[category.strip()] = float(rate)
+    return rates
+
+
+SAMPLE_RATES = DEFAULT_SAMPLE_RATES | parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", ""))
+
+
+def log_extra(category: str, **fields: Any) -> Dict[str, Any]:
+    """`extra` for a log call: a sampling category plus structured fields"""
+    return {"category": category, "fields": fields}
+
+
+class LazyPayload:
+    """
+    Defers rendering a payload until a handler actually formats the record,
+    so disabled or sampled-out log calls never serialize it, and truncates
+    it to `limit` characters.
+    """
+
+    __slots__ = ("payload", "limit")
+
+    def __init__(self, payload: Any, limit: int = MAX_PAYLOAD_CHARS):
+        self.payload = payload
+        self.limit = limit
+
+    def __str__(self) -> str:
+        payload = self.payload
+        if isinstance(payload, BaseModel):
+            text = payload.model_dump_json()
+        elif isinstance(payload, (dict, list)):
+            text = json.dumps(payload, default=str, ensure_ascii=False)
+        else:
+            text = str(payload)
+        if len(text) <= self.limit:
+            return text
+        return f"{text[:self.limit]}... [{len(text) - self.limit} more chars]"
+
+
+class SamplingFilter(logging.Filter):
+    """Drops a share of the records in each category, uncategorized ones are kept"""
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None):
+        super().__init__()
+        self.rates = SAMPLE_RATES if rates is None else rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(getattr(record, "category", None), 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+
+class StructuredFormatter(logging.Formatter):
+    """The usual line, followed by the record's structured fields as key=value"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " | " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Queues records without rendering LazyPayload arguments, the listener
+    thread renders them. Payloads must not be mutated after being logged.
+    Records with any other kind of argument are rendered here as usual.
+    """
+
+    _DEFERRABLE = (LazyPayload, str, int, float, bool, type(None))
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        if not isinstance(args, tuple) or not all(
+            isinstance(arg, self._DEFERRABLE) for arg in args
+        ):
+            return super().prepare(record)
+
+        record = copy.copy(record)
+        if record.exc_info:
+            # Like QueueHandler.prepare, render the traceback now and drop the frames
+            record.exc_text = record.exc_text or logging.Formatter().formatException(
+                record.exc_info
+            )
+            record.exc_info = None
+        return record
+
+
+_listener: Optional[QueueListener] = None
+
+
+def configure_logging(
+    level: str = LOG_LEVEL, handlers: Optional[list] = None
+) -> QueueListener:
+    """
+    Route all logging through a queue so payload rendering, formatting and
+    I/O happen on a background thread instead of the event loop. Records
+    are level-checked and sampled before they are queued.
+    """
+    global _listener
+    _flush_logs()
+
+    if handlers is None:
+        stream = logging.StreamHandler()
+        stream.setFormatter(StructuredFormatter(LOG_FORMAT))
+        handlers = [stream]
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter())
+
+    root = logging.getLogger()
+    for handler in [h for h in root.handlers if isinstance(h, QueueHandler)]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+@atexit.register
+def _flush_logs() -> None:
+    """Write out everything queued and stop the listener thread, if running"""
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
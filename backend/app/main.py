@@ -2,17 +2,31 @@ import logging
 import os
 import traceback
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 from .api import users
+from .logs import configure_logging
+from .metrics import (
+    ENRICHMENTS_IN_FLIGHT,
+    JOBS,
+    LLM_QUEUE_DEPTH,
+    OCR_IN_FLIGHT,
+    RECEIPT_DICTIONARY_ENTRIES,
+    RECEIPT_DICTIONARY_HIT_RATE,
+    metrics_middleware,
+)
 from .middleware import log_request_middleware
 from .routers import feedback, pantry, profile, recipes
-
-# Add logging configuration
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+from .services.job_queue import FAILED, PENDING, RUNNING, get_job_queue
+from .services.llm.scheduler import Priority, get_scheduler
+from .services.ocr import get_ocr_engine
+from .services.pantry import get_pantry_manager
+from .services.receipt_dictionary import get_receipt_dictionary
+
+# Log I/O happens on a background thread, see app.logs
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Store CORS origins in a variable
@@ -47,6 +61,24 @@ app.add_middleware(
     max_age=3600,
 )
 
+app.middleware("http")(metrics_middleware)
+app.middleware("http")(log_request_middleware)
+
+ENRICHMENTS_IN_FLIGHT.set_function(lambda: get_pantry_manager().enrichment.in_flight)
+for _priority in Priority:
+    LLM_QUEUE_DEPTH.labels(_priority.name.lower()).set_function(
+        lambda priority=_priority: get_scheduler().queue_depth(priority)
+    )
+
+OCR_IN_FLIGHT.labels("waiting").set_function(lambda: get_ocr_engine().pool.waiting)
+OCR_IN_FLIGHT.labels("running").set_function(lambda: get_ocr_engine().pool.running)
+RECEIPT_DICTIONARY_ENTRIES.set_function(lambda: len(get_receipt_dictionary()))
+RECEIPT_DICTIONARY_HIT_RATE.set_function(lambda: get_receipt_dictionary().hit_rate)
+for _status in (PENDING, RUNNING, FAILED):
+    JOBS.labels(_status).set_function(
+        lambda status=_status: get_job_queue().store.counts()[status]
+    )
+
 # Include routers
 app.include_router(pantry.router)
 app.include_router(recipes.router)
@@ -71,6 +103,11 @@ async def health_check():
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.on_event("startup")
 async def startup_event():
     try:
@@ -83,6 +120,29 @@ async def startup_event():
         logger.error(f"Startup error: {str(e)}")
         logger.error(traceback.format_exc())
 
+    if os.getenv("INGREDIENT_KB_WARM", "1") != "0":
+        try:
+            await get_pantry_manager().warm_knowledge_base()
+        except Exception as e:
+            # Enrichment falls back to the LLM until the knowledge base fills up
+            logger.error(f"Could not warm ingredient knowledge base: {str(e)}")
+
+    # Loads the saved receipt dictionary votes, then keeps them in sync with other workers
+    await get_receipt_dictionary().start()
+
+    # Set JOB_WORKER_IN_PROCESS=0 when jobs are run by `python -m app.worker`
+    if os.getenv("JOB_WORKER_IN_PROCESS", "1") != "0":
+        await get_job_queue().start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Unfinished jobs are handed back to the queue for the next worker
+    await get_job_queue().drain()
+    await get_pantry_manager().enrichment.drain()
+    await get_receipt_dictionary().stop()
+    get_ocr_engine().close()
+
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,142 @@
+import functools
+import inspect
+import time
+from typing import Callable
+
+from fastapi import Request
+from prometheus_client import Counter, Gauge, Histogram
+
+# Route latencies span fast CRUD reads to recipe generation
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+DB_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+OCR_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30)
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 90)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=HTTP_BUCKETS,
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Supabase query latency by CRUD method",
+    ["crud", "method"],
+    buckets=DB_BUCKETS,
+)
+DB_QUERY_ERRORS = Counter(
+    "db_query_errors_total", "Supabase queries that raised", ["crud", "method"]
+)
+LLM_REQUEST_DURATION = Histogram(
+    "llm_request_duration_seconds",
+    "LLM provider latency including retries, by request type and outcome",
+    ["provider", "request_type", "outcome"],
+    buckets=LLM_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "LLM tokens by request type and kind (input, cache_write, cache_read, output)",
+    ["request_type", "kind"],
+)
+LLM_CACHE_LOOKUPS = Counter(
+    "llm_cache_lookups_total",
+    "LLM response cache lookups by tier (memory, database) and result",
+    ["request_type", "tier", "result"],
+)
+OCR_QUEUE_DURATION = Histogram(
+    "ocr_queue_duration_seconds",
+    "Time receipt OCR calls waited for a free OCR thread",
+    buckets=OCR_BUCKETS,
+)
+OCR_DURATION = Histogram(
+    "ocr_duration_seconds",
+    "Receipt OCR call time on its thread, by outcome",
+    ["outcome"],
+    buckets=OCR_BUCKETS,
+)
+OCR_ESCALATIONS = Counter(
+    "ocr_escalations_total",
+    "Preprocessed receipts OCR'd again at full resolution after a low confidence read",
+)
+OCR_IN_FLIGHT = Gauge(
+    "ocr_in_flight", "Receipt OCR calls waiting for or running on a thread", ["state"]
+)
+RECEIPT_DICTIONARY_LOOKUPS = Counter(
+    "receipt_dictionary_lookups_total",
+    "Receipt lines looked up in the learned receipt dictionary, by result",
+    ["result"],
+)
+RECEIPT_DICTIONARY_HIT_RATE = Gauge(
+    "receipt_dictionary_hit_rate",
+    "Share of receipt lines resolved without the LLM since the process started",
+)
+RECEIPT_DICTIONARY_ENTRIES = Gauge(
+    "receipt_dictionary_entries", "Receipt strings in the learned receipt dictionary"
+)
+ENRICHMENTS_IN_FLIGHT = Gauge(
+    "enrichments_in_flight", "Pantry item enrichments waiting for or inside a batch"
+)
+JOBS = Gauge("jobs", "Background jobs in the job queue by status", ["status"])
+LLM_QUEUE_DEPTH = Gauge(
+    "llm_queue_depth", "LLM calls waiting for a scheduler slot", ["priority"]
+)
+
+# Usage fields reported by the provider, by the kind label they are counted under
+TOKEN_KINDS = {
+    "input_tokens": "input",
+    "cache_creation_input_tokens": "cache_write",
+    "cache_read_input_tokens": "cache_read",
+    "output_tokens": "output",
+}
+
+
+async def metrics_middleware(request: Request, call_next):
+    """Time every request, labelled by the route it matched rather than its URL"""
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_REQUEST_DURATION.labels(
+            request.method, route.path if route else "unmatched", str(status)
+        ).observe(time.perf_counter() - started)
+
+
+def timed_query(crud: str, method: Callable) -> Callable:
+    """Wrap an async CRUD method to record its latency and errors"""
+    histogram = DB_QUERY_DURATION.labels(crud, method.__name__)
+    errors = DB_QUERY_ERRORS.labels(crud, method.__name__)
+
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            histogram.observe(time.perf_counter() - started)
+
+    wrapper.__timed__ = True
+    return wrapper
+
+
+def instrument_async_methods(cls: type) -> None:
+    """Time every public coroutine method defined on cls"""
+    for name, value in list(vars(cls).items()):
+        if (
+            not name.startswith("_")
+            and inspect.iscoroutinefunction(value)
+            and not getattr(value, "__timed__", False)
+        ):
+            setattr(cls, name, timed_query(cls.__name__, value))
+
+
+def record_tokens(request_type: str, counts: dict) -> None:
+    for field, kind in TOKEN_KINDS.items():
+        if counts.get(field):
+            LLM_TOKENS.labels(request_type, kind).inc(counts[field])
@@ -2,32 +2,37 @@ import logging
 
 from fastapi import Request
 
-logger = logging.getLogger(__name__)
+from .logs import log_extra
 
+logger = logging.getLogger(__name__)
 
-async def log_request_middleware(request: Request, call_next):
-    logger.info(f"Incoming request: {request.method} {request.url}")
-    logger.info(f"Headers: {dict(request.headers)}")
+# Never written to the logs
+REDACTED_HEADERS = {"authorization", "cookie", "x-api-key"}
 
-    if request.method == "POST":
-        try:
-            # Try to read form data for multipart requests
-            if request.headers.get("content-type", "").startswith(
-                "multipart/form-data"
-            ):
-                form = await request.form()
-                logger.info(f"Form data keys: {list(form.keys())}")
-                if "file" in form:
-                    file = form["file"]
-                    logger.info(
-                        f"File details - filename: {file.filename}, content_type: {file.content_type}"
-                    )
-            else:
-                body = await request.body()
-                logger.info(f"Request body size: {len(body)} bytes")
-        except Exception as e:
-            logger.error(f"Error reading request data: {str(e)}")
 
+async def log_request_middleware(request: Request, call_next):
+    """Sampled one-line summary per request, headers only at DEBUG"""
     response = await call_next(request)
-    logger.info(f"Response status: {response.status_code}")
+    logger.info(
+        "%s %s -> %s",
+        request.method,
+        request.url.path,
+        response.status_code,
+        extra=log_extra(
+            "http.request",
+            content_type=request.headers.get("content-type"),
+            content_length=request.headers.get("content-length"),
+        ),
+    )
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Headers: %s",
+            str(
+                {
+                    key: "[redacted]" if key in REDACTED_HEADERS else value
+                    for key, value in request.headers.items()
+                }
+            ),
+            extra=log_extra("http.headers"),
+        )
     return response
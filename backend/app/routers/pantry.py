@@ -136,13 +136,8 @@ async def process_receipt(
         )
 
     try:
-        # Log file size
-        file_contents = await file.read()
-        file_size = len(file_contents)
-        logger.info(f"File size: {file_size} bytes")
-
-        # Reset file position after reading
-        await file.seek(0)
+        # Size is known from the upload, the bytes are only read once by the manager
+        logger.info(f"File size: {file.size} bytes")
 
         logger.info("Starting receipt processing with pantry manager")
         result = await pantry_manager.process_receipt(file, UUID(current_user["id"]))
@@ -1,9 +1,12 @@
+import json
 import logging
 from typing import List, Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 
+from ..logs import LazyPayload
 from ..models.recipe_interactions import (
     InteractionType,
     RecipeInteraction,
@@ -13,6 +16,7 @@ from ..models.recipe_interactions import (
 )
 from ..models.recipes import RecipePreferences, RecipeResponse
 from ..services.auth import get_current_user
+from ..services.llm.resilience import LLMUnavailableError
 from ..services.pantry import get_pantry_manager
 from ..services.recipe_manager import get_recipe_manager
 
@@ -30,17 +34,49 @@ async def generate_recipes(
     """Generate raw recipes based on preferences"""
     try:
         user_id = UUID(current_user["id"])
-        logger.debug(f"Generating recipes with preferences: {preferences}")
+        if logger.isEnabledFor(logging.DEBUG):
+            # A snapshot, generation adds to custom_preferences before the log is written
+            logger.debug(
+                "Generating recipes with preferences: %s",
+                LazyPayload(preferences.model_dump()),
+            )
         recipe = await recipe_manager.generate_recipe(
             preferences=preferences,
             user_id=user_id,
         )
         return recipe
+    except LLMUnavailableError as e:
+        logger.error(f"Recipe generation unavailable: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Recipe generation error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/generate/stream")
+async def generate_recipes_stream(
+    preferences: RecipePreferences, current_user: dict = Depends(get_current_user)
+):
+    """
+    Generate recipes as newline-delimited JSON, one RecipeResponse per line,
+    each sent as soon as it is generated and stored
+    """
+    user_id = UUID(current_user["id"])
+
+    async def recipe_lines():
+        try:
+            async for recipe in recipe_manager.generate_recipe_stream(
+                preferences=preferences,
+                user_id=user_id,
+            ):
+                yield recipe.model_dump_json() + "\n"
+        except Exception as e:
+            logger.error(f"Streaming recipe generation error: {str(e)}", exc_info=True)
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return StreamingResponse(recipe_lines(), media_type="application/x-ndjson")
+
+
 @router.post("/{recipe_id}/link-ingredients")
 async def link_recipe_ingredients(
     recipe_id: str, current_user: dict = Depends(get_current_user)
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+from uuid import UUID
+
+from ..db.crud import PantryCRUD
+from ..models.pantry import ListOfPantryItemsCreate, PantryItemCreate, PantryItemUpdate
+from .llm.kitchen import KitchenLLMService
+
+logger = logging.getLogger(__name__)
+
+# How long to wait for more items before sending a batch
+BATCH_WINDOW = float(os.getenv("ENRICHMENT_BATCH_WINDOW_MS", "250")) / 1000
+MAX_BATCH_SIZE = int(os.getenv("ENRICHMENT_MAX_BATCH_SIZE", "20"))
+
+
+def _match_key(name: Optional[str]) -> str:
+    return " ".join((name or "").lower().split())
+
+
+class PendingEnrichment:
+    __slots__ = ("item_id", "ingredient_text", "name", "user_id", "future")
+
+    def __init__(
+        self,
+        item_id: UUID,
+        ingredient_text: str,
+        name: str,
+        user_id: UUID,
+        future: asyncio.Future,
+    ):
+        self.item_id = item_id
+        self.ingredient_text = ingredient_text
+        self.name = name
+        self.user_id = user_id
+        self.future = future
+
+
+class EnrichmentBatcher:
+    """
+    Collects pantry item enrichments from all users for a short window and
+    sends them to Claude as one list-shaped request, then writes each result
+    back to its own pantry_items row.
+    """
+
+    def __init__(
+        self,
+        claude: KitchenLLMService,
+        pantry: PantryCRUD,
+        window: float = BATCH_WINDOW,
+        max_batch_size: int = MAX_BATCH_SIZE,
+    ):
+        self.claude = claude
+        self.pantry = pantry
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._pending: List[PendingEnrichment] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._running = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Number of enrichments waiting for or inside a batch"""
+        return len(self._pending) + self._running
+
+    def submit(
+        self,
+        item_id: UUID,
+        ingredient_text: str,
+        user_id: UUID,
+        name: Optional[str] = None,
+    ) -> asyncio.Future:
+        """
+        Queue an item for enrichment, the future resolves once it is stored.
+        `name` is the item name in the text, which batch results are matched on.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        # Callers may fire and forget, so never warn about unretrieved errors
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._pending.append(
+            PendingEnrichment(item_id, ingredient_text, name or ingredient_text, user_id, future)
+        )
+
+        if len(self._pending) >= self.max_batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self.flush)
+        return future
+
+    def flush(self) -> None:
+        """Send everything queued so far as one batch"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        self._running += len(batch)
+        task = asyncio.create_task(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def drain(self) -> None:
+        """Flush pending items and wait for every running batch"""
+        self.flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _run_batch(self, batch: List[PendingEnrichment]) -> None:
+        try:
+            await self._enrich_batch(batch)
+        finally:
+            self._running -= len(batch)
+
+    async def _enrich_batch(self, batch: List[PendingEnrichment]) -> None:
+        # Identical inputs are only sent once
+        unique: Dict[str, PendingEnrichment] = {}
+        for pending in batch:
+            unique.setdefault(pending.ingredient_text, pending)
+        logger.info(
+            f"Enriching {len(batch)} pantry items ({len(unique)} unique) in one batch"
+        )
+
+        try:
+            enriched = await self._enrich_texts(list(unique.values()))
+        except Exception as e:
+            logger.error(f"Error enriching batch of {len(batch)} items: {str(e)}")
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+            return
+
+        await asyncio.gather(
+            *[self._store(pending, enriched.get(pending.ingredient_text)) for pending in batch]
+        )
+
+    async def _enrich_texts(
+        self, inputs: List[PendingEnrichment]
+    ) -> Dict[str, Optional[PantryItemCreate]]:
+        if len(inputs) == 1:
+            only = inputs[0]
+            item = await self.claude.parse_ingredient_text(
+                PantryItemCreate, only.ingredient_text, user_id=only.user_id
+            )
+            return {only.ingredient_text: item}
+
+        result: ListOfPantryItemsCreate = await self.claude.parse_ingredient_batch(
+            ListOfPantryItemsCreate, [p.ingredient_text for p in inputs]
+        )
+
+        # Order can't be trusted, results are matched to inputs on the name they echo
+        items_by_name = defaultdict(list)
+        for item in result.items:
+            items_by_name[_match_key(item.data.original_name)].append(item)
+        inputs_by_name = defaultdict(list)
+        for pending in inputs:
+            inputs_by_name[_match_key(pending.name)].append(pending.ingredient_text)
+
+        matched = {}
+        for name, texts in inputs_by_name.items():
+            items = items_by_name.get(name, [])
+            # Two inputs with the same name can't be told apart
+            if len(texts) == len(items) == 1:
+                matched[texts[0]] = items[0]
+        if len(matched) < len(inputs):
+            logger.warning(
+                f"Batch enrichment matched {len(matched)} of {len(inputs)} inputs "
+                f"({len(result.items)} items returned), falling back to single requests"
+            )
+        return matched
+
+    async def _store(
+        self, pending: PendingEnrichment, enriched_item: Optional[PantryItemCreate]
+    ) -> None:
+        try:
+            if enriched_item is None:
+                # Fall back to a single request for anything the batch missed
+                enriched_item = await self.claude.parse_ingredient_text(
+                    PantryItemCreate, pending.ingredient_text, user_id=pending.user_id
+                )
+            updates = PantryItemUpdate(
+                data=enriched_item.data,
+                nutrition=enriched_item.nutrition,
+            )
+            await self.pantry.update_item(pending.item_id, updates)
+            pending.future.set_result(enriched_item)
+        except Exception as e:
+            logger.error(f"Error enriching item {pending.item_id}: {str(e)}")
+            if not pending.future.done():
+                pending.future.set_exception(e)
@@ -0,0 +1,254 @@
+import logging
+import os
+import re
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Set
+
+from ..db.crud import LLMCacheCRUD
+from ..models.pantry import Nutrition, PantryItemCreate, PantryItemData
+
+logger = logging.getLogger(__name__)
+
+# Names at least this similar (after normalizing) are treated as the same ingredient
+MATCH_THRESHOLD = float(os.getenv("INGREDIENT_KB_MATCH_THRESHOLD", "0.85"))
+
+# Cached enrichment responses read at startup to warm the knowledge base
+WARM_LIMIT = int(os.getenv("INGREDIENT_KB_WARM_LIMIT", "5000"))
+
+# Only the LLM's enrichment output is learned from, never pantry rows users can edit
+ENRICHMENT_REQUEST_TYPES = ["ingredient_analysis", "ingredient_batch_analysis"]
+
+# Fuzzy lookups remembered, hits and misses alike
+LOOKUP_CACHE_SIZE = 4096
+
+_NON_WORD = re.compile(r"[^a-z ]+")
+_ICON = re.compile(r"[^\x00-\u024f\s]+")
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase, letters only, each word crudely singularized"""
+    words = []
+    for word in _NON_WORD.sub(" ", name.lower()).split():
+        if word.endswith("ies") and len(word) > 4:
+            word = word[:-3] + "y"
+        elif word.endswith("oes") and len(word) > 4:
+            word = word[:-2]
+        elif word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+            word = word[:-1]
+        words.append(word)
+    return " ".join(words)
+
+
+def has_nutrition(nutrition: Optional[Nutrition]) -> bool:
+    if nutrition is None:
+        return False
+    values = nutrition.model_dump()
+    values.pop("standard_unit", None)
+    return any(value != 0 for value in values.values())
+
+
+class IngredientFacts:
+    """What we know about one canonical ingredient"""
+
+    __slots__ = ("name", "category", "unit", "nutrition", "shelf_life_days", "icon", "samples")
+
+    def __init__(
+        self,
+        name: str,
+        category: Optional[str],
+        unit: str,
+        nutrition: Nutrition,
+        shelf_life_days: Optional[int],
+        icon: Optional[str],
+    ):
+        self.name = name
+        self.category = category
+        self.unit = unit
+        self.nutrition = nutrition
+        self.shelf_life_days = shelf_life_days
+        self.icon = icon
+        self.samples = 1
+
+
+class IngredientKnowledgeBase:
+    """
+    Ingredient facts learned from past enrichment results, so staples can
+    be enriched in-process instead of by an LLM call.
+
+    Lookups try the canonical name, then names users typed that were
+    enriched to it, then a fuzzy match against names sharing a word or the
+    first two letters.
+    """
+
+    def __init__(self, match_threshold: float = MATCH_THRESHOLD):
+        self.match_threshold = match_threshold
+        self._facts: Dict[str, IngredientFacts] = {}
+        self._aliases: Dict[str, str] = {}
+        self._index: Dict[str, Set[str]] = defaultdict(set)
+        self._lookups: Dict[str, Optional[str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._facts)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def learn(
+        self,
+        item: PantryItemCreate,
+        input_name: Optional[str] = None,
+        learned_on: Optional[date] = None,
+    ) -> bool:
+        """Record an enrichment result, returns False if it had nothing to learn"""
+        if not has_nutrition(item.nutrition):
+            return False
+        key = normalize_name(item.data.name)
+        if not key:
+            return False
+
+        facts = IngredientFacts(
+            name=item.data.name,
+            category=item.data.category,
+            unit=item.data.unit,
+            nutrition=item.nutrition,
+            shelf_life_days=self._shelf_life(item.data, learned_on or date.today()),
+            icon=self._icon(item.data.notes),
+        )
+        previous = self._facts.get(key)
+        if previous is not None:
+            facts.samples = previous.samples + 1
+            facts.shelf_life_days = facts.shelf_life_days or previous.shelf_life_days
+            facts.icon = facts.icon or previous.icon
+        self._facts[key] = facts
+        self._add_to_index(key)
+
+        for alias in (input_name, item.data.original_name):
+            alias_key = normalize_name(alias or "")
+            if alias_key and alias_key != key:
+                self._aliases[alias_key] = key
+                self._add_to_index(alias_key)
+        self._lookups.clear()
+        return True
+
+    def lookup(self, name: str) -> Optional[IngredientFacts]:
+        query = normalize_name(name)
+        if query in self._lookups:
+            key = self._lookups[query]
+        else:
+            key = self._match(query)
+            if len(self._lookups) >= LOOKUP_CACHE_SIZE:
+                self._lookups.clear()
+            self._lookups[query] = key
+
+        if key is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self._facts[key]
+
+    def enrich(
+        self, item: PantryItemCreate, today: Optional[date] = None
+    ) -> Optional[PantryItemCreate]:
+        """The item filled in from the knowledge base, None if it isn't known"""
+        facts = self.lookup(item.data.name)
+        if facts is None:
+            return None
+
+        data = item.data.model_copy()
+        if data.name != facts.name:
+            data.original_name = data.original_name or data.name
+            data.name = facts.name
+        data.category = data.category or facts.category
+        data.unit = data.unit or facts.unit
+        data.notes = data.notes or facts.icon
+        if data.expiry_date is None and facts.shelf_life_days is not None:
+            expires = (today or date.today()) + timedelta(days=facts.shelf_life_days)
+            data.expiry_date = expires.isoformat()
+        return PantryItemCreate(data=data, nutrition=facts.nutrition.model_copy())
+
+    async def warm(self, cache: LLMCacheCRUD, limit: int = WARM_LIMIT) -> int:
+        """Learn from recent cached enrichment responses, returns how many items were learned"""
+        started = time.perf_counter()
+        entries = await cache.get_recent_entries(ENRICHMENT_REQUEST_TYPES, limit)
+        learned = total = 0
+        for entry in reversed(entries):
+            learned_on = date.fromisoformat(entry["created_at"][:10])
+            response = entry["response"] or {}
+            # Batch responses are a list of items, single ones the item itself
+            for raw_item in response.get("items", [response]):
+                total += 1
+                try:
+                    item = PantryItemCreate.model_validate(raw_item)
+                except ValueError:
+                    continue
+                learned += self.learn(item, learned_on=learned_on)
+        logger.info(
+            f"Warmed ingredient knowledge base with {learned} of {total} enriched items, "
+            f"{len(self)} ingredients in {time.perf_counter() - started:.2f}s"
+        )
+        return learned
+
+    def _match(self, query: str) -> Optional[str]:
+        if not query:
+            return None
+        if query in self._facts:
+            return query
+        if query in self._aliases:
+            return self._aliases[query]
+
+        best, best_ratio = None, self.match_threshold
+        matcher = SequenceMatcher(b=query, autojunk=False)
+        for candidate in self._candidates(query):
+            matcher.set_seq1(candidate)
+            if matcher.real_quick_ratio() < best_ratio or matcher.quick_ratio() < best_ratio:
+                continue
+            ratio = matcher.ratio()
+            if ratio >= best_ratio:
+                best, best_ratio = candidate, ratio
+        if best is None:
+            return None
+        return self._aliases.get(best, best)
+
+    def _candidates(self, query: str) -> Set[str]:
+        candidates: Set[str] = set()
+        for token in self._tokens(query):
+            candidates |= self._index.get(token, set())
+        return candidates
+
+    def _add_to_index(self, key: str) -> None:
+        for token in self._tokens(key):
+            self._index[token].add(key)
+
+    @staticmethod
+    def _tokens(key: str) -> List[str]:
+        return [*key.split(), f"^{key[:2]}"]
+
+    @staticmethod
+    def _shelf_life(data: PantryItemData, learned_on: date) -> Optional[int]:
+        if not data.expiry_date:
+            return None
+        try:
+            expires = datetime.strptime(data.expiry_date[:10], "%Y-%m-%d").date()
+        except ValueError:
+            return None
+        days = (expires - learned_on).days
+        return days if days >= 0 else None
+
+    @staticmethod
+    def _icon(notes: Optional[str]) -> Optional[str]:
+        match = _ICON.search(notes or "")
+        return match.group(0) if match else None
+
+
+_ingredient_kb = IngredientKnowledgeBase()
+
+
+def get_ingredient_kb() -> IngredientKnowledgeBase:
+    return _ingredient_kb
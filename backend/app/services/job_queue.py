@@ -0,0 +1,358 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "jobs.sqlite3")
+
+# Jobs run at once by one worker
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "32"))
+
+# How often a worker looks for jobs submitted by other processes or due for retry
+POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+
+# A claimed job whose lease isn't renewed within this long is assumed lost with its worker
+LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+
+# Running jobs' leases are renewed this many times per lease, so a missed renewal isn't fatal
+LEASE_RENEWALS = 3
+
+MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 300.0
+
+# How long shutdown waits for running jobs before handing them back
+DRAIN_TIMEOUT = float(os.getenv("JOB_DRAIN_TIMEOUT", "20"))
+
+PENDING = "pending"
+RUNNING = "running"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    dedupe_key TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    run_at REAL NOT NULL,
+    lease_until REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS jobs_active_dedupe
+    ON jobs (dedupe_key) WHERE status IN ('pending', 'running');
+CREATE INDEX IF NOT EXISTS jobs_due ON jobs (status, run_at);
+"""
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class Job:
+    __slots__ = ("id", "kind", "payload", "attempts")
+
+    def __init__(self, id: int, kind: str, payload: Dict[str, Any], attempts: int):
+        self.id = id
+        self.kind = kind
+        self.payload = payload
+        self.attempts = attempts
+
+
+class JobStore:
+    """
+    Jobs in a local SQLite database, safe to share between processes.
+    Finished jobs are deleted, jobs that ran out of attempts are kept as failed.
+    """
+
+    def __init__(self, path: str = JOB_QUEUE_PATH):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(
+                self.path, isolation_level=None, check_same_thread=False, timeout=30
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def enqueue(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        dedupe_key: Optional[str] = None,
+        delay: float = 0,
+    ) -> Optional[int]:
+        """Add a job, None if an unfinished job with the same dedupe key exists"""
+        now = time.time()
+        with self._lock:
+            cursor = self._connect().execute(
+                "INSERT OR IGNORE INTO jobs "
+                "(kind, payload, dedupe_key, status, run_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, json.dumps(payload), dedupe_key, PENDING, now + delay, now),
+            )
+            return cursor.lastrowid if cursor.rowcount else None
+
+    def claim(self, kinds: List[str], limit: int, lease: float = LEASE_SECONDS) -> List[Job]:
+        """Take up to `limit` due jobs, including ones whose worker's lease ran out"""
+        if not kinds or limit <= 0:
+            return []
+        now = time.time()
+        placeholders = ",".join("?" * len(kinds))
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    f"SELECT id, kind, payload, attempts FROM jobs "
+                    f"WHERE kind IN ({placeholders}) AND ("
+                    f"(status = ? AND run_at <= ?) OR (status = ? AND lease_until < ?)"
+                    f") ORDER BY run_at LIMIT ?",
+                    (*kinds, PENDING, now, RUNNING, now, limit),
+                ).fetchall()
+                conn.executemany(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_until = ? "
+                    "WHERE id = ?",
+                    [(RUNNING, now + lease, row[0]) for row in rows],
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return [Job(id, kind, json.loads(payload), attempts + 1) for id, kind, payload, attempts in rows]
+
+    def renew(self, job_ids: List[int], lease: float = LEASE_SECONDS) -> None:
+        """Extend the leases of jobs still running, so they aren't reclaimed mid-run"""
+        if not job_ids:
+            return
+        placeholders = ",".join("?" * len(job_ids))
+        with self._lock:
+            self._connect().execute(
+                f"UPDATE jobs SET lease_until = ? WHERE status = ? AND id IN ({placeholders})",
+                (time.time() + lease, RUNNING, *job_ids),
+            )
+
+    def complete(self, job_id: int) -> None:
+        with self._lock:
+            self._connect().execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def retry(self, job_id: int, delay: float, error: str) -> None:
+        with self._lock:
+            self._connect().execute(
+                "UPDATE jobs SET status = ?, run_at = ?, lease_until = NULL, last_error = ? "
+                "WHERE id = ?",
+                (PENDING, time.time() + delay, error, job_id),
+            )
+
+    def release(self, job_id: int) -> None:
+        """Hand a job back without counting the attempt, e.g. on shutdown"""
+        with self._lock:
+            self._connect().execute(
+                "UPDATE jobs SET status = ?, attempts = attempts - 1, lease_until = NULL "
+                "WHERE id = ?",
+                (PENDING, job_id),
+            )
+
+    def fail(self, job_id: int, error: str) -> None:
+        with self._lock:
+            self._connect().execute(
+                "UPDATE jobs SET status = ?, lease_until = NULL, last_error = ? WHERE id = ?",
+                (FAILED, error, job_id),
+            )
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+        return {PENDING: 0, RUNNING: 0, FAILED: 0} | dict(rows)
+
+
+class JobQueue:
+    """
+    Durable background work. Jobs are written to the store before submit()
+    returns, and a worker (in the app process, or `python -m app.worker`)
+    runs them with at most `concurrency` at once. Failed jobs are retried
+    with jittered exponential backoff up to their handler's max attempts.
+    Leases of running jobs are renewed until they finish, so only jobs of
+    a worker that died are claimed again.
+    """
+
+    def __init__(
+        self,
+        store: Optional[JobStore] = None,
+        concurrency: int = JOB_CONCURRENCY,
+        poll_interval: float = POLL_INTERVAL,
+        lease: float = LEASE_SECONDS,
+    ):
+        self.store = store or JobStore()
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self._handlers: Dict[str, JobHandler] = {}
+        self._max_attempts: Dict[str, int] = {}
+        self._min_backoff: Dict[str, float] = {}
+        self._running: Dict[asyncio.Task, Job] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._running)
+
+    def register(
+        self,
+        kind: str,
+        handler: JobHandler,
+        max_attempts: int = MAX_ATTEMPTS,
+        min_backoff: float = 0,
+    ) -> None:
+        """
+        Run jobs of `kind` with handler(payload). Retries wait at least
+        `min_backoff` seconds, e.g. for anything the handler caches failures for.
+        """
+        self._handlers[kind] = handler
+        self._max_attempts[kind] = max_attempts
+        self._min_backoff[kind] = min_backoff
+
+    async def submit(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        dedupe_key: Optional[str] = None,
+        delay: float = 0,
+    ) -> Optional[int]:
+        """Persist a job, returns its id or None if it duplicates an unfinished one"""
+        job_id = await asyncio.to_thread(
+            self.store.enqueue, kind, payload, dedupe_key, delay
+        )
+        if job_id is None:
+            logger.info(f"Skipped duplicate {kind} job {dedupe_key}")
+        elif self._wake is not None:
+            self._wake.set()
+        return job_id
+
+    async def start(self) -> None:
+        """Start working on jobs in this process"""
+        if self._loop_task is not None:
+            return
+        self._stopping = False
+        self._wake = asyncio.Event()
+        self._loop_task = asyncio.create_task(self._work())
+        self._heartbeat_task = asyncio.create_task(self._renew_leases())
+        logger.info(
+            f"Job worker started for {sorted(self._handlers)} "
+            f"with concurrency {self.concurrency}"
+        )
+
+    async def drain(self, timeout: float = DRAIN_TIMEOUT) -> None:
+        """Stop taking jobs and wait for running ones, handing back any that don't finish"""
+        if self._loop_task is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        await self._loop_task
+        self._loop_task = None
+
+        if self._running:
+            logger.info(f"Waiting up to {timeout:.0f}s for {len(self._running)} jobs")
+            _, pending = await asyncio.wait(list(self._running), timeout=timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        self._heartbeat_task.cancel()
+        await asyncio.gather(self._heartbeat_task, return_exceptions=True)
+        self._heartbeat_task = None
+        logger.info("Job worker stopped")
+
+    async def _work(self) -> None:
+        while not self._stopping:
+            # Cleared before looking, so a submit or finished job from here on wakes us
+            self._wake.clear()
+            free = self.concurrency - len(self._running)
+            jobs = []
+            if free > 0:
+                try:
+                    jobs = await asyncio.to_thread(
+                        self.store.claim, list(self._handlers), free, self.lease
+                    )
+                except Exception as e:
+                    logger.error(f"Error claiming jobs: {str(e)}")
+            for job in jobs:
+                task = asyncio.create_task(self._run(job))
+                self._running[task] = job
+                task.add_done_callback(self._finished)
+            if jobs and len(jobs) == free:
+                continue
+
+            # Other processes' submits and retries coming due are found by polling
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _renew_leases(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease / LEASE_RENEWALS)
+            job_ids = [job.id for job in self._running.values()]
+            try:
+                await asyncio.to_thread(self.store.renew, job_ids, self.lease)
+            except Exception as e:
+                logger.error(f"Error renewing job leases: {str(e)}")
+
+    def _finished(self, task: asyncio.Task) -> None:
+        self._running.pop(task, None)
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self, job: Job) -> None:
+        try:
+            await self._handlers[job.kind](job.payload)
+        except asyncio.CancelledError:
+            await asyncio.to_thread(self.store.release, job.id)
+            raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if job.attempts >= self._max_attempts[job.kind]:
+                self.failed += 1
+                logger.error(f"{job.kind} job {job.id} failed for good: {error}")
+                await asyncio.to_thread(self.store.fail, job.id, error)
+            else:
+                self.retried += 1
+                delay = self._min_backoff[job.kind] + random.uniform(
+                    0, min(BACKOFF_MAX, BACKOFF_BASE * 2**job.attempts)
+                )
+                logger.warning(
+                    f"{job.kind} job {job.id} attempt {job.attempts} failed, "
+                    f"retrying in {delay:.1f}s: {error}"
+                )
+                await asyncio.to_thread(self.store.retry, job.id, delay, error)
+        else:
+            self.completed += 1
+            await asyncio.to_thread(self.store.complete, job.id)
+
+
+_job_queue = JobQueue()
+
+
+def get_job_queue() -> JobQueue:
+    return _job_queue
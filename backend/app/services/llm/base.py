@@ -1,20 +1,56 @@
+import asyncio
 import logging
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Type, TypeVar, Union
+from string import Template
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    get_args,
+    get_origin,
+)
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 
-from .llm_cache import LLMCache
-from .schema_utils import summarize_schema
+from ...logs import LazyPayload, log_extra
+from ...metrics import LLM_CACHE_LOOKUPS, LLM_REQUEST_DURATION
+from .coalescing import get_single_flight
+from .json_stream import JSONArrayStreamer
+from .llm_cache import LLMCache, get_ttl, make_cache_key
+from .memory_cache import CachedFailure, get_memory_cache
+from .prompt_registry import CompiledPrompt, get_prompt_registry
+from .resilience import LLMUnavailableError, get_resilience_policy
 
 logger = logging.getLogger(__name__)
 T = TypeVar("T", bound=BaseModel)
 
 
+def get_list_field(model: Type[BaseModel]) -> Tuple[str, Type[BaseModel]]:
+    """Find the list field of a wrapper model such as ListOfRecipeData"""
+    for name, field in model.model_fields.items():
+        if get_origin(field.annotation) is list:
+            return name, get_args(field.annotation)[0]
+    raise ValueError(f"{model.__name__} has no list field to stream")
+
+
 class BaseLLMService(ABC):
+    # Identifies the underlying model so cached responses don't leak across versions
+    model_version: Optional[str] = None
+
     def __init__(self):
         self.cache = LLMCache()
+        self.memory_cache = get_memory_cache()
+        self.inflight = get_single_flight()
+        self.prompts = get_prompt_registry()
+        self.resilience = get_resilience_policy(type(self).__name__, self.is_retryable)
 
     @abstractmethod
     async def _generate_response(
@@ -27,9 +63,55 @@ class BaseLLMService(ABC):
         """Implementation-specific response generation"""
         pass
 
+    def is_retryable(self, error: BaseException) -> bool:
+        """Whether a provider error is transient, e.g. a timeout or overload"""
+        return isinstance(error, (asyncio.TimeoutError, ConnectionError))
+
+    async def _call_provider(self, request_type: str, **kwargs) -> Union[T, List[T]]:
+        """_generate_response with a deadline, retries, hedging and the circuit breaker"""
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await self.resilience.call(
+                lambda: self._generate_response(**kwargs), request_type
+            )
+            outcome = "ok"
+            return response
+        finally:
+            self._observe_latency(request_type, outcome, started)
+
+    def _observe_latency(self, request_type: str, outcome: str, started: float) -> None:
+        LLM_REQUEST_DURATION.labels(
+            type(self).__name__, request_type, outcome
+        ).observe(time.perf_counter() - started)
+
+    async def _stream_response(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        **kwargs,
+    ) -> AsyncIterator[str]:
+        """Implementation-specific streaming of raw response text"""
+        raise NotImplementedError(f"{type(self).__name__} does not support streaming")
+        yield
+
+    def compile_prompt(
+        self,
+        prompt_template: Template,
+        model: Type[T],
+        system_template: Optional[Template] = None,
+        include_schema: bool = True,
+        metadata: Optional[Dict] = None,
+    ) -> CompiledPrompt:
+        """Look up the compiled prompt, the schema is only summarized once"""
+        name = (metadata or {}).get("type", "default")
+        return self.prompts.compile(
+            name, prompt_template, model, system_template, include_schema
+        )
+
     async def process_request(
         self,
-        prompt_template: str,
+        prompt_template: Template,
         model: Type[T],
         template_vars: Dict[str, Any],
         system_prompt: Optional[str] = None,
@@ -37,29 +119,78 @@ class BaseLLMService(ABC):
         use_cache: bool = True,
         include_schema: bool = True,
         metadata: Optional[Dict] = None,
+        system_template: Optional[Template] = None,
+        cache_fingerprint: Optional[str] = None,
     ) -> Union[T, List[T]]:
         """
-        Process a request with schema handling and templating
+        Process a request with schema handling and templating. A cache
+        fingerprint replaces the rendered prompt in the cache key.
         """
-        # Add schema to template variables if needed
-        if include_schema:
-            template_vars["model"] = summarize_schema(model.model_json_schema())
-
-        # Generate prompt from template
-        prompt = prompt_template.substitute(**template_vars)
-        logger.info(f"Generated prompt: {prompt}")
+        compiled = self.compile_prompt(
+            prompt_template, model, system_template, include_schema, metadata
+        )
+        prompt = compiled.render(template_vars)
+        logger.debug(
+            "Generated prompt: %s",
+            LazyPayload(prompt),
+            extra=log_extra("llm.prompt", prompt=compiled.name, chars=len(prompt)),
+        )
         # Generate or get cached response
         response = await self.generate(
             prompt=prompt,
             response_model=model,
-            system_prompt=system_prompt,
+            system_prompt=compiled.system_prompt or system_prompt,
             user_id=user_id,
             use_cache=use_cache,
+            prompt_version=compiled.version,
+            cache_fingerprint=cache_fingerprint,
             metadata=metadata,
         )
-        logger.info(f"Generated response: {response}")
+        logger.debug(
+            "Generated response: %s",
+            LazyPayload(response),
+            extra=log_extra("llm.response", prompt=compiled.name),
+        )
         return response
 
+    async def process_stream_request(
+        self,
+        prompt_template: Template,
+        model: Type[T],
+        template_vars: Dict[str, Any],
+        system_prompt: Optional[str] = None,
+        user_id: Optional[UUID] = None,
+        use_cache: bool = True,
+        include_schema: bool = True,
+        metadata: Optional[Dict] = None,
+        system_template: Optional[Template] = None,
+        cache_fingerprint: Optional[str] = None,
+    ) -> AsyncIterator[BaseModel]:
+        """
+        Streaming counterpart of process_request, yields each element of the
+        model's list field as soon as it has been generated
+        """
+        compiled = self.compile_prompt(
+            prompt_template, model, system_template, include_schema, metadata
+        )
+        prompt = compiled.render(template_vars)
+        logger.debug(
+            "Generated prompt: %s",
+            LazyPayload(prompt),
+            extra=log_extra("llm.prompt", prompt=compiled.name, chars=len(prompt)),
+        )
+        async for item in self.generate_stream(
+            prompt=prompt,
+            response_model=model,
+            system_prompt=compiled.system_prompt or system_prompt,
+            user_id=user_id,
+            use_cache=use_cache,
+            prompt_version=compiled.version,
+            cache_fingerprint=cache_fingerprint,
+            metadata=metadata,
+        ):
+            yield item
+
     async def generate(
         self,
         prompt: str,
@@ -67,35 +198,243 @@ class BaseLLMService(ABC):
         system_prompt: Optional[str] = None,
         user_id: Optional[UUID] = None,
         use_cache: bool = True,
+        prompt_version: Optional[str] = None,
+        cache_fingerprint: Optional[str] = None,
         **kwargs,
     ) -> Union[T, List[T]]:
         """Generate response with caching layer"""
-        if use_cache:
-            cached_response = await self.cache.get_cached_response(
+        if not use_cache:
+            metadata = kwargs.get("metadata") or {}
+            return await self._call_provider(
+                metadata.get("type", "default"),
                 prompt=prompt,
-                system_prompt=system_prompt,
                 response_model=response_model,
+                system_prompt=system_prompt,
+                user_id=user_id,
+                **kwargs,
             )
-            if cached_response:
-                return response_model.model_validate(cached_response)
 
-        # Generate new response
-        response = await self._generate_response(
+        cache_key = make_cache_key(
             prompt=prompt,
-            response_model=response_model,
             system_prompt=system_prompt,
-            **kwargs,
+            response_model=response_model,
+            model_version=self.model_version,
+            prompt_version=prompt_version,
+            fingerprint=cache_fingerprint,
         )
 
-        # Cache the response if user_id is provided
-        if user_id and use_cache:
-            await self.cache.cache_response(
+        request_type = (kwargs.get("metadata") or {}).get("type", "default")
+        cached_response = self.memory_cache.get(cache_key)
+        LLM_CACHE_LOOKUPS.labels(
+            request_type, "memory", "miss" if cached_response is None else "hit"
+        ).inc()
+        if isinstance(cached_response, CachedFailure):
+            raise ValueError(cached_response.message)
+        if cached_response is not None:
+            self.cache.stats.record(request_type, hit=True)
+            return response_model.model_validate(cached_response)
+
+        # Identical concurrent requests share a single lookup and provider call
+        return await self.inflight.do(
+            cache_key,
+            lambda: self._fetch_or_generate(
+                cache_key=cache_key,
                 prompt=prompt,
-                response=response.model_dump(),
-                user_id=user_id,
+                response_model=response_model,
                 system_prompt=system_prompt,
+                user_id=user_id,
+                **kwargs,
+            ),
+        )
+
+    async def _fetch_or_generate(
+        self,
+        cache_key: str,
+        prompt: str,
+        response_model: Type[T],
+        system_prompt: Optional[str] = None,
+        user_id: Optional[UUID] = None,
+        **kwargs,
+    ) -> Union[T, List[T]]:
+        """Look up the database cache, falling back to the provider"""
+        metadata = kwargs.get("metadata") or {}
+        request_type = metadata.get("type", "default")
+
+        cached_response = await self._get_stored_response(cache_key, request_type)
+        if cached_response is not None:
+            return response_model.model_validate(cached_response)
+
+        try:
+            response = await self._call_provider(
+                request_type,
+                prompt=prompt,
                 response_model=response_model,
-                metadata=kwargs.get("metadata"),
+                system_prompt=system_prompt,
+                user_id=user_id,
+                **kwargs,
             )
+        except LLMUnavailableError:
+            stale_response = await self.cache.get_stale_response(cache_key, request_type)
+            if stale_response is None:
+                raise
+            logger.warning(f"Provider unavailable, serving stale {request_type} response")
+            return response_model.model_validate(stale_response)
+        except ValueError as e:
+            # Unparseable responses are cached briefly as negative results
+            self.memory_cache.set_failure(cache_key, str(e))
+            raise
 
+        await self._store_response(
+            cache_key, response, request_type, response_model, user_id
+        )
         return response
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        response_model: Type[T],
+        system_prompt: Optional[str] = None,
+        user_id: Optional[UUID] = None,
+        use_cache: bool = True,
+        prompt_version: Optional[str] = None,
+        cache_fingerprint: Optional[str] = None,
+        **kwargs,
+    ) -> AsyncIterator[BaseModel]:
+        """Stream list elements, validating each one as soon as it is complete"""
+        field_name, item_model = get_list_field(response_model)
+        metadata = kwargs.get("metadata") or {}
+        request_type = metadata.get("type", "default")
+        cache_key = make_cache_key(
+            prompt=prompt,
+            system_prompt=system_prompt,
+            response_model=response_model,
+            model_version=self.model_version,
+            prompt_version=prompt_version,
+            fingerprint=cache_fingerprint,
+        )
+
+        if use_cache:
+            cached_response = self.memory_cache.get(cache_key)
+            if isinstance(cached_response, CachedFailure):
+                cached_response = None
+            LLM_CACHE_LOOKUPS.labels(
+                request_type, "memory", "miss" if cached_response is None else "hit"
+            ).inc()
+            if cached_response is None:
+                cached_response = await self._get_stored_response(
+                    cache_key, request_type
+                )
+            else:
+                self.cache.stats.record(request_type, hit=True)
+            if cached_response is not None:
+                cached_model = response_model.model_validate(cached_response)
+                for item in getattr(cached_model, field_name):
+                    yield item
+                return
+
+        streamer = JSONArrayStreamer(key=field_name)
+        items = []
+        dropped = 0
+        stale_response = None
+        outcome = "ok"
+        started = time.perf_counter()
+        try:
+            async for chunk in self.resilience.stream(
+                lambda: self._stream_response(
+                    prompt=prompt,
+                    system_prompt=system_prompt,
+                    response_model=response_model,
+                    user_id=user_id,
+                    **kwargs,
+                ),
+                request_type,
+            ):
+                for raw_item in streamer.feed(chunk):
+                    try:
+                        item = item_model.model_validate_json(raw_item)
+                    except ValidationError as e:
+                        dropped += 1
+                        logger.warning(
+                            f"Dropping invalid streamed {item_model.__name__}: {e}"
+                        )
+                        continue
+                    items.append(item)
+                    yield item
+        except LLMUnavailableError:
+            outcome = "error"
+            # Stale items can't be mixed with ones already sent
+            if items or not use_cache:
+                raise
+            stale_response = await self.cache.get_stale_response(cache_key, request_type)
+            if stale_response is None:
+                raise
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            self._observe_latency(request_type, outcome, started)
+
+        if stale_response is not None:
+            logger.warning(f"Provider unavailable, serving stale {request_type} response")
+            for item in getattr(response_model.model_validate(stale_response), field_name):
+                yield item
+            return
+
+        if not streamer.array_closed:
+            logger.warning(
+                f"Stream ended before the {field_name} list was closed, "
+                f"kept {len(items)} items"
+            )
+        elif use_cache and items and not dropped:
+            await self._store_response(
+                cache_key,
+                response_model(**{field_name: items}),
+                request_type,
+                response_model,
+                user_id,
+            )
+
+    async def _get_stored_response(
+        self, cache_key: str, request_type: str
+    ) -> Optional[Dict[str, Any]]:
+        """Look up the database tier, backfilling the in-process tier on a hit"""
+        cached_response = await self.cache.get_cached_response(
+            cache_key, request_type=request_type
+        )
+        LLM_CACHE_LOOKUPS.labels(
+            request_type, "database", "miss" if cached_response is None else "hit"
+        ).inc()
+        if cached_response is not None:
+            logger.info(
+                f"LLM cache hit for {request_type} "
+                f"(hit rate {self.cache.stats.hit_rate(request_type):.0%})"
+            )
+            self.memory_cache.set(
+                cache_key, cached_response, ttl=get_ttl(request_type).total_seconds()
+            )
+        else:
+            logger.info(
+                f"LLM cache miss for {request_type} "
+                f"(hit rate {self.cache.stats.hit_rate(request_type):.0%})"
+            )
+        return cached_response
+
+    async def _store_response(
+        self,
+        cache_key: str,
+        response: BaseModel,
+        request_type: str,
+        response_model: Type[BaseModel],
+        user_id: Optional[UUID] = None,
+    ) -> None:
+        response_data = response.model_dump(mode="json")
+        self.memory_cache.set(
+            cache_key, response_data, ttl=get_ttl(request_type).total_seconds()
+        )
+        await self.cache.cache_response(
+            cache_key=cache_key,
+            response=response_data,
+            request_type=request_type,
+            response_model=response_model,
+            user_id=user_id,
+        )
@@ -0,0 +1,105 @@
+import re
+from typing import List, Optional
+
+# Only these characters can change nesting or string state
+_STRUCTURAL = re.compile(r'[\\"{}\[\]]')
+
+
+class JSONArrayStreamer:
+    """
+    Incremental scanner that pulls complete elements out of a JSON array
+    while the surrounding document is still arriving.
+
+    The array is either the top-level value or the value of `key` in the
+    top-level object (e.g. {"recipes": [...]}). Text before the JSON payload,
+    such as a sentence of prose, is skipped. Elements must be objects, arrays
+    or strings. Only structural characters are visited, each once, so feeding
+    a response chunk by chunk costs O(total length).
+    """
+
+    def __init__(self, key: Optional[str] = None):
+        self.key = key
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped_at = -1
+        self._string_start = -1
+        self._last_string: Optional[str] = None
+        self._array_depth: Optional[int] = None
+        self._element_start = -1
+        self.array_closed = False
+
+    @property
+    def in_array(self) -> bool:
+        return self._array_depth is not None
+
+    @property
+    def has_partial_element(self) -> bool:
+        """True when an element has started but not yet been completed"""
+        return self._element_start >= 0
+
+    def feed(self, chunk: str) -> List[str]:
+        """Add text and return the raw JSON of every element completed by it"""
+        self._buffer += chunk
+        buffer = self._buffer
+        completed = []
+
+        for match in _STRUCTURAL.finditer(buffer, self._pos):
+            char = match.group()
+            pos = match.start()
+
+            if self._in_string:
+                if pos == self._escaped_at:
+                    continue
+                if char == "\\":
+                    self._escaped_at = pos + 1
+                elif char == '"':
+                    self._in_string = False
+                    if self._at_element_level() and self._element_start >= 0:
+                        completed.append(buffer[self._element_start : pos + 1])
+                        self._element_start = -1
+                    elif self._depth == 1:
+                        self._last_string = buffer[self._string_start + 1 : pos]
+                continue
+
+            if self._depth == 0 and char not in "{[":
+                # Prose before the payload, or anything after it
+                continue
+
+            if char == "\\":
+                continue
+            if char == '"':
+                self._in_string = True
+                self._string_start = pos
+                if self._at_element_level():
+                    self._element_start = pos
+            elif char in "{[":
+                if self._at_element_level():
+                    self._element_start = pos
+                self._depth += 1
+                if char == "[" and self._is_target_array():
+                    self._array_depth = self._depth
+            elif char in "}]":
+                self._depth -= 1
+                if self._array_depth is None:
+                    continue
+                if self._at_element_level() and self._element_start >= 0:
+                    completed.append(buffer[self._element_start : pos + 1])
+                    self._element_start = -1
+                elif self._depth < self._array_depth:
+                    self._array_depth = None
+                    self.array_closed = True
+
+        self._pos = len(buffer)
+        return completed
+
+    def _is_target_array(self) -> bool:
+        if self._array_depth is not None or self.array_closed:
+            return False
+        if self.key is None:
+            return self._depth == 1
+        return self._depth == 2 and self._last_string == self.key
+
+    def _at_element_level(self) -> bool:
+        return self._array_depth is not None and self._depth == self._array_depth
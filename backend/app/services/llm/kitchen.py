@@ -0,0 +1,203 @@
+import logging
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Type, TypeVar
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from ...models.pantry import ListOfPantryItemsCreate, PantryItemCreate
+from ...models.recipes import ListOfRecipeData, RecipePreferences
+from .base import BaseLLMService
+from .prompts import (
+    BATCH_INGREDIENT_ANALYSIS_PROMPT_TEMPLATE,
+    BATCH_INGREDIENT_ANALYSIS_SYSTEM_TEMPLATE,
+    INGREDIENT_ANALYSIS_PROMPT_TEMPLATE,
+    INGREDIENT_ANALYSIS_SYSTEM_TEMPLATE,
+    RECIPE_GENERATION_PROMPT_TEMPLATE,
+    RECIPE_GENERATION_SYSTEM_TEMPLATE,
+)
+from .scheduler import Priority, get_priority
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T", bound=BaseModel)
+TODAY = datetime.now().strftime("%Y-%m-%d")
+
+# Every (request type, prompt, system prompt, response model) these services
+# use, compiled when the service is created instead of on the first request
+PROMPTS = [
+    (
+        "ingredient_analysis",
+        INGREDIENT_ANALYSIS_PROMPT_TEMPLATE,
+        INGREDIENT_ANALYSIS_SYSTEM_TEMPLATE,
+        PantryItemCreate,
+    ),
+    (
+        "ingredient_batch_analysis",
+        BATCH_INGREDIENT_ANALYSIS_PROMPT_TEMPLATE,
+        BATCH_INGREDIENT_ANALYSIS_SYSTEM_TEMPLATE,
+        ListOfPantryItemsCreate,
+    ),
+    (
+        "receipt_analysis",
+        INGREDIENT_ANALYSIS_PROMPT_TEMPLATE,
+        INGREDIENT_ANALYSIS_SYSTEM_TEMPLATE,
+        ListOfPantryItemsCreate,
+    ),
+    (
+        "recipe_generation",
+        RECIPE_GENERATION_PROMPT_TEMPLATE,
+        RECIPE_GENERATION_SYSTEM_TEMPLATE,
+        ListOfRecipeData,
+    ),
+]
+
+
+class KitchenLLMService(BaseLLMService):
+    """
+    The requests the app makes of an LLM: ingredient and receipt parsing and
+    recipe generation. Providers only implement _generate_response and
+    _stream_response.
+    """
+
+    def __init__(self):
+        super().__init__()
+        for request_type, prompt_template, system_template, model in PROMPTS:
+            self.compile_prompt(
+                prompt_template, model, system_template, metadata={"type": request_type}
+            )
+
+    async def parse_ingredient_text(
+        self,
+        model: Type[T],
+        ingredient: str,
+        user_id: Optional[UUID] = None,
+        use_cache: bool = True,
+    ) -> T:
+        """Parse and standardize items from receipt text"""
+        return await self.process_request(
+            prompt_template=INGREDIENT_ANALYSIS_PROMPT_TEMPLATE,
+            system_template=INGREDIENT_ANALYSIS_SYSTEM_TEMPLATE,
+            model=model,
+            template_vars={"ingredients": ingredient, "today": TODAY},
+            user_id=user_id,
+            use_cache=use_cache,
+            metadata={"type": "ingredient_analysis", "units": 1},
+        )
+
+    async def parse_ingredient_batch(
+        self,
+        model: Type[T],
+        ingredients: List[str],
+        user_id: Optional[UUID] = None,
+        use_cache: bool = True,
+    ) -> T:
+        """Enrich several ingredients in one request, results keep input order"""
+        ingredients_text = "\n".join(
+            f"{i}. {ingredient}" for i, ingredient in enumerate(ingredients, start=1)
+        )
+        return await self.process_request(
+            prompt_template=BATCH_INGREDIENT_ANALYSIS_PROMPT_TEMPLATE,
+            system_template=BATCH_INGREDIENT_ANALYSIS_SYSTEM_TEMPLATE,
+            model=model,
+            template_vars={"ingredients": ingredients_text, "today": TODAY},
+            user_id=user_id,
+            use_cache=use_cache,
+            metadata={"type": "ingredient_batch_analysis", "units": len(ingredients)},
+        )
+
+    async def parse_receipt_text(
+        self,
+        model: Type[T],
+        receipt_text: str,
+        user_id: Optional[UUID] = None,
+        use_cache: bool = True,
+    ) -> T:
+        """Parse receipt text and return list of PantryItemCreate"""
+        return await self.process_request(
+            prompt_template=INGREDIENT_ANALYSIS_PROMPT_TEMPLATE,
+            system_template=INGREDIENT_ANALYSIS_SYSTEM_TEMPLATE,
+            model=model,
+            template_vars={"ingredients": receipt_text, "today": TODAY},
+            user_id=user_id,
+            use_cache=use_cache,
+            metadata={
+                "type": "receipt_analysis",
+                "units": len(receipt_text.splitlines()),
+            },
+        )
+
+    async def generate_recipes(
+        self,
+        model: Type[T],
+        ingredients: List[str],
+        preferences: RecipePreferences,
+        user_id: Optional[UUID] = None,
+        use_cache: bool = True,
+        cache_fingerprint: Optional[str] = None,
+    ) -> List[T]:
+        """Generate recipes using structured prompt"""
+        ingredients_text = "\n".join(f"- {item}" for item in ingredients)
+
+        return await self.process_request(
+            prompt_template=RECIPE_GENERATION_PROMPT_TEMPLATE,
+            system_template=RECIPE_GENERATION_SYSTEM_TEMPLATE,
+            model=model,
+            template_vars={
+                "ingredients": ingredients_text,
+                "preferences": preferences,
+            },
+            user_id=user_id,
+            use_cache=use_cache,
+            cache_fingerprint=cache_fingerprint,
+            metadata={
+                "type": "recipe_generation",
+                "units": preferences.num_recipes,
+            },
+        )
+
+    async def stream_recipes(
+        self,
+        model: Type[T],
+        ingredients: List[str],
+        preferences: RecipePreferences,
+        user_id: Optional[UUID] = None,
+        use_cache: bool = True,
+        cache_fingerprint: Optional[str] = None,
+    ) -> AsyncIterator[BaseModel]:
+        """Generate recipes, yielding each one as soon as Claude finishes it"""
+        ingredients_text = "\n".join(f"- {item}" for item in ingredients)
+
+        async for recipe in self.process_stream_request(
+            prompt_template=RECIPE_GENERATION_PROMPT_TEMPLATE,
+            system_template=RECIPE_GENERATION_SYSTEM_TEMPLATE,
+            model=model,
+            template_vars={
+                "ingredients": ingredients_text,
+                "preferences": preferences,
+            },
+            user_id=user_id,
+            use_cache=use_cache,
+            cache_fingerprint=cache_fingerprint,
+            metadata={
+                "type": "recipe_generation",
+                "units": preferences.num_recipes,
+            },
+        ):
+            yield recipe
+
+    @staticmethod
+    def _request_type(kwargs: dict) -> str:
+        metadata = kwargs.get("metadata") or {}
+        return metadata.get("type", "default")
+
+    @staticmethod
+    def _priority(kwargs: dict) -> Priority:
+        metadata = kwargs.get("metadata") or {}
+        return metadata.get("priority") or get_priority(metadata.get("type", "default"))
+
+    @staticmethod
+    def _units(kwargs: dict) -> int:
+        """How many recipes/items the request asks for, used to size max_tokens"""
+        metadata = kwargs.get("metadata") or {}
+        return metadata.get("units", 1)
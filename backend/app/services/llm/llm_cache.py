@@ -1,78 +1,156 @@
+import hashlib
+import json
 import logging
-from datetime import datetime
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
 from typing import Any, Dict, Optional, Type
 from uuid import UUID
 
 from pydantic import BaseModel
 
-from ...db.crud import UserContentCRUD
+from ...db.crud import LLMCacheCRUD
 
 logger = logging.getLogger(__name__)
 
+# How long a cached response stays valid, per request type
+CACHE_TTLS: Dict[str, timedelta] = {
+    "ingredient_analysis": timedelta(days=30),
+    "ingredient_batch_analysis": timedelta(days=30),
+    "receipt_analysis": timedelta(days=7),
+    "recipe_generation": timedelta(hours=6),
+}
+DEFAULT_TTL = timedelta(days=1)
+
+# Minimum number of seconds between two sweeps of expired rows
+EVICTION_INTERVAL = 600
+
+# Expired rows are kept this long so they can be served while the provider is down
+STALE_GRACE = timedelta(days=2)
+
+
+def get_ttl(request_type: str) -> timedelta:
+    return CACHE_TTLS.get(request_type, DEFAULT_TTL)
+
+
+def make_cache_key(
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    response_model: Optional[Type[BaseModel]] = None,
+    model_version: Optional[str] = None,
+    prompt_version: Optional[str] = None,
+    fingerprint: Optional[str] = None,
+) -> str:
+    """
+    Stable content hash identifying an LLM request. A fingerprint, if given,
+    stands in for the prompt so requests that differ only in detail the
+    caller considers irrelevant share an entry.
+    """
+    payload = json.dumps(
+        {
+            "prompt": prompt if fingerprint is None else None,
+            "fingerprint": fingerprint,
+            "system_prompt": system_prompt,
+            "model": response_model.__name__ if response_model else None,
+            "model_version": model_version,
+            "prompt_version": prompt_version,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CacheStats:
+    """Hit/miss counters across both cache tiers, broken down by request type"""
+
+    def __init__(self):
+        self.hits: Dict[str, int] = defaultdict(int)
+        self.misses: Dict[str, int] = defaultdict(int)
+
+    def record(self, request_type: str, hit: bool) -> None:
+        if hit:
+            self.hits[request_type] += 1
+        else:
+            self.misses[request_type] += 1
+
+    def hit_rate(self, request_type: Optional[str] = None) -> float:
+        if request_type is None:
+            hits = sum(self.hits.values())
+            total = hits + sum(self.misses.values())
+        else:
+            hits = self.hits[request_type]
+            total = hits + self.misses[request_type]
+        return hits / total if total else 0.0
+
 
 class LLMCache:
     def __init__(self):
-        self.user_content = UserContentCRUD()
+        self.crud = LLMCacheCRUD()
+        self.stats = CacheStats()
+        self._last_eviction = 0.0
 
     async def get_cached_response(
-        self,
-        prompt: str,
-        system_prompt: Optional[str] = None,
-        response_model: Optional[Type[BaseModel]] = None,
+        self, cache_key: str, request_type: str = "default"
     ) -> Optional[Dict[str, Any]]:
-        """Try to get a cached response for the given prompt"""
+        """Try to get a cached response for the given cache key"""
         try:
-            # Query recent cached responses without metadata filtering
-            cached = await self.user_content.get_user_content(
-                user_id=None, type="llm_cache", limit=1
-            )
+            entry = await self.crud.get_entry(cache_key)
+        except Exception as e:
+            logger.error(f"Error retrieving cached response: {str(e)}")
+            entry = None
 
-            if cached and len(cached) > 0:
-                # Check metadata match manually
-                cache_key = {
-                    "prompt": prompt,
-                    "system_prompt": system_prompt,
-                    "model": response_model.__name__ if response_model else None,
-                }
-                if cached[0].get("metadata") == cache_key:
-                    return cached[0]["data"]["response"]
+        self.stats.record(request_type, hit=entry is not None)
+        return entry["response"] if entry else None
 
-            return None
+    async def get_stale_response(
+        self, cache_key: str, request_type: str = "default"
+    ) -> Optional[Dict[str, Any]]:
+        """Get a cached response even if it has expired, for degraded operation"""
+        try:
+            entry = await self.crud.get_entry(cache_key, include_expired=True)
         except Exception as e:
-            logger.error(f"Error retrieving cached response: {str(e)}")
+            logger.error(f"Error retrieving stale response: {str(e)}")
             return None
+        return entry["response"] if entry else None
 
     async def cache_response(
         self,
-        prompt: str,
+        cache_key: str,
         response: Any,
-        user_id: Optional[UUID] = None,
-        system_prompt: Optional[str] = None,
+        request_type: str = "default",
         response_model: Optional[Type[BaseModel]] = None,
-        metadata: Optional[Dict] = None,
+        user_id: Optional[UUID] = None,
     ) -> None:
-        """Cache an LLM response"""
+        """Cache an LLM response under its content hash"""
         try:
-            logger.info(f"Caching response for user {user_id}")
-            # Create cache metadata
-            cache_metadata = {
-                "prompt": prompt,
-                "system_prompt": system_prompt,
-                "model": response_model.__name__ if response_model else None,
-                "timestamp": datetime.utcnow().isoformat(),
-                **(metadata or {}),
-            }
-
-            # Store in user_content table
-            result = await self.user_content.create_content(
+            ttl = get_ttl(request_type)
+            await self.crud.upsert_entry(
+                cache_key=cache_key,
+                response=response,
+                request_type=request_type,
+                expires_at=datetime.utcnow() + ttl,
+                response_model=response_model.__name__ if response_model else None,
                 user_id=user_id,
-                type="llm_cache",
-                data={"response": response},
-                metadata=cache_metadata,
             )
-            logger.debug(f"Cache entry created: {result}")
-
+            await self.evict_expired()
         except Exception as e:
             logger.error(f"Error caching response: {str(e)}", exc_info=True)
             # If caching fails, we can safely ignore it
-            pass
+
+    async def evict_expired(self, force: bool = False) -> int:
+        """Remove rows expired for over STALE_GRACE, at most once per EVICTION_INTERVAL"""
+        now = time.monotonic()
+        if not force and now - self._last_eviction < EVICTION_INTERVAL:
+            return 0
+        self._last_eviction = now
+        try:
+            removed = await self.crud.delete_expired(
+                before=datetime.utcnow() - STALE_GRACE
+            )
+            if removed:
+                logger.info(f"Evicted {removed} expired llm cache entries")
+            return removed
+        except Exception as e:
+            logger.error(f"Error evicting expired cache entries: {str(e)}")
+            return 0
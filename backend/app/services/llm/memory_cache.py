@@ -0,0 +1,112 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Default total size of serialized responses held in memory
+DEFAULT_MAX_BYTES = int(os.getenv("LLM_MEMORY_CACHE_BYTES", str(32 * 1024 * 1024)))
+
+# Failed parses are remembered briefly so retries don't hammer the provider
+NEGATIVE_TTL = float(os.getenv("LLM_MEMORY_CACHE_NEGATIVE_TTL", "60"))
+
+
+class CachedFailure:
+    """Marker stored in place of a response when the request failed"""
+
+    __slots__ = ("message",)
+
+    def __init__(self, message: str):
+        self.message = message
+
+
+class MemoryCache:
+    """
+    In-process LRU cache bounded by the total serialized size of its values.
+    Entries carry their own expiry; expired entries are dropped on access.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value (or CachedFailure), None on miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, size, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            if isinstance(value, CachedFailure):
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return value
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        size = len(json.dumps(value, default=str).encode("utf-8"))
+        self._store(key, value, size, ttl)
+
+    def set_failure(self, key: str, message: str, ttl: float = NEGATIVE_TTL) -> None:
+        self._store(key, CachedFailure(message), len(message.encode("utf-8")), ttl)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "negative_hits": self.negative_hits,
+            "evictions": self.evictions,
+        }
+
+    def _store(self, key: str, value: Any, size: int, ttl: float) -> None:
+        # Values larger than the whole budget are never worth caching
+        if size > self.max_bytes or ttl <= 0:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (value, size, time.monotonic() + ttl)
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+
+
+_memory_cache = MemoryCache()
+
+
+def get_memory_cache() -> MemoryCache:
+    return _memory_cache
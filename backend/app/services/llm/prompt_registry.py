@@ -0,0 +1,141 @@
+import difflib
+import hashlib
+import logging
+import threading
+from string import Template
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+from .schema_utils import summarize_schema
+
+logger = logging.getLogger(__name__)
+
+
+class CompiledPrompt:
+    """
+    A (template, response model) pair with everything that doesn't depend
+    on the request worked out once: the summarized schema, the rendered
+    system prompt and a content hash used as the prompt version.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        prompt_template: Template,
+        model: Type[BaseModel],
+        system_template: Optional[Template] = None,
+        include_schema: bool = True,
+    ):
+        self.name = name
+        self.model = model
+        self.prompt_template = prompt_template
+        self.system_template = system_template
+        self.schema_text = (
+            summarize_schema(model.model_json_schema()) if include_schema else ""
+        )
+        self.system_prompt = (
+            system_template.substitute(model=self.schema_text)
+            if system_template is not None
+            else None
+        )
+        self.version = hashlib.sha256(self.static_text.encode("utf-8")).hexdigest()[:16]
+
+    @property
+    def static_text(self) -> str:
+        """Everything that is fixed for this prompt, used for versioning and diffs"""
+        return (
+            f"# system\n{self.system_prompt or ''}\n"
+            f"# prompt\n{self.prompt_template.template}\n"
+            f"# schema\n{self.schema_text}\n"
+        )
+
+    def render(self, template_vars: Dict[str, Any]) -> str:
+        """Substitute the per-request values into the prompt template"""
+        return self.prompt_template.substitute(template_vars, model=self.schema_text)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "model": self.model.__name__,
+            "version": self.version,
+            "system_chars": len(self.system_prompt or ""),
+            "prompt_chars": len(self.prompt_template.template),
+        }
+
+
+class PromptRegistry:
+    """Compiled prompts, keyed by their templates and response model"""
+
+    def __init__(self):
+        self._prompts: Dict[Tuple, CompiledPrompt] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._prompts)
+
+    def compile(
+        self,
+        name: str,
+        prompt_template: Template,
+        model: Type[BaseModel],
+        system_template: Optional[Template] = None,
+        include_schema: bool = True,
+    ) -> CompiledPrompt:
+        """Return the compiled prompt for this pair, compiling it on first use"""
+        key = (prompt_template, system_template, model, include_schema)
+        compiled = self._prompts.get(key)
+        if compiled is not None:
+            return compiled
+
+        with self._lock:
+            compiled = self._prompts.get(key)
+            if compiled is None:
+                compiled = CompiledPrompt(
+                    name, prompt_template, model, system_template, include_schema
+                )
+                self._prompts[key] = compiled
+                logger.info(
+                    f"Compiled prompt {name} for {model.__name__} "
+                    f"(version {compiled.version})"
+                )
+        return compiled
+
+    def list_prompts(self) -> List[Dict[str, Any]]:
+        return sorted(
+            (prompt.describe() for prompt in self._prompts.values()),
+            key=lambda p: (p["name"], p["model"]),
+        )
+
+    def versions(self) -> Dict[str, str]:
+        """Snapshot of prompt versions, e.g. to compare two deployments"""
+        return {
+            f"{p['name']}:{p['model']}": p["version"] for p in self.list_prompts()
+        }
+
+    def changed_since(self, versions: Dict[str, str]) -> List[str]:
+        """Prompts whose version differs from (or is missing in) a snapshot"""
+        return [
+            key
+            for key, version in self.versions().items()
+            if versions.get(key) != version
+        ]
+
+    @staticmethod
+    def diff(old: CompiledPrompt, new: CompiledPrompt) -> str:
+        """Unified diff of the static text of two compiled prompts"""
+        return "".join(
+            difflib.unified_diff(
+                old.static_text.splitlines(keepends=True),
+                new.static_text.splitlines(keepends=True),
+                fromfile=f"{old.name}:{old.model.__name__}@{old.version}",
+                tofile=f"{new.name}:{new.model.__name__}@{new.version}",
+            )
+        )
+
+
+_prompt_registry = PromptRegistry()
+
+
+def get_prompt_registry() -> PromptRegistry:
+    return _prompt_registry
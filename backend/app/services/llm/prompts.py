@@ -0,0 +1,103 @@
+from string import Template
+
+# Each prompt is split in two. The system template holds the instructions and
+# the schema, which are identical for every request of that type, so the
+# provider can cache them. The prompt template holds only the per-request data.
+
+INGREDIENT_ANALYSIS_SYSTEM = """
+Format ingredients that may have come from user input or an OCR scan
+Into standard format as specified in the model below:
+
+<model>
+$model
+</model>
+
+- Set original_name to the item exactly as it appears in the input
+- Use your best guess for nutritional information 
+- make sure to use the standard unit for scaling the nutritional information
+- In notes add an icon to indicate the type of ingredient
+- fill in the expiration date, assume standard shelf life, todays date is given with the ingredients
+- just reply with the json object
+"""
+
+INGREDIENT_ANALYSIS_SYSTEM_TEMPLATE = Template(INGREDIENT_ANALYSIS_SYSTEM)
+
+INGREDIENT_ANALYSIS_PROMPT = """
+Todays date is $today
+
+Here are the ingredients to format:
+<ingredients>
+$ingredients
+</ingredients>
+"""
+
+INGREDIENT_ANALYSIS_PROMPT_TEMPLATE = Template(INGREDIENT_ANALYSIS_PROMPT)
+
+BATCH_INGREDIENT_ANALYSIS_SYSTEM = """
+Format each numbered pantry item, which were entered by users,
+into standard format as specified in the model below:
+
+<model>
+$model
+</model>
+
+- Return exactly one item per numbered input, in the same order, never skip or merge items
+- Set original_name to the name given in the input, exactly as written
+- Keep the quantity and unit given in the input unless they are missing
+- Use your best guess for nutritional information 
+- make sure to use the standard unit for scaling the nutritional information
+- In notes add an icon to indicate the type of ingredient
+- fill in the expiration date, assume standard shelf life, todays date is given with the items
+- just reply with the json object
+"""
+
+BATCH_INGREDIENT_ANALYSIS_SYSTEM_TEMPLATE = Template(BATCH_INGREDIENT_ANALYSIS_SYSTEM)
+
+BATCH_INGREDIENT_ANALYSIS_PROMPT = """
+Todays date is $today
+
+Here are the items to format:
+<ingredients>
+$ingredients
+</ingredients>
+"""
+
+BATCH_INGREDIENT_ANALYSIS_PROMPT_TEMPLATE = Template(BATCH_INGREDIENT_ANALYSIS_PROMPT)
+
+RECIPE_GENERATION_SYSTEM = """
+Generate recipes based on the requirements and available ingredients the user gives you.
+Feel free to generate international recipes. 
+And be liberal with using non-english names.
+Return recipes that exactly match this schema:
+
+<model>
+$model
+</model>
+
+Important:
+- Make good recipes, should be balanced, nutritious, and delicious. 
+- Include a variety of recipes so that user has a good selection, try to return num_recipes requested
+- Cross-check nutritional information on recipe to that on ingredients and be consistent
+- Include detailed step-by-step instructions, each step should have sufficient detail
+- Assume a few common ingredients (such as salt, pepper, oil, basic spices) are available, 
+- If you mention any other ingredients in instructions, you should include them in ingredients list
+- Add an icon to each step to indicate the type of step
+- Try fill in the protein, calories for each ingredient
+- Always try to fill in the price, estimate if ingredients are not available
+"""
+
+RECIPE_GENERATION_SYSTEM_TEMPLATE = Template(RECIPE_GENERATION_SYSTEM)
+
+RECIPE_GENERATION_PROMPT = """
+<ingredients>   
+Available Ingredients:
+$ingredients
+</ingredients>
+
+<preferences>
+Preferences:
+$preferences
+</preferences>
+"""
+
+RECIPE_GENERATION_PROMPT_TEMPLATE = Template(RECIPE_GENERATION_PROMPT)
@@ -0,0 +1,17 @@
+import os
+
+from ..kitchen import KitchenLLMService
+
+
+def get_llm_service() -> KitchenLLMService:
+    """The provider selected by LLM_PROVIDER: "claude" (default) or "local" """
+    provider = os.getenv("LLM_PROVIDER", "claude").lower()
+    if provider == "local":
+        from .local import LocalLLMService
+
+        return LocalLLMService()
+    if provider == "claude":
+        from .claude import ClaudeService
+
+        return ClaudeService()
+    raise ValueError(f"Unknown LLM_PROVIDER: {provider}")
@@ -1,33 +1,222 @@
-import json
 import logging
-from typing import List, Type, TypeVar, Union
+import re
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple, Type, TypeVar, Union
 
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from ...base import get_list_field
+from ...json_stream import JSONArrayStreamer
 
 logger = logging.getLogger(__name__)
 T = TypeVar("T", bound=BaseModel)
 
 
+@lru_cache(maxsize=None)
+def get_type_adapter(type_: Any) -> TypeAdapter:
+    """TypeAdapters are expensive to build, so build one per type"""
+    return TypeAdapter(type_)
+
+
+class ParseReport:
+    """What the parser had to do to get a result out of a response"""
+
+    def __init__(self):
+        self.skipped_candidates = 0
+        self.truncated = False
+        self.salvaged = 0
+        self.dropped = 0
+
+    def __str__(self) -> str:
+        return (
+            f"skipped_candidates={self.skipped_candidates} truncated={self.truncated} "
+            f"salvaged={self.salvaged} dropped={self.dropped}"
+        )
+
+
+# Only these characters can change nesting or string state
+_STRUCTURAL = re.compile(r'[\\"{}\[\]]')
+
+# Each salvage attempt rescans the rest of the response, so only the
+# outermost few values left open are tried, not every stray bracket
+MAX_SALVAGE_ATTEMPTS = 3
+
+
+class _ScannedValues:
+    """Where the JSON values in a response start and end, from one pass over it"""
+
+    __slots__ = ("complete", "open_starts", "open_children")
+
+    def __init__(self):
+        # (start, end) of each complete value not nested in another complete one
+        self.complete: List[Tuple[int, int]] = []
+        # Values still open when the text ends, outermost first
+        self.open_starts: List[int] = []
+        # Complete values directly inside an open one, e.g. a payload after a stray '{'
+        self.open_children: List[Tuple[int, int]] = []
+
+
+def _scan_values(content: str) -> _ScannedValues:
+    """
+    Track nesting and string state in a single left-to-right pass. Quotes
+    and closing brackets outside any value are prose and are ignored.
+    """
+    scanned = _ScannedValues()
+    # [start, complete children] of each open value, outermost first
+    stack: List[Tuple[int, List[Tuple[int, int]]]] = []
+    in_string = False
+    escaped_at = -1
+    for match in _STRUCTURAL.finditer(content):
+        char = match.group()
+        pos = match.start()
+        if in_string:
+            if char == "\\":
+                if escaped_at != pos:
+                    escaped_at = pos + 1
+            elif char == '"' and escaped_at != pos:
+                in_string = False
+        elif char in "{[":
+            stack.append((pos, []))
+        elif not stack:
+            continue
+        elif char == '"':
+            in_string = True
+        elif char in "}]":
+            start, _ = stack.pop()
+            if stack:
+                stack[-1][1].append((start, pos))
+            else:
+                scanned.complete.append((start, pos))
+
+    for start, children in stack:
+        scanned.open_starts.append(start)
+        scanned.open_children.extend(children)
+    return scanned
+
+
+def _is_json_error(error: ValidationError) -> bool:
+    return any(e["type"] == "json_invalid" for e in error.errors())
+
+
+def _validate_payload(payload: bytes, model_class: Type[T]) -> Union[T, List[T]]:
+    """Validate a JSON payload, accepting a bare list for list wrapper models"""
+    if payload.lstrip()[:1] != b"[":
+        return get_type_adapter(model_class).validate_json(payload)
+
+    try:
+        field_name, item_model = get_list_field(model_class)
+    except ValueError:
+        return get_type_adapter(List[model_class]).validate_json(payload)
+    items = get_type_adapter(List[item_model]).validate_json(payload)
+    return model_class(**{field_name: items})
+
+
+def _validate_outermost(content: str, model_class: Type[T]) -> Optional[Union[T, List[T]]]:
+    """Fast path for the common case of one clean payload, optionally wrapped in prose"""
+    starts = [i for i in (content.find("{"), content.find("[")) if i != -1]
+    if not starts:
+        return None
+    start = min(starts)
+    end = content.rfind("}" if content[start] == "{" else "]")
+    if end < start:
+        return None
+    try:
+        return _validate_payload(content[start : end + 1].encode(), model_class)
+    except ValidationError:
+        return None
+
+
+def _salvage(
+    fragment: str, model_class: Type[T], report: ParseReport, truncated: bool
+) -> Optional[Union[T, List[T]]]:
+    """Recover every complete, valid list element from a payload"""
+    try:
+        field_name, item_model = get_list_field(model_class)
+    except ValueError:
+        field_name, item_model = None, model_class
+
+    is_bare_list = fragment.startswith("[")
+    streamer = JSONArrayStreamer(key=None if is_bare_list else field_name)
+    item_adapter = get_type_adapter(item_model)
+
+    items = []
+    dropped = 0
+    for raw_item in streamer.feed(fragment):
+        try:
+            items.append(item_adapter.validate_json(raw_item))
+        except ValidationError:
+            dropped += 1
+    if streamer.has_partial_element:
+        dropped += 1
+
+    if not items:
+        return None
+    report.truncated = truncated
+    report.salvaged = len(items)
+    report.dropped = dropped
+    if field_name is None:
+        return items
+    return model_class(**{field_name: items})
+
+
+def extract_json(
+    content: str, model_class: Type[T]
+) -> Tuple[Union[T, List[T]], ParseReport]:
+    """
+    Find and validate the JSON payload in a response.
+
+    One pass over the response finds every top-level value, and they are
+    tried in order. A value that is not valid JSON (a stray brace in prose)
+    is skipped. If the payload is cut off, or a few of its list elements
+    don't match the schema, every complete and valid element is kept.
+    Returns (result, ParseReport).
+    """
+    report = ParseReport()
+    fast = _validate_outermost(content, model_class)
+    if fast is not None:
+        return fast, report
+
+    first_error: Optional[ValidationError] = None
+    scanned = _scan_values(content)
+
+    def try_complete(spans: List[Tuple[int, int]]) -> Optional[Union[T, List[T]]]:
+        nonlocal first_error
+        for start, end in spans:
+            payload = content[start : end + 1]
+            try:
+                return _validate_payload(payload.encode(), model_class)
+            except ValidationError as e:
+                if not _is_json_error(e):
+                    result = _salvage(payload, model_class, report, truncated=False)
+                    if result is not None:
+                        return result
+                    # Well-formed JSON of the wrong shape
+                    first_error = first_error or e
+                report.skipped_candidates += 1
+        return None
+
+    result = try_complete(scanned.complete)
+    if result is not None:
+        return result, report
+
+    # A cut off payload, or a stray opening bracket before a complete one
+    for start in scanned.open_starts[:MAX_SALVAGE_ATTEMPTS]:
+        result = _salvage(content[start:], model_class, report, truncated=True)
+        if result is not None:
+            return result, report
+        report.skipped_candidates += 1
+    result = try_complete(scanned.open_children)
+    if result is not None:
+        return result, report
+
+    raise ValueError(f"No valid JSON found in response ({report})") from first_error
+
+
 def parse_claude_response(content: str, model_class: Type[T]) -> Union[T, List[T]]:
     """Parse Claude's response into a Pydantic model"""
-    # Try to find JSON content by looking for common patterns
-    json_patterns = [
-        (content.find("{"), content.rfind("}")),  # Object pattern
-        (content.find("["), content.rfind("]")),  # Array pattern
-    ]
-
-    # Try each pattern and use the one that yields valid JSON
-    for start, end in json_patterns:
-        if start != -1 and end != -1:
-            try:
-                json_str = content[start : end + 1]
-                data = json.loads(json_str)
-                return (
-                    [model_class(**item) for item in data]
-                    if isinstance(data, list)
-                    else model_class(**data)
-                )
-            except json.JSONDecodeError:
-                continue
-
-    raise ValueError("No valid JSON found in response")
+    result, report = extract_json(content, model_class)
+    if report.truncated or report.dropped:
+        logger.warning(f"Salvaged partial {model_class.__name__} response: {report}")
+    elif report.skipped_candidates:
+        logger.info(f"Parsed {model_class.__name__} response: {report}")
+    return result
@@ -1,88 +1,174 @@
 import logging
-from datetime import datetime
-from typing import List, Optional, Type, TypeVar, Union
-from uuid import UUID
+from typing import AsyncIterator, List, Optional, Tuple, Type, TypeVar, Union
 
-from anthropic import AsyncAnthropic
+from anthropic import APIConnectionError, APIStatusError, AsyncAnthropic
 from pydantic import BaseModel
 
-from ...base import BaseLLMService
-from .handlers import parse_claude_response
-from .prompts import (
-    INGREDIENT_ANALYSIS_PROMPT_TEMPLATE,
-    MAX_TOKENS,
-    MODEL,
-    RECIPE_GENERATION_PROMPT_TEMPLATE,
+from .....logs import LazyPayload, log_extra
+from ...kitchen import KitchenLLMService
+from ...scheduler import get_scheduler
+from ...token_budget import (
+    MAX_CONTINUATIONS,
+    MIN_OUTPUT_TOKENS,
+    estimate_input_tokens,
+    get_token_budget,
 )
+from ...usage import USAGE_FIELDS, get_token_usage, rate_limited_tokens
+from .handlers import parse_claude_response
+from .prompts import MODEL
 
 logger = logging.getLogger(__name__)
 
 T = TypeVar("T", bound=BaseModel)
-TODAY = datetime.now().strftime("%Y-%m-%d")
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+def _split_prefill(text: str) -> Tuple[str, str]:
+    """
+    The prefill to continue a cut-off response with, and the whitespace
+    held back from it. The API rejects a prefill ending in whitespace, but
+    the cut may be inside a JSON string, so the text keeps its whitespace
+    and the continuation's own leading whitespace is dropped instead.
+    """
+    prefill = text.rstrip()
+    return prefill, text[len(prefill):]
+
 
+class ClaudeService(KitchenLLMService):
+    model_version = MODEL
 
-class ClaudeService(BaseLLMService):
     def __init__(self):
         super().__init__()
-        self.client = AsyncAnthropic()
+        # Retries are handled by the resilience policy, within the call's deadline
+        self.client = AsyncAnthropic(max_retries=0)
+        self.usage = get_token_usage()
+        self.budget = get_token_budget()
+        self.scheduler = get_scheduler()
 
-    async def parse_ingredient_text(
+    def is_retryable(self, error: BaseException) -> bool:
+        """Connection errors, timeouts, rate limits, overload (529) and 5xx"""
+        if isinstance(error, APIConnectionError):
+            return True
+        if isinstance(error, APIStatusError):
+            return error.status_code in RETRYABLE_STATUS_CODES
+        return super().is_retryable(error)
+
+    def _create_params(
         self,
-        model: Type[T],
-        ingredient: str,
-        user_id: Optional[UUID] = None,
-        use_cache: bool = True,
-    ) -> T:
-        """Parse and standardize items from receipt text"""
-        return await self.process_request(
-            prompt_template=INGREDIENT_ANALYSIS_PROMPT_TEMPLATE,
-            model=model,
-            template_vars={"ingredients": ingredient, "today": TODAY},
-            user_id=user_id,
-            use_cache=use_cache,
-            metadata={"type": "ingredient_analysis"},
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        max_tokens: int = MIN_OUTPUT_TOKENS,
+        prefill: str = "",
+    ) -> dict:
+        """
+        The system prompt holds the static instructions and schema, it is
+        marked cacheable so repeat requests only pay for the variable suffix
+        """
+        messages = [{"role": "user", "content": prompt}]
+        if prefill:
+            # Continue a response that was cut off at max_tokens
+            messages.append({"role": "assistant", "content": prefill})
+
+        # Create the request parameters
+        create_params = {
+            "model": MODEL,
+            "max_tokens": max_tokens,
+            "messages": messages,
+        }
+
+        # Add system parameter if provided
+        if system_prompt:
+            create_params["system"] = [
+                {
+                    "type": "text",
+                    "text": system_prompt,
+                    "cache_control": {"type": "ephemeral"},
+                }
+            ]
+
+        return create_params
+
+    @staticmethod
+    def _log_request(
+        create_params: dict, request_type: str, continuation: int, stream: bool = False
+    ) -> None:
+        logger.info(
+            "Claude %s request",
+            "streaming" if stream else "single",
+            extra=log_extra(
+                "llm.request",
+                request_type=request_type,
+                max_tokens=create_params["max_tokens"],
+                continuation=continuation,
+            ),
+        )
+        logger.debug(
+            "Claude request params: %s",
+            LazyPayload(create_params),
+            extra=log_extra("llm.payload", request_type=request_type),
         )
 
-    async def parse_receipt_text(
-        self,
-        model: Type[T],
-        receipt_text: str,
-        user_id: Optional[UUID] = None,
-        use_cache: bool = True,
-    ) -> T:
-        """Parse receipt text and return list of PantryItemCreate"""
-        return await self.process_request(
-            prompt_template=INGREDIENT_ANALYSIS_PROMPT_TEMPLATE,
-            model=model,
-            template_vars={"ingredients": receipt_text, "today": TODAY},
-            user_id=user_id,
-            use_cache=use_cache,
-            metadata={"type": "receipt_analysis"},
+    @staticmethod
+    def _streamed_tokens(stream) -> Optional[int]:
+        """Tokens an unfinished stream has used, None if the provider reported none yet"""
+        try:
+            usage = stream.current_message_snapshot.usage
+        except Exception:
+            return None
+        return rate_limited_tokens(
+            {field: getattr(usage, field, None) or 0 for field in USAGE_FIELDS}
         )
 
-    async def generate_recipes(
+    async def _stream_response(
         self,
-        model: Type[T],
-        ingredients: List[str],
-        preferences: str,
-        user_id: Optional[UUID] = None,
-        use_cache: bool = True,
-    ) -> List[T]:
-        """Generate recipes using structured prompt"""
-        ingredients_text = "\n".join(f"- {item}" for item in ingredients)
-
-        return await self.process_request(
-            prompt_template=RECIPE_GENERATION_PROMPT_TEMPLATE,
-            model=model,
-            template_vars={
-                "ingredients": ingredients_text,
-                "preferences": preferences,
-            },
-            system_prompt=None,
-            user_id=user_id,
-            use_cache=use_cache,
-            metadata={"type": "recipe_generation"},
-        )
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        **kwargs,
+    ) -> AsyncIterator[str]:
+        request_type = self._request_type(kwargs)
+        priority = self._priority(kwargs)
+        user_id = kwargs.get("user_id")
+        units = self._units(kwargs)
+        max_tokens = self.budget.estimate(request_type, units)
+        text = prefill = held = ""
+        output_tokens = 0
+        for continuation in range(MAX_CONTINUATIONS + 1):
+            create_params = self._create_params(prompt, system_prompt, max_tokens, prefill)
+            reserved = estimate_input_tokens(system_prompt, prompt, prefill) + max_tokens
+            self._log_request(create_params, request_type, continuation, stream=True)
+            async with self.scheduler.slot(priority, user_id, reserved) as ticket:
+                async with self.client.messages.stream(**create_params) as stream:
+                    message = None
+                    try:
+                        async for chunk in stream.text_stream:
+                            if held:
+                                # The held back whitespace was already yielded
+                                chunk = chunk.lstrip()
+                                if not chunk:
+                                    continue
+                                held = ""
+                            text += chunk
+                            yield chunk
+                        message = await stream.get_final_message()
+                    finally:
+                        if message is None:
+                            # Failed or abandoned mid-stream, charge what was used so far
+                            used = self._streamed_tokens(stream)
+                            if used is not None:
+                                ticket.settle(used)
+                counts = self.usage.record(request_type, message.usage)
+                ticket.settle(rate_limited_tokens(counts))
+            output_tokens += message.usage.output_tokens
+
+            truncated = message.stop_reason == "max_tokens"
+            if not truncated:
+                break
+            self.budget.record_truncation(
+                request_type, continuing=continuation < MAX_CONTINUATIONS
+            )
+            prefill, held = _split_prefill(text)
+
+        self.budget.observe(request_type, units, output_tokens, truncated)
 
     async def _generate_response(
         self,
@@ -92,21 +178,38 @@ class ClaudeService(BaseLLMService):
         **kwargs,
     ) -> Union[T, List[T]]:
         """Implementation of abstract method from BaseLLMService"""
-        messages = [{"role": "user", "content": prompt}]
+        request_type = self._request_type(kwargs)
+        priority = self._priority(kwargs)
+        user_id = kwargs.get("user_id")
+        units = self._units(kwargs)
+        max_tokens = self.budget.estimate(request_type, units)
+        text = prefill = held = ""
+        output_tokens = 0
+        for continuation in range(MAX_CONTINUATIONS + 1):
+            create_params = self._create_params(prompt, system_prompt, max_tokens, prefill)
+            reserved = estimate_input_tokens(system_prompt, prompt, prefill) + max_tokens
+            self._log_request(create_params, request_type, continuation)
+            async with self.scheduler.slot(priority, user_id, reserved) as ticket:
+                response = await self.client.messages.create(**create_params)
+                counts = self.usage.record(request_type, response.usage)
+                ticket.settle(rate_limited_tokens(counts))
+            output_tokens += response.usage.output_tokens
+            part = response.content[0].text
+            text += part.lstrip() if held else part
 
-        # Create the request parameters
-        create_params = {
-            "model": MODEL,
-            "max_tokens": MAX_TOKENS,
-            "messages": messages,
-        }
+            truncated = response.stop_reason == "max_tokens"
+            if not truncated:
+                break
+            self.budget.record_truncation(
+                request_type, continuing=continuation < MAX_CONTINUATIONS
+            )
+            prefill, held = _split_prefill(text)
 
-        # Add system parameter if provided
-        if system_prompt:
-            create_params["system"] = system_prompt
-
-        logger.info(f"Claude request: {create_params}")
-        response = await self.client.messages.create(**create_params)
-        logger.info(f"Claude response: {response.content[0].text}")
+        self.budget.observe(request_type, units, output_tokens, truncated)
+        logger.debug(
+            "Claude response: %s",
+            LazyPayload(text),
+            extra=log_extra("llm.response", request_type=request_type, chars=len(text)),
+        )
 
-        return parse_claude_response(response.content[0].text, response_model)
+        return parse_claude_response(text, response_model)
@@ -0,0 +1,3 @@
+from .service import LocalLLMService
+
+__all__ = ["LocalLLMService"]
@@ -0,0 +1,150 @@
+import random
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Any, Dict, Optional, Type
+
+from pydantic import BaseModel
+
+FOODS = [
+    "rice", "chicken breast", "spinach", "garlic", "onion", "tomato", "egg",
+    "milk", "cheddar", "lentils", "chickpeas", "carrot", "potato", "tofu",
+    "salmon", "broccoli", "bell pepper", "yogurt", "oats", "banana", "apple",
+    "bread", "pasta", "ginger", "coriander", "lime", "mushroom", "zucchini",
+]
+DISHES = [
+    "Shakshuka", "Dal Tadka", "Bibimbap", "Pad Krapow", "Chana Masala",
+    "Frittata", "Risotto", "Pho Ga", "Menemen", "Okonomiyaki", "Gallo Pinto",
+]
+STEPS = [
+    "🔪 Chop the {food} into bite-sized pieces",
+    "🔥 Heat oil in a pan over medium heat",
+    "🍳 Saute the {food} until golden",
+    "🥄 Stir in the spices and cook for a minute",
+    "💧 Add water and bring to a simmer",
+    "⏲️ Cover and cook for 10 minutes",
+    "🧂 Season with salt and pepper to taste",
+    "🍽️ Garnish with {food} and serve",
+]
+
+# Values for string fields, by model and then by field name
+STRINGS: Dict[Optional[str], Dict[str, list]] = {
+    "RecipeData": {"category": ["Breakfast", "Lunch", "Dinner", "Snack"]},
+    None: {
+        "unit": ["grams", "ml", "units", "cups", "tbsp"],
+        "standard_unit": ["100 grams", "100 ml", "1 unit"],
+        "category": ["produce", "dairy", "grains", "protein", "spices", "canned"],
+        "notes": ["🥕", "🥛", "🌾", "🍗", "🧄", "🥫", "🍎"],
+    },
+}
+
+# Realistic ranges for numeric fields, by field name
+RANGES: Dict[str, tuple] = {
+    "preparation_time": (10, 90),
+    "servings": (1, 6),
+    "quantity": (0.5, 500),
+    "calories": (20, 650),
+    "protein": (0, 40),
+    "carbs": (0, 80),
+    "fat": (0, 30),
+    "fiber": (0, 12),
+    "price": (0.5, 25),
+}
+
+# Lengths of nested lists, by field name
+LENGTHS: Dict[str, tuple] = {
+    "ingredients": (3, 7),
+    "instructions": (4, 8),
+    "substitutes": (0, 2),
+}
+
+# Chance of leaving out an optional field
+OMIT_OPTIONAL = 0.2
+
+
+@lru_cache(maxsize=None)
+def _schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    return model.model_json_schema()
+
+
+class SchemaDataGenerator:
+    """
+    Builds plausible data for a pydantic model by walking its JSON schema.
+    Everything is drawn from `rng`, so the same seed gives the same data.
+    """
+
+    def __init__(self, model: Type[BaseModel], rng: random.Random):
+        self.schema = _schema(model)
+        self.defs = self.schema.get("$defs", {})
+        self.rng = rng
+
+    def generate(self, list_length: Optional[int] = None) -> Dict[str, Any]:
+        """Data for the model, its top-level list field gets `list_length` items"""
+        return self._object(self.schema, list_length)
+
+    def _resolve(self, node: Dict[str, Any]) -> Dict[str, Any]:
+        if "$ref" in node:
+            return self.defs[node["$ref"].split("/")[-1]]
+        return node
+
+    def _object(self, node: Dict[str, Any], list_length: Optional[int] = None) -> Dict[str, Any]:
+        required = set(node.get("required", []))
+        title = node.get("title")
+        data = {}
+        for name, field in node.get("properties", {}).items():
+            if name not in required and self.rng.random() < OMIT_OPTIONAL:
+                continue
+            value = self._value(field, name, title, list_length)
+            if value is not None or name not in required:
+                data[name] = value
+        return data
+
+    def _value(
+        self,
+        node: Dict[str, Any],
+        name: str,
+        parent: Optional[str],
+        list_length: Optional[int] = None,
+    ) -> Any:
+        node = self._resolve(node)
+        if "anyOf" in node:
+            options = [o for o in node["anyOf"] if o.get("type") != "null"]
+            if not options or options[0].get("format") == "uuid":
+                return None
+            return self._value(options[0], name, parent, list_length)
+
+        kind = node.get("type")
+        if kind == "object" or "properties" in node:
+            return self._object(node)
+        if kind == "array":
+            if list_length is not None:
+                length = list_length
+            else:
+                length = self.rng.randint(*LENGTHS.get(name, (1, 4)))
+            return [self._value(node.get("items", {}), name, parent) for _ in range(length)]
+        if kind == "integer":
+            low, high = RANGES.get(name, (1, 100))
+            low = max(low, node.get("minimum", low), node.get("exclusiveMinimum", low - 1) + 1)
+            return self.rng.randint(int(low), int(max(low, high)))
+        if kind == "number":
+            low, high = RANGES.get(name, (0, 100))
+            low = max(low, node.get("minimum", low))
+            return round(self.rng.uniform(low, max(low, high)), 2)
+        if kind == "boolean":
+            return self.rng.random() < 0.2
+        if kind == "string":
+            return self._string(name, parent)
+        return None
+
+    def _string(self, name: str, parent: Optional[str]) -> str:
+        choices = STRINGS.get(parent, {}).get(name) or STRINGS[None].get(name)
+        if choices:
+            return self.rng.choice(choices)
+        if name == "expiry_date":
+            return (date.today() + timedelta(days=self.rng.randint(2, 60))).isoformat()
+        if name == "instructions":
+            return self.rng.choice(STEPS).format(food=self.rng.choice(FOODS))
+        if name == "name" and parent == "RecipeData":
+            return f"{self.rng.choice(DISHES)} with {self.rng.choice(FOODS)}"
+        if name in ("name", "original_name", "substitutes"):
+            return self.rng.choice(FOODS)
+        return f"{name} {self.rng.randint(1, 999)}"
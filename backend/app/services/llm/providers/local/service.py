@@ -0,0 +1,115 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+from typing import AsyncIterator, List, Optional, Type, TypeVar, Union
+
+from pydantic import BaseModel
+
+from ...kitchen import KitchenLLMService
+from .generator import SchemaDataGenerator
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T", bound=BaseModel)
+
+# Same seed and prompt give the same response, across runs and processes
+SEED = int(os.getenv("LOCAL_LLM_SEED", "0"))
+
+# Latency is lognormal around the median, plus a cost per recipe/item
+LATENCY_MEDIAN_MS = float(os.getenv("LOCAL_LLM_LATENCY_MEDIAN_MS", "800"))
+LATENCY_SIGMA = float(os.getenv("LOCAL_LLM_LATENCY_SIGMA", "0.5"))
+LATENCY_PER_UNIT_MS = float(os.getenv("LOCAL_LLM_LATENCY_PER_UNIT_MS", "150"))
+
+# Share of calls that fail with a transient (retryable) error
+ERROR_RATE = float(os.getenv("LOCAL_LLM_ERROR_RATE", "0"))
+
+# Characters per streamed chunk
+STREAM_CHUNK_SIZE = 64
+
+
+class SimulatedOverloadError(ConnectionError):
+    """Stands in for a provider overload or connection error"""
+
+
+class LocalLLMService(KitchenLLMService):
+    """
+    Provider that makes no network calls. Responses are generated from the
+    response model's schema with randomness seeded by the prompt, after a
+    simulated latency, and a configurable share of calls fail. Used to load
+    test the app without paying for, or being throttled by, a real provider.
+    """
+
+    model_version = "local"
+
+    def __init__(
+        self,
+        seed: int = SEED,
+        latency_median_ms: float = LATENCY_MEDIAN_MS,
+        latency_sigma: float = LATENCY_SIGMA,
+        latency_per_unit_ms: float = LATENCY_PER_UNIT_MS,
+        error_rate: float = ERROR_RATE,
+    ):
+        super().__init__()
+        self.seed = seed
+        self.latency_median_ms = latency_median_ms
+        self.latency_sigma = latency_sigma
+        self.latency_per_unit_ms = latency_per_unit_ms
+        self.error_rate = error_rate
+        # Latency and failures vary between calls, content only with the prompt
+        self._chaos = random.Random(seed)
+        self.calls = 0
+        self.failures = 0
+
+    def _content_rng(self, prompt: str, system_prompt: Optional[str]) -> random.Random:
+        digest = hashlib.sha256(f"{self.seed}\n{system_prompt}\n{prompt}".encode("utf-8"))
+        return random.Random(digest.digest())
+
+    def _latency(self, units: int) -> float:
+        """Seconds this call takes"""
+        base = self.latency_median_ms * self._chaos.lognormvariate(0, self.latency_sigma)
+        return (base + units * self.latency_per_unit_ms) / 1000
+
+    def _build(
+        self, prompt: str, response_model: Type[T], system_prompt: Optional[str], units: int
+    ) -> dict:
+        self.calls += 1
+        if self._chaos.random() < self.error_rate:
+            self.failures += 1
+            raise SimulatedOverloadError("Simulated provider overload")
+        generator = SchemaDataGenerator(
+            response_model, self._content_rng(prompt, system_prompt)
+        )
+        return generator.generate(list_length=units)
+
+    async def _stream_response(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        **kwargs,
+    ) -> AsyncIterator[str]:
+        response_model = kwargs["response_model"]
+        units = self._units(kwargs)
+        latency = self._latency(units)
+        data = self._build(prompt, response_model, system_prompt, units)
+        text = json.dumps(data, ensure_ascii=False)
+        chunks = [
+            text[i : i + STREAM_CHUNK_SIZE] for i in range(0, len(text), STREAM_CHUNK_SIZE)
+        ]
+        for chunk in chunks:
+            await asyncio.sleep(latency / len(chunks))
+            yield chunk
+
+    async def _generate_response(
+        self,
+        prompt: str,
+        response_model: Type[T],
+        system_prompt: Optional[str] = None,
+        **kwargs,
+    ) -> Union[T, List[T]]:
+        units = self._units(kwargs)
+        await asyncio.sleep(self._latency(units))
+        data = self._build(prompt, response_model, system_prompt, units)
+        return response_model.model_validate(data)
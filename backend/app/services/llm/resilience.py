@@ -0,0 +1,397 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    Optional,
+    Set,
+    TypeVar,
+)
+
+logger = logging.getLogger(__name__)
+T = TypeVar("T")
+
+# End-to-end time allowed per request type, including queueing and retries
+DEADLINES: Dict[str, float] = {
+    "recipe_generation": 90.0,
+    "receipt_analysis": 60.0,
+    "ingredient_analysis": 30.0,
+    "ingredient_batch_analysis": 60.0,
+}
+DEFAULT_DEADLINE = float(os.getenv("LLM_DEFAULT_DEADLINE", "60"))
+
+MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "3"))
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+
+# Request types worth paying for a duplicate call to cut tail latency
+HEDGED_REQUEST_TYPES: Set[str] = set(
+    filter(None, os.getenv("LLM_HEDGED_REQUEST_TYPES", "recipe_generation").split(","))
+)
+# Latencies observed before hedging kicks in, p95 of fewer is noise
+HEDGE_MIN_SAMPLES = 20
+LATENCY_SAMPLES = 200
+
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+
+
+class LLMUnavailableError(Exception):
+    """The provider is unhealthy or too slow and no cached result could be served"""
+
+
+def get_deadline(request_type: str) -> float:
+    return DEADLINES.get(request_type, DEFAULT_DEADLINE)
+
+
+class CircuitBreaker:
+    """
+    Opens after BREAKER_FAILURE_THRESHOLD consecutive provider failures and
+    fails fast until BREAKER_RESET_TIMEOUT has passed. Then one trial call
+    is let through: success closes the breaker, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = BREAKER_RESET_TIMEOUT,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if (
+            self.state == self.OPEN
+            and time.monotonic() - self.opened_at >= self.reset_timeout
+        ):
+            self.state = self.HALF_OPEN
+            logger.info("LLM circuit breaker half open, sending a trial call")
+            return True
+        # Open, or half open with the trial call still running
+        self.rejected += 1
+        return False
+
+    def abandon_trial(self) -> None:
+        """The trial call ended without a result, e.g. cancelled, wait out another timeout"""
+        if self.state == self.HALF_OPEN:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            logger.info("LLM circuit breaker closed")
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(
+                    f"LLM circuit breaker open after {self.failures} failures"
+                )
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class _AttemptState:
+    __slots__ = ("waiting_for_slot",)
+
+    def __init__(self):
+        self.waiting_for_slot = False
+
+
+_attempt_state: ContextVar[Optional[_AttemptState]] = ContextVar(
+    "llm_attempt_state", default=None
+)
+
+
+@contextmanager
+def waiting_for_slot() -> Iterator[None]:
+    """
+    Wrap waiting in our own rate limit queue. A deadline that runs out in
+    there says nothing about the provider's health, so it isn't counted
+    against the circuit breaker.
+    """
+    state = _attempt_state.get()
+    if state is None:
+        yield
+        return
+    state.waiting_for_slot = True
+    # Only cleared once a slot is granted, a timeout leaves it set
+    yield
+    state.waiting_for_slot = False
+
+
+class LatencyTracker:
+    """Recent successful call latencies, per request type"""
+
+    def __init__(self, samples: int = LATENCY_SAMPLES):
+        self._latencies: Dict[str, Deque[float]] = defaultdict(
+            lambda: deque(maxlen=samples)
+        )
+
+    def record(self, request_type: str, seconds: float) -> None:
+        self._latencies[request_type].append(seconds)
+
+    def count(self, request_type: str) -> int:
+        return len(self._latencies[request_type])
+
+    def percentile(self, request_type: str, q: float) -> Optional[float]:
+        latencies = self._latencies[request_type]
+        if not latencies:
+            return None
+        ordered = sorted(latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class ResiliencePolicy:
+    """
+    Wraps provider calls with a deadline, jittered retries that never sleep
+    past that deadline, optional hedging and a circuit breaker.
+
+    `is_retryable` decides which errors are transient (timeouts, overload,
+    rate limits). Only those count against the breaker; anything else, such
+    as an unparseable response, is raised straight away.
+    """
+
+    def __init__(
+        self,
+        is_retryable: Callable[[BaseException], bool],
+        breaker: Optional[CircuitBreaker] = None,
+        latencies: Optional[LatencyTracker] = None,
+        max_attempts: int = MAX_ATTEMPTS,
+        hedged_request_types: Optional[Set[str]] = None,
+    ):
+        self.is_retryable = is_retryable
+        self.breaker = breaker or CircuitBreaker()
+        self.latencies = latencies or LatencyTracker()
+        self.max_attempts = max_attempts
+        self.hedged_request_types = (
+            HEDGED_REQUEST_TYPES if hedged_request_types is None else hedged_request_types
+        )
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    async def call(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        request_type: str = "default",
+        deadline: Optional[float] = None,
+    ) -> T:
+        """Run fn until it succeeds, fails permanently or the deadline passes"""
+        timeout = deadline if deadline is not None else get_deadline(request_type)
+        expires = time.monotonic() + timeout
+        last_error: Optional[BaseException] = None
+
+        for attempt in range(1, self.max_attempts + 1):
+            remaining = expires - time.monotonic()
+            if remaining <= 0:
+                break
+            if not self.breaker.allow():
+                raise LLMUnavailableError("LLM provider circuit breaker is open")
+            trial = self.breaker.state == CircuitBreaker.HALF_OPEN
+
+            state = _AttemptState()
+            reset = _attempt_state.set(state)
+            try:
+                result = await asyncio.wait_for(
+                    self._attempt(fn, request_type), timeout=remaining
+                )
+            except Exception as e:
+                timed_out = isinstance(e, asyncio.TimeoutError)
+                if not timed_out and not self.is_retryable(e):
+                    # The provider answered, it just wasn't a usable answer
+                    self.breaker.record_success()
+                    raise
+                last_error = e
+                if timed_out and state.waiting_for_slot:
+                    logger.warning(
+                        f"{request_type} ran out of time waiting for a scheduler slot"
+                    )
+                    break
+                self.breaker.record_failure()
+                logger.warning(
+                    f"{request_type} attempt {attempt}/{self.max_attempts} failed: "
+                    f"{type(e).__name__}: {e}"
+                )
+            else:
+                self.breaker.record_success()
+                return result
+            finally:
+                _attempt_state.reset(reset)
+                if trial:
+                    # Cancelled or timed out in the queue, the trial has no verdict
+                    self.breaker.abandon_trial()
+
+            if attempt == self.max_attempts:
+                break
+            # Full jitter, and never sleep past the deadline
+            backoff = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt))
+            remaining = expires - time.monotonic()
+            if backoff >= remaining:
+                break
+            self.retries += 1
+            await asyncio.sleep(backoff)
+
+        raise LLMUnavailableError(
+            f"{request_type} failed within its {timeout:.0f}s deadline: {last_error}"
+        ) from last_error
+
+    async def stream(
+        self,
+        fn: Callable[[], AsyncIterator[T]],
+        request_type: str = "default",
+        deadline: Optional[float] = None,
+    ) -> AsyncIterator[T]:
+        """
+        call() for a streamed response, the deadline covers the whole stream.
+        Only attempts that fail before their first chunk are retried, after
+        that a retry would repeat output the caller already has. The breaker
+        only hears of success once the stream completes, a stream the caller
+        abandons or that is cancelled gives no verdict.
+        """
+        loop = asyncio.get_running_loop()
+        timeout = deadline if deadline is not None else get_deadline(request_type)
+        expires = loop.time() + timeout
+        last_error: Optional[BaseException] = None
+
+        for attempt in range(1, self.max_attempts + 1):
+            if expires - loop.time() <= 0:
+                break
+            if not self.breaker.allow():
+                raise LLMUnavailableError("LLM provider circuit breaker is open")
+            trial = self.breaker.state == CircuitBreaker.HALF_OPEN
+
+            state = _AttemptState()
+            chunks = fn()
+            started_output = False
+            try:
+                while True:
+                    # Set around each read only, the context can't be held across a yield
+                    reset = _attempt_state.set(state)
+                    try:
+                        async with asyncio.timeout_at(expires):
+                            chunk = await anext(chunks)
+                    except StopAsyncIteration:
+                        break
+                    finally:
+                        _attempt_state.reset(reset)
+                    started_output = True
+                    yield chunk
+            except Exception as e:
+                timed_out = isinstance(e, TimeoutError)
+                if not timed_out and not self.is_retryable(e):
+                    raise
+                last_error = e
+                if timed_out and state.waiting_for_slot:
+                    logger.warning(
+                        f"{request_type} ran out of time waiting for a scheduler slot"
+                    )
+                    break
+                self.breaker.record_failure()
+                logger.warning(
+                    f"{request_type} stream attempt {attempt}/{self.max_attempts} "
+                    f"failed: {type(e).__name__}: {e}"
+                )
+                if started_output:
+                    break
+            else:
+                self.breaker.record_success()
+                return
+            finally:
+                await chunks.aclose()
+                if trial:
+                    self.breaker.abandon_trial()
+
+            if attempt == self.max_attempts:
+                break
+            backoff = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt))
+            if backoff >= expires - loop.time():
+                break
+            self.retries += 1
+            await asyncio.sleep(backoff)
+
+        raise LLMUnavailableError(
+            f"{request_type} failed within its {timeout:.0f}s deadline: {last_error}"
+        ) from last_error
+
+    async def _attempt(self, fn: Callable[[], Awaitable[T]], request_type: str) -> T:
+        started = time.monotonic()
+        hedge_after = self._hedge_delay(request_type)
+        if hedge_after is None:
+            result = await fn()
+        else:
+            result = await self._hedged(fn, hedge_after, request_type)
+        self.latencies.record(request_type, time.monotonic() - started)
+        return result
+
+    def _hedge_delay(self, request_type: str) -> Optional[float]:
+        if request_type not in self.hedged_request_types:
+            return None
+        if self.latencies.count(request_type) < HEDGE_MIN_SAMPLES:
+            return None
+        return self.latencies.percentile(request_type, 0.95)
+
+    async def _hedged(
+        self, fn: Callable[[], Awaitable[T]], hedge_after: float, request_type: str
+    ) -> T:
+        """Start a duplicate call if the first is slower than p95, first one wins"""
+        primary = asyncio.ensure_future(fn())
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+            if not done:
+                self.hedges += 1
+                logger.info(f"Hedging {request_type} call after {hedge_after:.1f}s")
+                tasks.append(asyncio.ensure_future(fn()))
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        return task.result()
+            # Every call failed, surface the primary's error
+            return primary.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+
+_policies: Dict[str, ResiliencePolicy] = {}
+
+
+def get_resilience_policy(
+    provider: str, is_retryable: Callable[[BaseException], bool]
+) -> ResiliencePolicy:
+    """One policy, and so one breaker and latency history, per provider"""
+    if provider not in _policies:
+        _policies[provider] = ResiliencePolicy(is_retryable)
+    return _policies[provider]
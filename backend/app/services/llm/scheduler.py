@@ -0,0 +1,307 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import AsyncIterator, Deque, Dict, Optional
+
+from .resilience import waiting_for_slot
+
+logger = logging.getLogger(__name__)
+
+# Provider limits we schedule against, leave some margin below the account's
+REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "50"))
+TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "80000"))
+
+# Calls allowed on the wire at once
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+
+# Waiting calls beyond this are rejected instead of queued
+MAX_INTERACTIVE_QUEUE = int(os.getenv("LLM_MAX_INTERACTIVE_QUEUE", "50"))
+MAX_BACKGROUND_QUEUE = int(os.getenv("LLM_MAX_BACKGROUND_QUEUE", "500"))
+
+# Number of recent waits kept per priority for percentiles
+WAIT_SAMPLES = 500
+
+
+class Priority(IntEnum):
+    """Lower values are always served first"""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+# A user is waiting on these, everything else can be deferred
+REQUEST_PRIORITIES: Dict[str, Priority] = {
+    "recipe_generation": Priority.INTERACTIVE,
+    "receipt_analysis": Priority.INTERACTIVE,
+    "ingredient_analysis": Priority.BACKGROUND,
+    "ingredient_batch_analysis": Priority.BACKGROUND,
+}
+
+
+def get_priority(request_type: str) -> Priority:
+    return REQUEST_PRIORITIES.get(request_type, Priority.INTERACTIVE)
+
+
+class QueueFullError(Exception):
+    """Raised when a priority class already has too many calls waiting"""
+
+
+class TokenBucket:
+    """Refills continuously at `per_minute` units per minute, up to `per_minute`"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.available = float(per_minute)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.available = min(
+            self.capacity, self.available + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be taken, 0 if it can be taken now"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.available -= min(amount, self.capacity)
+
+    def refund(self, amount: float) -> None:
+        self._refill()
+        self.available = min(self.capacity, self.available + amount)
+
+
+class Ticket:
+    """
+    A granted slot, settle() corrects the token reservation with actual usage.
+    A slot released without settling gives the whole reservation back.
+    """
+
+    __slots__ = (
+        "priority", "user_key", "tokens", "future", "enqueued_at", "settled", "_scheduler"
+    )
+
+    def __init__(self, scheduler, priority: Priority, user_key: str, tokens: int):
+        self._scheduler = scheduler
+        self.priority = priority
+        self.user_key = user_key
+        self.tokens = tokens
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.monotonic()
+        self.settled = False
+
+    def settle(self, actual_tokens: int) -> None:
+        self._scheduler._settle(self, actual_tokens)
+        self.settled = True
+
+
+class WaitStats:
+    """Queue wait times for one priority class"""
+
+    def __init__(self):
+        self.granted = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._recent: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+
+    def record(self, wait: float) -> None:
+        self.granted += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self._recent.append(wait)
+
+    def percentile(self, q: float) -> float:
+        if not self._recent:
+            return 0.0
+        ordered = sorted(self._recent)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "granted": self.granted,
+            "rejected": self.rejected,
+            "mean_wait": self.total_wait / self.granted if self.granted else 0.0,
+            "p95_wait": self.percentile(0.95),
+            "max_wait": self.max_wait,
+        }
+
+
+class RequestScheduler:
+    """
+    Admission control for outbound LLM calls.
+
+    Each call waits in the queue for its priority class until a concurrency
+    slot, a request from the per-minute request budget and its estimated
+    tokens from the per-minute token budget are all available. Interactive
+    calls are always granted before background ones. Within a class, users
+    take turns, so one user's bulk add can't hold up everyone else.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = REQUESTS_PER_MINUTE,
+        tokens_per_minute: int = TOKENS_PER_MINUTE,
+        max_concurrency: int = MAX_CONCURRENCY,
+        max_queue: Optional[Dict[Priority, int]] = None,
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue or {
+            Priority.INTERACTIVE: MAX_INTERACTIVE_QUEUE,
+            Priority.BACKGROUND: MAX_BACKGROUND_QUEUE,
+        }
+        # Per priority, one FIFO per user; users are served round-robin
+        self._queues: Dict[Priority, "OrderedDict[str, Deque[Ticket]]"] = {
+            priority: OrderedDict() for priority in Priority
+        }
+        self._queued: Dict[Priority, int] = {priority: 0 for priority in Priority}
+        self.running = 0
+        self.stats: Dict[Priority, WaitStats] = {p: WaitStats() for p in Priority}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def queue_depth(self, priority: Optional[Priority] = None) -> int:
+        if priority is None:
+            return sum(self._queued.values())
+        return self._queued[priority]
+
+    @asynccontextmanager
+    async def slot(
+        self, priority: Priority, user_id: Optional[str], tokens: int
+    ) -> AsyncIterator[Ticket]:
+        """Wait for a slot to make one call estimated to use `tokens` tokens"""
+        with waiting_for_slot():
+            ticket = await self._acquire(priority, str(user_id or "shared"), tokens)
+        try:
+            yield ticket
+        finally:
+            if not ticket.settled:
+                # The call failed or was abandoned before reporting usage
+                ticket.settle(0)
+            self.running -= 1
+            self._dispatch()
+
+    async def _acquire(self, priority: Priority, user_key: str, tokens: int) -> Ticket:
+        if self._queued[priority] >= self.max_queue[priority]:
+            self.stats[priority].rejected += 1
+            raise QueueFullError(
+                f"{priority.name.lower()} LLM queue is full "
+                f"({self._queued[priority]} calls waiting)"
+            )
+
+        ticket = Ticket(self, priority, user_key, tokens)
+        self._queues[priority].setdefault(user_key, deque()).append(ticket)
+        self._queued[priority] += 1
+        self._dispatch()
+
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if ticket.future.done() and not ticket.future.cancelled():
+                # Granted just as the caller went away, give the slot back
+                self.running -= 1
+                self.tokens.refund(ticket.tokens)
+                self._dispatch()
+            else:
+                self._remove(ticket)
+            raise
+
+        wait = time.monotonic() - ticket.enqueued_at
+        self.stats[priority].record(wait)
+        if wait > 1:
+            logger.info(
+                f"LLM call waited {wait:.1f}s in the {priority.name.lower()} queue "
+                f"({self.queue_depth()} still waiting)"
+            )
+        return ticket
+
+    def _remove(self, ticket: Ticket) -> None:
+        user_queue = self._queues[ticket.priority].get(ticket.user_key)
+        if user_queue and ticket in user_queue:
+            user_queue.remove(ticket)
+            self._queued[ticket.priority] -= 1
+            if not user_queue:
+                del self._queues[ticket.priority][ticket.user_key]
+
+    def _next_ticket(self) -> Optional[Ticket]:
+        for priority in Priority:
+            users = self._queues[priority]
+            if users:
+                return next(iter(users.values()))[0]
+        return None
+
+    def _dispatch(self) -> None:
+        """Grant slots to waiting calls for as long as the budgets allow"""
+        while self.running < self.max_concurrency:
+            ticket = self._next_ticket()
+            if ticket is None:
+                return
+
+            wait = max(self.requests.wait_time(1), self.tokens.wait_time(ticket.tokens))
+            if wait > 0:
+                self._schedule(wait)
+                return
+
+            self.requests.take(1)
+            self.tokens.take(ticket.tokens)
+            self.running += 1
+
+            users = self._queues[ticket.priority]
+            user_queue = users.pop(ticket.user_key)
+            user_queue.popleft()
+            self._queued[ticket.priority] -= 1
+            if user_queue:
+                # Back of the line, the next user goes first
+                users[ticket.user_key] = user_queue
+            ticket.future.set_result(None)
+
+    def _schedule(self, delay: float) -> None:
+        """Retry dispatching once the budgets have refilled"""
+        loop = asyncio.get_running_loop()
+        if self._timer is not None and self._timer_loop is loop:
+            return
+
+        def fire():
+            self._timer = None
+            self._dispatch()
+
+        self._timer = loop.call_later(delay, fire)
+        self._timer_loop = loop
+
+    def _settle(self, ticket: Ticket, actual_tokens: int) -> None:
+        """Return the unused part of a reservation, or charge the overrun"""
+        difference = ticket.tokens - actual_tokens
+        if difference > 0:
+            self.tokens.refund(difference)
+        elif difference < 0:
+            self.tokens.take(-difference)
+        ticket.tokens = actual_tokens
+
+    def stats_dict(self) -> Dict[str, Dict[str, float]]:
+        return {
+            priority.name.lower(): dict(
+                self.stats[priority].as_dict(), queued=self._queued[priority]
+            )
+            for priority in Priority
+        }
+
+
+_scheduler = RequestScheduler()
+
+
+def get_scheduler() -> RequestScheduler:
+    return _scheduler
@@ -0,0 +1,110 @@
+import logging
+import os
+from collections import defaultdict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bounds for max_tokens on a single call
+MIN_OUTPUT_TOKENS = int(os.getenv("LLM_MIN_OUTPUT_TOKENS", "512"))
+MAX_OUTPUT_TOKENS = int(os.getenv("LLM_MAX_OUTPUT_TOKENS", "8192"))
+
+# How many times a response cut off at max_tokens is continued
+MAX_CONTINUATIONS = int(os.getenv("LLM_MAX_CONTINUATIONS", "2"))
+
+# Reserve this much more than the estimate, a retry costs far more than slack
+HEADROOM = 1.3
+
+# Starting estimates of output tokens per unit (recipe, receipt line, item),
+# replaced by observed usage as responses come in
+TOKENS_PER_UNIT: Dict[str, float] = {
+    "recipe_generation": 700,
+    "receipt_analysis": 120,
+    "ingredient_analysis": 250,
+    "ingredient_batch_analysis": 200,
+}
+DEFAULT_TOKENS_PER_UNIT = 500
+
+# Tokens spent on the wrapper object and closing brackets
+BASE_TOKENS = 64
+
+# Weight of the newest observation in the moving average
+SMOOTHING = 0.2
+
+# Rough characters per token for English prompts
+CHARS_PER_TOKEN = 4
+
+
+def estimate_input_tokens(*texts: Optional[str]) -> int:
+    return sum(len(text) for text in texts if text) // CHARS_PER_TOKEN
+
+
+class TokenBudget:
+    """
+    Sizes max_tokens from the shape of a request (how many recipes, receipt
+    lines or items it asks for) and an exponential moving average of how many
+    output tokens each unit actually took. Also counts truncations.
+    """
+
+    def __init__(self):
+        self.tokens_per_unit: Dict[str, float] = dict(TOKENS_PER_UNIT)
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.truncations: Dict[str, int] = defaultdict(int)
+        self.continuations: Dict[str, int] = defaultdict(int)
+
+    def estimate(self, request_type: str, units: int = 1) -> int:
+        """max_tokens for a request producing `units` recipes/items"""
+        per_unit = self.tokens_per_unit.get(request_type, DEFAULT_TOKENS_PER_UNIT)
+        tokens = int((BASE_TOKENS + max(units, 1) * per_unit) * HEADROOM)
+        return max(MIN_OUTPUT_TOKENS, min(tokens, MAX_OUTPUT_TOKENS))
+
+    def observe(
+        self, request_type: str, units: int, output_tokens: int, truncated: bool
+    ) -> None:
+        """Record the outcome of a finished request, after any continuations"""
+        self.calls[request_type] += 1
+        if truncated:
+            # A cut-off response says nothing reliable about the full length
+            return
+        per_unit = max(output_tokens - BASE_TOKENS, 0) / max(units, 1)
+        current = self.tokens_per_unit.get(request_type, DEFAULT_TOKENS_PER_UNIT)
+        self.tokens_per_unit[request_type] = (
+            SMOOTHING * per_unit + (1 - SMOOTHING) * current
+        )
+
+    def record_truncation(self, request_type: str, continuing: bool) -> None:
+        """A response stopped at max_tokens"""
+        self.truncations[request_type] += 1
+        if continuing:
+            self.continuations[request_type] += 1
+        logger.warning(
+            f"{request_type} response hit max_tokens, "
+            f"{'continuing' if continuing else 'keeping what was generated'}"
+        )
+
+    def truncation_rate(self, request_type: Optional[str] = None) -> float:
+        """Truncations per finished request"""
+        if request_type is None:
+            truncations = sum(self.truncations.values())
+            calls = sum(self.calls.values())
+        else:
+            truncations = self.truncations[request_type]
+            calls = self.calls[request_type]
+        return truncations / calls if calls else 0.0
+
+    def continuation_rate(self, request_type: Optional[str] = None) -> float:
+        """Continuation calls per finished request"""
+        if request_type is None:
+            continuations = sum(self.continuations.values())
+            calls = sum(self.calls.values())
+        else:
+            continuations = self.continuations[request_type]
+            calls = self.calls[request_type]
+        return continuations / calls if calls else 0.0
+
+
+_token_budget = TokenBudget()
+
+
+def get_token_budget() -> TokenBudget:
+    return _token_budget
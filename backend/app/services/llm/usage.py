@@ -0,0 +1,78 @@
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Optional
+
+from ...metrics import record_tokens
+
+logger = logging.getLogger(__name__)
+
+USAGE_FIELDS = (
+    "input_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+    "output_tokens",
+)
+
+
+def rate_limited_tokens(counts: Dict[str, int]) -> int:
+    """Tokens that count against the provider's per-minute limit, cache reads don't"""
+    return (
+        counts["input_tokens"]
+        + counts["cache_creation_input_tokens"]
+        + counts["output_tokens"]
+    )
+
+
+class TokenUsage:
+    """Token counters, broken down by request type"""
+
+    def __init__(self):
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.totals: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: dict.fromkeys(USAGE_FIELDS, 0)
+        )
+
+    def record(self, request_type: str, usage: Any) -> Dict[str, int]:
+        """Add the usage block of one provider response and log it"""
+        counts = {field: getattr(usage, field, None) or 0 for field in USAGE_FIELDS}
+        self.calls[request_type] += 1
+        totals = self.totals[request_type]
+        for field, value in counts.items():
+            totals[field] += value
+        record_tokens(request_type, counts)
+
+        logger.info(
+            f"LLM usage for {request_type}: "
+            f"uncached_input={counts['input_tokens']} "
+            f"cache_write={counts['cache_creation_input_tokens']} "
+            f"cache_read={counts['cache_read_input_tokens']} "
+            f"output={counts['output_tokens']} "
+            f"(cached {self._cached_ratio(counts):.0%})"
+        )
+        return counts
+
+    def cached_ratio(self, request_type: Optional[str] = None) -> float:
+        """Share of input tokens served from the provider's prompt cache"""
+        if request_type is not None:
+            return self._cached_ratio(self.totals[request_type])
+        combined = dict.fromkeys(USAGE_FIELDS, 0)
+        for totals in self.totals.values():
+            for field, value in totals.items():
+                combined[field] += value
+        return self._cached_ratio(combined)
+
+    @staticmethod
+    def _cached_ratio(counts: Dict[str, int]) -> float:
+        total_input = (
+            counts["input_tokens"]
+            + counts["cache_creation_input_tokens"]
+            + counts["cache_read_input_tokens"]
+        )
+        return counts["cache_read_input_tokens"] / total_input if total_input else 0.0
+
+
+_token_usage = TokenUsage()
+
+
+def get_token_usage() -> TokenUsage:
+    return _token_usage
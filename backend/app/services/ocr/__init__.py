@@ -0,0 +1,38 @@
+import os
+from typing import Optional
+
+from .base import OcrEngine, OcrResult, OcrWord
+from .layout import layout_text
+from .pool import OcrPool, OcrQueueFullError, OcrTimeoutError
+
+_engine: Optional[OcrEngine] = None
+
+
+def get_ocr_engine() -> OcrEngine:
+    """The engine selected by OCR_ENGINE: "vision" (default) or "local" """
+    global _engine
+    if _engine is None:
+        engine = os.getenv("OCR_ENGINE", "vision").lower()
+        if engine == "local":
+            from .local import LocalEngine
+
+            _engine = LocalEngine()
+        elif engine == "vision":
+            from .vision import VisionEngine
+
+            _engine = VisionEngine()
+        else:
+            raise ValueError(f"Unknown OCR_ENGINE: {engine}")
+    return _engine
+
+
+__all__ = [
+    "OcrEngine",
+    "OcrPool",
+    "OcrQueueFullError",
+    "OcrResult",
+    "OcrTimeoutError",
+    "OcrWord",
+    "get_ocr_engine",
+    "layout_text",
+]
@@ -0,0 +1,60 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple
+
+from .pool import OcrPool
+
+# Left, top, right, bottom in pixels of the image that was read
+Box = Tuple[float, float, float, float]
+
+
+class OcrWord:
+    __slots__ = ("text", "box", "confidence")
+
+    def __init__(self, text: str, box: Box, confidence: Optional[float] = None):
+        self.text = text
+        self.box = box
+        self.confidence = confidence
+
+    def __repr__(self) -> str:
+        return f"OcrWord({self.text!r}, {self.box})"
+
+
+class OcrResult:
+    """Text read from an image, with the words and where they were found"""
+
+    __slots__ = ("text", "words", "confidence")
+
+    def __init__(
+        self,
+        text: str,
+        words: Optional[List[OcrWord]] = None,
+        confidence: Optional[float] = None,
+    ):
+        self.text = text
+        self.words = words or []
+        self.confidence = confidence
+
+
+def mean_confidence(words: List[OcrWord]) -> Optional[float]:
+    confidences = [word.confidence for word in words if word.confidence]
+    return sum(confidences) / len(confidences) if confidences else None
+
+
+class OcrEngine(ABC):
+    """
+    Reads text from receipt images. Engines run their blocking work on
+    their own pool so recognize() never blocks the event loop.
+    """
+
+    name: str
+    pool: OcrPool
+    # Mean confidence below which a read of a reduced image is redone at full size,
+    # engines score on different scales
+    min_confidence: float
+
+    @abstractmethod
+    async def recognize(self, content: bytes) -> OcrResult:
+        """OCR an encoded image"""
+
+    def close(self) -> None:
+        self.pool.shutdown()
@@ -0,0 +1,108 @@
+from bisect import bisect_left, bisect_right
+from statistics import median
+from typing import List
+
+from .base import OcrWord
+
+# Steepest skew corrected for, as a slope (about 11 degrees)
+MAX_SKEW = 0.2
+
+# Words whose de-skewed centers are within this share of a word height share a row
+ROW_TOLERANCE = 0.5
+
+# Widest gap, in word heights, between neighbouring words used to measure skew
+NEIGHBOUR_GAP = 3
+
+
+def _center(word: OcrWord):
+    left, top, right, bottom = word.box
+    return (left + right) / 2, (top + bottom) / 2
+
+
+def _height(word: OcrWord) -> float:
+    return word.box[3] - word.box[1]
+
+
+def _deskewed_y(word: OcrWord, skew: float) -> float:
+    x, y = _center(word)
+    return y - skew * x
+
+
+def estimate_skew(words: List[OcrWord]) -> float:
+    """
+    Slope of the text rows, the median over each word and the word just to
+    its right that sits most nearly level with it. Only close neighbours
+    count, a price far across the receipt may already be a row off.
+    """
+    by_y = sorted(words, key=lambda word: _center(word)[1])
+    centers_y = [_center(word)[1] for word in by_y]
+    slopes = []
+    for a in by_y:
+        (ax, ay), height = _center(a), _height(a)
+        low = bisect_left(centers_y, ay - height)
+        high = bisect_right(centers_y, ay + height)
+        neighbours = [
+            b
+            for b in by_y[low:high]
+            if b is not a
+            and a.box[2] - height / 2 <= b.box[0] <= a.box[2] + height * NEIGHBOUR_GAP
+        ]
+        if neighbours:
+            bx, by = _center(min(neighbours, key=lambda b: abs(_center(b)[1] - ay)))
+            if bx > ax:
+                slopes.append((by - ay) / (bx - ax))
+    if not slopes:
+        return 0.0
+    return max(-MAX_SKEW, min(MAX_SKEW, median(slopes)))
+
+
+class _Row:
+    __slots__ = ("center", "words")
+
+    def __init__(self, y: float, word: OcrWord):
+        self.center = y
+        self.words = [word]
+
+    def overlaps(self, word: OcrWord) -> bool:
+        """A word printed over another can't be on the same row"""
+        left, _, right, _ = word.box
+        return any(left < w.box[2] and w.box[0] < right for w in self.words)
+
+    def add(self, y: float, word: OcrWord) -> None:
+        self.words.append(word)
+        self.center += (y - self.center) / len(self.words)
+
+
+def group_rows(words: List[OcrWord]) -> List[List[OcrWord]]:
+    """
+    Words grouped into the visual rows of the receipt, top to bottom, each
+    row left to right. Centers are de-skewed first, then a sweep down the
+    image adds each word to the nearest open row within tolerance, closing
+    rows the sweep has moved past, so a row's name and price end up
+    together however the engine ordered them. O(n log n) in words.
+    """
+    if not words:
+        return []
+    skew = estimate_skew(words)
+    tolerance = median(_height(word) for word in words) * ROW_TOLERANCE
+
+    swept = sorted(((_deskewed_y(word, skew), word) for word in words), key=lambda e: e[0])
+    rows: List[_Row] = []
+    open_rows: List[_Row] = []
+    for y, word in swept:
+        open_rows = [row for row in open_rows if y - row.center <= tolerance]
+        candidates = [row for row in open_rows if not row.overlaps(word)]
+        if candidates:
+            min(candidates, key=lambda row: abs(y - row.center)).add(y, word)
+            continue
+        row = _Row(y, word)
+        rows.append(row)
+        open_rows.append(row)
+
+    rows.sort(key=lambda row: row.center)
+    return [sorted(row.words, key=lambda word: word.box[0]) for row in rows]
+
+
+def layout_text(words: List[OcrWord]) -> str:
+    """Text with one line per visual row, e.g. "BANANAS 0.57" for a name and its price"""
+    return "\n".join(" ".join(word.text for word in row) for row in group_rows(words))
@@ -0,0 +1,86 @@
+import importlib.util
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
+
+from .base import OcrEngine, OcrResult, OcrWord, mean_confidence
+from .layout import layout_text
+from .pool import OcrPool
+
+logger = logging.getLogger(__name__)
+
+# One model per worker process, each uses a core
+LOCAL_OCR_WORKERS = int(os.getenv("LOCAL_OCR_WORKERS", str(os.cpu_count() or 1)))
+LOCAL_OCR_LANGUAGES = os.getenv("LOCAL_OCR_LANGUAGES", "en").split(",")
+
+# CPU OCR of a whole receipt is much slower than a Vision round trip
+LOCAL_OCR_TIMEOUT = float(os.getenv("LOCAL_OCR_TIMEOUT", "120"))
+
+# easyocr's per-fragment confidences run much lower than Vision's on the same text
+LOCAL_OCR_MIN_CONFIDENCE = float(os.getenv("LOCAL_OCR_MIN_CONFIDENCE", "0.5"))
+
+# (corner points, text, confidence) per detected line fragment, as easyocr returns them
+Detection = Tuple[List[Tuple[float, float]], str, float]
+
+_reader = None
+
+
+def easyocr_reader(languages: List[str]):
+    """Loads the easyocr model, called once in each worker process"""
+    import easyocr
+
+    return easyocr.Reader(languages, gpu=False, verbose=False)
+
+
+def _init_worker(reader_factory: Callable[[List[str]], Any], languages: List[str]) -> None:
+    global _reader
+    _reader = reader_factory(languages)
+
+
+def _read(content: bytes) -> List[Detection]:
+    # easyocr decodes encoded image bytes itself
+    return [
+        ([(float(x), float(y)) for x, y in corners], text, float(confidence))
+        for corners, text, confidence in _reader.readtext(content)
+    ]
+
+
+def local_result(detections: List[Detection]) -> OcrResult:
+    words = []
+    for corners, text, confidence in detections:
+        xs = [x for x, _ in corners]
+        ys = [y for _, y in corners]
+        words.append(OcrWord(text, (min(xs), min(ys), max(xs), max(ys)), confidence))
+
+    return OcrResult(layout_text(words), words, mean_confidence(words))
+
+
+class LocalEngine(OcrEngine):
+    """
+    CPU OCR with easyocr in a process pool. Every worker loads the model
+    once when it starts, so calls only pay for recognition.
+    """
+
+    name = "local"
+    min_confidence = LOCAL_OCR_MIN_CONFIDENCE
+
+    def __init__(
+        self,
+        workers: int = LOCAL_OCR_WORKERS,
+        languages: Optional[List[str]] = None,
+        reader_factory: Callable[[List[str]], Any] = easyocr_reader,
+        timeout: float = LOCAL_OCR_TIMEOUT,
+    ):
+        # Fail here rather than with a broken pool on the first receipt
+        if reader_factory is easyocr_reader and importlib.util.find_spec("easyocr") is None:
+            raise RuntimeError("The local OCR engine needs easyocr, pip install easyocr")
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(reader_factory, languages or LOCAL_OCR_LANGUAGES),
+        )
+        self.pool = OcrPool(concurrency=workers, timeout=timeout, executor=executor)
+
+    async def recognize(self, content: bytes) -> OcrResult:
+        return local_result(await self.pool.run(_read, content))
@@ -0,0 +1,104 @@
+import asyncio
+import functools
+import logging
+import os
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from ...metrics import OCR_DURATION, OCR_QUEUE_DURATION
+
+logger = logging.getLogger(__name__)
+
+# OCR calls running at once, each holds a thread for its whole round trip
+OCR_CONCURRENCY = int(os.getenv("OCR_CONCURRENCY", "4"))
+
+# Limit on waiting for a slot plus running, per call
+OCR_TIMEOUT = float(os.getenv("OCR_TIMEOUT", "30"))
+
+# Calls beyond this many waiting for a slot are rejected instead of queued
+OCR_MAX_WAITING = int(os.getenv("OCR_MAX_WAITING", "100"))
+
+T = TypeVar("T")
+
+
+class OcrTimeoutError(Exception):
+    """Raised when an OCR call didn't finish within the pool's timeout"""
+
+
+class OcrQueueFullError(Exception):
+    """Raised when too many OCR calls are already waiting for a slot"""
+
+
+class OcrPool:
+    """
+    Runs blocking OCR calls on a dedicated executor, a thread pool unless
+    one is given, so they never stall the event loop. A slot is held until
+    the call actually returns, even if the caller gave up waiting, so at
+    most `concurrency` workers are busy and the executor never queues.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = OCR_CONCURRENCY,
+        timeout: float = OCR_TIMEOUT,
+        executor: Optional[Executor] = None,
+        max_waiting: int = OCR_MAX_WAITING,
+    ):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_waiting = max_waiting
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="ocr"
+        )
+        self._slots = asyncio.Semaphore(concurrency)
+        self.waiting = 0
+        self.running = 0
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        deadline = time.monotonic() + self.timeout
+        queued = time.perf_counter()
+        if not self._slots.locked():
+            await self._slots.acquire()
+        elif self.waiting >= self.max_waiting:
+            raise OcrQueueFullError(f"{self.waiting} OCR calls already waiting")
+        else:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.timeout)
+            except asyncio.TimeoutError:
+                raise OcrTimeoutError(f"No OCR slot free within {self.timeout:.0f}s")
+            finally:
+                self.waiting -= 1
+
+        started = time.perf_counter()
+        OCR_QUEUE_DURATION.observe(started - queued)
+        self.running += 1
+        try:
+            future = asyncio.get_running_loop().run_in_executor(
+                self._executor, functools.partial(fn, *args, **kwargs)
+            )
+        except BaseException:
+            self.running -= 1
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda f: self._finished(f, started))
+
+        try:
+            # Shielded, the call keeps running anyway and the slot is freed when it's done
+            return await asyncio.wait_for(
+                asyncio.shield(future), max(0.0, deadline - time.monotonic())
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"OCR call exceeded {self.timeout:.0f}s")
+            raise OcrTimeoutError(f"OCR took longer than {self.timeout:.0f}s")
+
+    def shutdown(self) -> None:
+        """Stop the executor's workers once their current calls finish"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _finished(self, future: asyncio.Future, started: float) -> None:
+        self.running -= 1
+        self._slots.release()
+        outcome = "error" if future.cancelled() or future.exception() else "ok"
+        OCR_DURATION.labels(outcome).observe(time.perf_counter() - started)
@@ -0,0 +1,96 @@
+import base64
+import json
+import logging
+import os
+from typing import Optional
+
+from google.cloud import vision
+from google.oauth2 import service_account
+
+from .base import OcrEngine, OcrResult, OcrWord, mean_confidence
+from .pool import OcrPool
+
+logger = logging.getLogger(__name__)
+
+# Vision scores clean receipt text in the 0.9s
+VISION_MIN_CONFIDENCE = float(os.getenv("VISION_MIN_CONFIDENCE", "0.8"))
+
+
+def _box(bounding_poly) -> tuple:
+    xs = [vertex.x for vertex in bounding_poly.vertices]
+    ys = [vertex.y for vertex in bounding_poly.vertices]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def vision_result(response) -> OcrResult:
+    """OcrResult from a Vision text_detection response"""
+    if not response.text_annotations:
+        return OcrResult("")
+
+    words = []
+    block_confidences = []
+    for page in response.full_text_annotation.pages:
+        for block in page.blocks:
+            if block.confidence:
+                block_confidences.append(block.confidence)
+            for paragraph in block.paragraphs:
+                for word in paragraph.words:
+                    words.append(
+                        OcrWord(
+                            "".join(symbol.text for symbol in word.symbols),
+                            _box(word.bounding_box),
+                            word.confidence or None,
+                        )
+                    )
+
+    confidence = (
+        sum(block_confidences) / len(block_confidences)
+        if block_confidences
+        else mean_confidence(words)
+    )
+    return OcrResult(response.text_annotations[0].description, words, confidence)
+
+
+class VisionEngine(OcrEngine):
+    """Google Cloud Vision text detection, on a thread pool"""
+
+    name = "vision"
+    min_confidence = VISION_MIN_CONFIDENCE
+
+    def __init__(self, client=None, pool: Optional[OcrPool] = None):
+        self._client = client
+        self.pool = pool or OcrPool()
+
+    @property
+    def client(self):
+        """Lazy initialization of vision client with proper credentials"""
+        if self._client is None:
+            try:
+                # Get base64 encoded credentials from environment variable
+                creds_base64 = os.getenv("GOOGLE_APPLICATION_CREDENTIALS_BASE64")
+                if creds_base64:
+                    creds_dict = json.loads(base64.b64decode(creds_base64).decode("utf-8"))
+                    credentials = service_account.Credentials.from_service_account_info(
+                        creds_dict
+                    )
+                    self._client = vision.ImageAnnotatorClient(credentials=credentials)
+                else:
+                    # Fallback to default credentials (not recommended)
+                    logger.warning(
+                        "No explicit credentials found, falling back to default credentials"
+                    )
+                    self._client = vision.ImageAnnotatorClient()
+            except Exception as e:
+                logger.error(f"Error initializing Vision client: {str(e)}")
+                raise ValueError(f"Failed to initialize Vision client: {str(e)}")
+        return self._client
+
+    def _detect_text(self, content: bytes) -> OcrResult:
+        # Runs on an OCR thread, so the client is created off the event loop too
+        response = self.client.text_detection(
+            image=vision.Image(content=content), timeout=self.pool.timeout
+        )
+        return vision_result(response)
+
+    async def recognize(self, content: bytes) -> OcrResult:
+        return await self.pool.run(self._detect_text, content)
@@ -1,12 +1,11 @@
 import asyncio
 import logging
-from functools import lru_cache
 from typing import List, Optional
 from uuid import UUID
 
 from fastapi import UploadFile
 
-from ..db.crud import PantryCRUD
+from ..db.crud import LLMCacheCRUD, PantryCRUD
 from ..models.pantry import (
     ListOfPantryItemsCreate,
     Nutrition,
@@ -15,40 +14,58 @@ from ..models.pantry import (
     PantryItemData,
     PantryItemUpdate,
 )
-from .llm.providers.claude import ClaudeService
+from .enrichment import EnrichmentBatcher
+from .ingredient_kb import get_ingredient_kb, has_nutrition
+from .job_queue import get_job_queue
+from .llm.memory_cache import NEGATIVE_TTL
+from .llm.providers import get_llm_service
 from .receipt import ReceiptParser
+from .receipt_cache import get_receipt_cache, receipt_hashes
 
 logger = logging.getLogger(__name__)
 
+ENRICH_JOB = "enrich_pantry_item"
+
 
 class PantryManager:
     def __init__(self):
-        self.claude = ClaudeService()
+        self.claude = get_llm_service()
         self.pantry = PantryCRUD()
         self.receipt_parser = ReceiptParser()
+        self.receipt_cache = get_receipt_cache()
+        self.enrichment = EnrichmentBatcher(self.claude, self.pantry)
+        self.knowledge = get_ingredient_kb()
+        self.jobs = get_job_queue()
+        # A retry sooner than this would only hit the cached parse failure
+        self.jobs.register(ENRICH_JOB, self._run_enrichment_job, min_backoff=NEGATIVE_TTL)
 
     async def _process_pantry_item(
         self, item: PantryItemCreate, user_id: UUID
     ) -> PantryItem:
         """Helper method to process and add a single pantry item"""
         try:
+            needs_enrichment = not has_nutrition(item.nutrition)
+            if needs_enrichment:
+                # Staples we've enriched before are filled in without an LLM call
+                known_item = self.knowledge.enrich(item)
+                if known_item is not None:
+                    item = known_item
+                    needs_enrichment = False
+
             # Create item immediately
             partial_item = await self.pantry.create_item(user_id=user_id, item=item)
 
-            # Start enrichment in background task if needed
-            needs_enrichment = False
-            if item.nutrition:
-                nutrition_dict = item.nutrition.model_dump()
-                nutrition_dict.pop("standard_unit", None)
-                if all(value == 0 for value in nutrition_dict.values()):
-                    needs_enrichment = True
-            else:
-                needs_enrichment = True
-
             if needs_enrichment:
-                # Return partial item immediately
-                asyncio.create_task(
-                    self._enrich_item(partial_item.id, str(item), user_id)
+                # Return partial item immediately, enrichment runs as a job
+                await self.jobs.submit(
+                    ENRICH_JOB,
+                    {
+                        "item_id": str(partial_item.id),
+                        "text": str(item),
+                        "user_id": str(user_id),
+                        "name": item.data.name,
+                    },
+                    dedupe_key=f"enrich:{partial_item.id}",
                 )
 
             return partial_item
@@ -58,19 +75,19 @@ class PantryManager:
             logger.exception("Full traceback:")
             raise ValueError(f"Failed to process item: {str(e)}")
 
-    async def _enrich_item(self, item_id: UUID, ingredient_text: str, user_id: UUID):
-        """Background task to enrich item with Claude data"""
-        try:
-            enriched_item = await self.claude.parse_ingredient_text(
-                PantryItemCreate, ingredient_text, user_id=user_id
-            )
-            updates = PantryItemUpdate(
-                data=enriched_item.data,
-                nutrition=enriched_item.nutrition,
-            )
-            await self.pantry.update_item(item_id, updates)
-        except Exception as e:
-            logger.error(f"Error enriching item {item_id}: {str(e)}")
+    async def _run_enrichment_job(self, payload: dict) -> None:
+        """Enrich a stored item in the next batch and learn from the result"""
+        enriched_item = await self.enrichment.submit(
+            UUID(payload["item_id"]),
+            payload["text"],
+            UUID(payload["user_id"]),
+            name=payload["name"],
+        )
+        self.knowledge.learn(enriched_item, input_name=payload["name"])
+
+    async def warm_knowledge_base(self) -> int:
+        """Learn from cached enrichment responses, call once at startup"""
+        return await self.knowledge.warm(LLMCacheCRUD())
 
     async def add_single_item(
         self, item: PantryItemCreate, user_id: UUID
@@ -83,15 +100,25 @@ class PantryManager:
             logger.exception("Full traceback:")
             raise
 
-    @lru_cache(maxsize=10)
     async def process_receipt(
         self, file: UploadFile, user_id: UUID
     ) -> List[PantryItemCreate]:
         """Process receipt and return suggested items without storing them"""
         try:
+            content = await file.read()
+            sha256, phash = await asyncio.to_thread(receipt_hashes, content)
+
+            # Re-uploads of a receipt the user just processed skip OCR and the LLM
+            cached_items = self.receipt_cache.get(user_id, sha256, phash)
+            if cached_items is not None:
+                logger.info(f"Returning cached receipt items for user {user_id}")
+                return cached_items
+
             list_of_items: ListOfPantryItemsCreate = (
-                await self.receipt_parser.parse_receipt(file, user_id)
+                await self.receipt_parser.parse_receipt(content, user_id)
             )
+            if list_of_items.items:
+                self.receipt_cache.set(user_id, sha256, phash, list_of_items.items)
             return list_of_items.items
         except Exception as e:
             logger.error(f"Error processing receipt: {str(e)}")
@@ -1,78 +1,155 @@
+import asyncio
 import logging
-import json
 import os
-import base64
-from functools import lru_cache
+from typing import List, Optional
 from uuid import UUID
 
-from fastapi import UploadFile
-from google.cloud import vision
-from google.oauth2 import service_account
+from PIL import UnidentifiedImageError
 
+from ..logs import LazyPayload, log_extra
+from ..metrics import OCR_ESCALATIONS
 from ..models.pantry import ListOfPantryItemsCreate
-from .llm.providers.claude import ClaudeService
+from .llm.providers import get_llm_service
+from .llm.token_budget import estimate_input_tokens
+from .ocr import OcrEngine, OcrResult, get_ocr_engine, layout_text
+from .receipt_image import PreparedImage, prepare_receipt_image
+from .receipt_dictionary import ReceiptDictionary, get_receipt_dictionary
+from .receipt_lines import ReceiptLine, item_table, segment_receipt
 
 logger = logging.getLogger(__name__)
 
+# Send the LLM a table of the receipt's item lines instead of the whole OCR text
+RECEIPT_PREPARSE = os.getenv("RECEIPT_PREPARSE", "1") != "0"
+
+# Rebuild the receipt's printed rows from word boxes instead of the engine's reading order
+RECEIPT_LAYOUT = os.getenv("RECEIPT_LAYOUT", "1") != "0"
+
+
+def _prepare(content: bytes) -> Optional[PreparedImage]:
+    try:
+        return prepare_receipt_image(content)
+    except (UnidentifiedImageError, OSError, ValueError) as e:
+        logger.warning(f"Could not preprocess receipt image: {str(e)}")
+        return None
+
 
 class ReceiptParser:
-    def __init__(self):
-        self.claude_service = ClaudeService()
-        self._vision_client = None  # Initialize as None
-
-    @property
-    def vision_client(self):
-        """Lazy initialization of vision client with proper credentials"""
-        if self._vision_client is None:
-            try:
-                # Get base64 encoded credentials from environment variable
-                creds_base64 = os.getenv('GOOGLE_APPLICATION_CREDENTIALS_BASE64')
-                if creds_base64:
-                    # Decode base64 to JSON string
-                    creds_json = base64.b64decode(creds_base64).decode('utf-8')
-                    # Parse the JSON string into a dictionary
-                    creds_dict = json.loads(creds_json)
-                    # Create credentials object
-                    credentials = service_account.Credentials.from_service_account_info(creds_dict)
-                    # Create the client with credentials
-                    self._vision_client = vision.ImageAnnotatorClient(credentials=credentials)
-                else:
-                    # Fallback to default credentials (not recommended)
-                    logger.warning("No explicit credentials found, falling back to default credentials")
-                    self._vision_client = vision.ImageAnnotatorClient()
-            except Exception as e:
-                logger.error(f"Error initializing Vision client: {str(e)}")
-                raise ValueError(f"Failed to initialize Vision client: {str(e)}")
-        return self._vision_client
+    def __init__(
+        self,
+        ocr: Optional[OcrEngine] = None,
+        dictionary: Optional[ReceiptDictionary] = None,
+    ):
+        self.claude_service = get_llm_service()
+        self.ocr = ocr or get_ocr_engine()
+        self.dictionary = dictionary or get_receipt_dictionary()
+
+    async def read_receipt(self, content: bytes) -> OcrResult:
+        """OCR a preprocessed copy of the photo, the original only if that reads poorly"""
+        # Pillow work is CPU bound, keep it off the event loop
+        prepared = await asyncio.to_thread(_prepare, content)
+
+        if prepared is not None and prepared.reduced:
+            logger.info(
+                "Sending preprocessed receipt to OCR",
+                extra=log_extra(
+                    "receipt.ocr",
+                    engine=self.ocr.name,
+                    bytes=len(prepared.content),
+                    original_bytes=len(content),
+                    size=prepared.size,
+                    original_size=prepared.original_size,
+                    cropped=prepared.cropped,
+                ),
+            )
+            result = await self.ocr.recognize(prepared.content)
+            if result.text and (
+                result.confidence is None or result.confidence >= self.ocr.min_confidence
+            ):
+                return result
+            logger.info(
+                f"Low OCR confidence ({result.confidence}) on preprocessed receipt, "
+                "retrying at full resolution"
+            )
+            OCR_ESCALATIONS.inc()
+
+        return await self.ocr.recognize(content)
+
+    @staticmethod
+    def row_text(result: OcrResult) -> str:
+        """
+        The OCR text one printed row per line. Engines read columns
+        separately, so names and prices otherwise come apart.
+        """
+        if RECEIPT_LAYOUT and result.words:
+            return layout_text(result.words)
+        return result.text
+
+    def segment(self, text: str) -> List[ReceiptLine]:
+        """The receipt's item lines, none if pre-parsing is off or nothing was recognized"""
+        if not RECEIPT_PREPARSE:
+            return []
+        lines = segment_receipt(text)
+        if not lines:
+            logger.info("No item lines recognized on receipt, sending the full text")
+        return lines
+
+    def compact(self, text: str, lines: List[ReceiptLine]) -> str:
+        """Item table of the lines for the LLM"""
+        table = item_table(lines)
+        logger.info(
+            "Compacted receipt text for the LLM",
+            extra=log_extra(
+                "receipt.compact",
+                tokens=estimate_input_tokens(table),
+                original_tokens=estimate_input_tokens(text),
+                items=len(lines),
+            ),
+        )
+        return table
 
     async def parse_receipt(
-        self, file: UploadFile, user_id: UUID
+        self, content: bytes, user_id: UUID
     ) -> ListOfPantryItemsCreate:
         try:
-            content = await file.read()
-            image = vision.Image(content=content)
-
-            # Use the property to get the client
-            response = self.vision_client.text_detection(image=image)
-            texts = response.text_annotations
-
-            if not texts:
+            result = await self.read_receipt(content)
+            if not result.text:
                 logger.warning("No text detected in receipt image")
                 return ListOfPantryItemsCreate(items=[])
 
-            receipt_text = texts[0].description
-            logger.debug(f"Extracted receipt text: {receipt_text}")
+            text = self.row_text(result)
+            lines = self.segment(text)
+
+            # Lines other users' receipts already taught us skip the LLM
+            known, unknown = self.dictionary.split(lines)
+            if known:
+                logger.info(
+                    "Resolved receipt lines from the receipt dictionary",
+                    extra=log_extra(
+                        "receipt.dictionary", known=len(known), unknown=len(unknown)
+                    ),
+                )
+                if not unknown:
+                    return ListOfPantryItemsCreate(items=known)
+
+            receipt_text = self.compact(text, unknown) if lines else text
+            logger.debug(
+                "Extracted receipt text: %s",
+                LazyPayload(receipt_text),
+                extra=log_extra("receipt.text", chars=len(receipt_text)),
+            )
 
             try:
                 items_data = await self.claude_service.parse_receipt_text(
                     ListOfPantryItemsCreate, receipt_text
                 )
-                return items_data
             except Exception as e:
                 logger.error(f"Claude service failed to parse receipt text: {str(e)}")
                 logger.error(f"Receipt text that caused error: {receipt_text}")
                 raise ValueError(f"Failed to process receipt text: {str(e)}")
 
+            self.dictionary.learn_parse(unknown, items_data.items, user_id)
+            return ListOfPantryItemsCreate(items=known + items_data.items)
+
         except Exception as e:
             logger.error(f"Error in parse_receipt: {str(e)}")
             raise ValueError(f"Failed to process receipt: {str(e)}")
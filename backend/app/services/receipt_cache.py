@@ -0,0 +1,170 @@
+import hashlib
+import io
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from PIL import Image, UnidentifiedImageError
+
+from ..models.pantry import PantryItemCreate
+
+logger = logging.getLogger(__name__)
+
+# How long a user's processed receipt is returned for repeat uploads
+RECEIPT_CACHE_TTL = float(os.getenv("RECEIPT_CACHE_TTL", "3600"))
+RECEIPT_CACHE_PER_USER = int(os.getenv("RECEIPT_CACHE_PER_USER", "20"))
+
+# Side of the difference hash grid, the hash has HASH_SIZE**2 bits
+HASH_SIZE = 16
+
+# Bits two hashes may differ by and still be the same receipt. Kept tight:
+# re-encoded, resized or slightly cropped copies land well inside it, but
+# receipts from the same till differ by only a little more at this resolution
+MAX_HASH_DISTANCE = int(os.getenv("RECEIPT_HASH_MAX_DISTANCE", "10"))
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def perceptual_hash(content: bytes, size: int = HASH_SIZE) -> Optional[int]:
+    """
+    Difference hash of an image: each bit says whether a pixel of the
+    shrunken grayscale image is darker than its right neighbour. None if
+    the bytes aren't an image Pillow can read.
+    """
+    try:
+        with Image.open(io.BytesIO(content)) as image:
+            # Let JPEG decode at a fraction of full resolution
+            image.draft("L", (size * 8, size * 8))
+            small = image.convert("L").resize((size + 1, size), Image.Resampling.BOX)
+    except (UnidentifiedImageError, OSError, ValueError) as e:
+        logger.warning(f"Could not hash receipt image: {str(e)}")
+        return None
+
+    pixels = small.tobytes()
+    bits = 0
+    for row in range(size):
+        offset = row * (size + 1)
+        for col in range(size):
+            bits = (bits << 1) | (pixels[offset + col] < pixels[offset + col + 1])
+    return bits
+
+
+def receipt_hashes(content: bytes) -> Tuple[str, Optional[int]]:
+    """Exact and perceptual hash of a receipt image, CPU bound"""
+    return content_hash(content), perceptual_hash(content)
+
+
+class CachedReceipt:
+    __slots__ = ("sha256", "phash", "items", "expires_at")
+
+    def __init__(
+        self,
+        sha256: str,
+        phash: Optional[int],
+        items: List[PantryItemCreate],
+        expires_at: float,
+    ):
+        self.sha256 = sha256
+        self.phash = phash
+        self.items = items
+        self.expires_at = expires_at
+
+
+class ReceiptCache:
+    """
+    Parsed receipts per user, matched by the exact bytes or, failing that,
+    by a near-identical perceptual hash so a re-encoded or resized copy of
+    the same photo skips OCR and the LLM too.
+    """
+
+    def __init__(
+        self,
+        ttl: float = RECEIPT_CACHE_TTL,
+        per_user: int = RECEIPT_CACHE_PER_USER,
+        max_distance: int = MAX_HASH_DISTANCE,
+    ):
+        self.ttl = ttl
+        self.per_user = per_user
+        self.max_distance = max_distance
+        self._receipts: Dict[UUID, "OrderedDict[str, CachedReceipt]"] = {}
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    def get(
+        self, user_id: UUID, sha256: str, phash: Optional[int]
+    ) -> Optional[List[PantryItemCreate]]:
+        with self._lock:
+            receipts = self._receipts.get(user_id)
+            if receipts:
+                self._expire(user_id, receipts)
+                match = receipts.get(sha256) or self._similar(receipts, phash)
+                if match is not None:
+                    if match.sha256 == sha256:
+                        self.exact_hits += 1
+                    else:
+                        self.similar_hits += 1
+                    receipts.move_to_end(match.sha256)
+                    # Callers may edit the suggestions, keep ours intact
+                    return [item.model_copy(deep=True) for item in match.items]
+            self.misses += 1
+            return None
+
+    def set(
+        self,
+        user_id: UUID,
+        sha256: str,
+        phash: Optional[int],
+        items: List[PantryItemCreate],
+    ) -> None:
+        entry = CachedReceipt(
+            sha256,
+            phash,
+            [item.model_copy(deep=True) for item in items],
+            time.monotonic() + self.ttl,
+        )
+        with self._lock:
+            receipts = self._receipts.setdefault(user_id, OrderedDict())
+            receipts[sha256] = entry
+            receipts.move_to_end(sha256)
+            while len(receipts) > self.per_user:
+                receipts.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._receipts.clear()
+
+    def _similar(
+        self, receipts: "OrderedDict[str, CachedReceipt]", phash: Optional[int]
+    ) -> Optional[CachedReceipt]:
+        if phash is None:
+            return None
+        best, best_distance = None, self.max_distance + 1
+        for receipt in receipts.values():
+            if receipt.phash is None:
+                continue
+            distance = (receipt.phash ^ phash).bit_count()
+            if distance < best_distance:
+                best, best_distance = receipt, distance
+        return best
+
+    def _expire(self, user_id: UUID, receipts: "OrderedDict[str, CachedReceipt]") -> None:
+        now = time.monotonic()
+        for sha256 in [k for k, r in receipts.items() if r.expires_at <= now]:
+            del receipts[sha256]
+        if not receipts:
+            del self._receipts[user_id]
+
+
+_receipt_cache = ReceiptCache()
+
+
+def get_receipt_cache() -> ReceiptCache:
+    return _receipt_cache
@@ -0,0 +1,351 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from ..db.crud import ReceiptDictionaryCRUD
+from ..metrics import RECEIPT_DICTIONARY_LOOKUPS
+from ..models.pantry import Nutrition, PantryItemCreate, PantryItemData
+from .ingredient_kb import has_nutrition, normalize_name
+from .receipt_lines import ReceiptLine
+
+logger = logging.getLogger(__name__)
+
+# A receipt string resolves locally once this many users' parses agree on it
+MIN_USERS = int(os.getenv("RECEIPT_DICT_MIN_USERS", "2"))
+
+# ...and this share of the users who saw it agree on the same item
+MIN_AGREEMENT = float(os.getenv("RECEIPT_DICT_MIN_AGREEMENT", "0.8"))
+
+# Votes older than this are dropped, so a string has to keep earning its mapping
+MAX_VOTE_AGE = float(os.getenv("RECEIPT_DICT_MAX_VOTE_AGE_DAYS", "30")) * 86400
+
+# How often new votes are saved to the database
+SAVE_INTERVAL = float(os.getenv("RECEIPT_DICT_SAVE_SECONDS", "30"))
+
+# How often the dictionary is rebuilt from every worker's saved votes, dropping old ones
+REBUILD_INTERVAL = float(os.getenv("RECEIPT_DICT_REBUILD_SECONDS", "600"))
+
+MAX_ENTRIES = int(os.getenv("RECEIPT_DICT_MAX_ENTRIES", "50000"))
+
+# Users remembered per candidate, enough to measure agreement
+MAX_VOTES = 100
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+# PLU and SKU codes printed next to the name
+_CODE = re.compile(r"^\d{4,}$")
+
+# Receipt quantity units that multiply the learned quantity rather than replace it
+_COUNT_UNITS = {None, "ea"}
+
+Signature = Tuple[str, str, str]
+
+
+def normalize_receipt_string(text: str) -> str:
+    """Lowercase words and sizes of a receipt string, without item codes"""
+    words = _NON_WORD.sub(" ", text.lower()).split()
+    return " ".join(word for word in words if not _CODE.match(word))
+
+
+class ReceiptEntry:
+    """
+    One item a receipt string was parsed to, and when each user whose parse
+    agreed last saw it. Only the LLM's name, unit, category, quantity per
+    counted unit and nutrition are kept, nothing a user wrote.
+    """
+
+    __slots__ = ("data", "nutrition", "votes")
+
+    def __init__(self, data: PantryItemData, nutrition: Nutrition):
+        self.data = data
+        self.nutrition = nutrition
+        self.votes: Dict[str, float] = {}
+
+
+class Vote:
+    """One user's parse of a receipt string, as saved in the database"""
+
+    __slots__ = ("key", "data", "nutrition", "user", "seen")
+
+    def __init__(
+        self, key: str, data: PantryItemData, nutrition: Nutrition, user: str, seen: float
+    ):
+        self.key = key
+        self.data = data
+        self.nutrition = nutrition
+        self.user = user
+        self.seen = seen
+
+    @property
+    def id(self) -> Tuple[str, Signature, str]:
+        return (self.key, _signature(self.data), self.user)
+
+    def to_row(self) -> dict:
+        return {
+            "receipt_key": self.key,
+            "signature": json.dumps(_signature(self.data)),
+            "user_id": self.user,
+            "data": self.data.model_dump(),
+            "nutrition": self.nutrition.model_dump(),
+            "seen_at": datetime.fromtimestamp(self.seen, timezone.utc).isoformat(),
+        }
+
+    @classmethod
+    def from_row(cls, row: dict) -> "Vote":
+        return cls(
+            row["receipt_key"],
+            PantryItemData(**row["data"]),
+            Nutrition(**row["nutrition"]),
+            str(row["user_id"]),
+            datetime.fromisoformat(row["seen_at"]).timestamp(),
+        )
+
+
+def _count(line: ReceiptLine) -> float:
+    """How many of the item a receipt line is for, 1 for weighed items"""
+    if line.quantity and line.unit in _COUNT_UNITS:
+        return line.quantity
+    return 1
+
+
+def _signature(data: PantryItemData) -> Signature:
+    return (normalize_name(data.name), data.unit.lower(), (data.category or "").lower())
+
+
+class ReceiptDictionary:
+    """
+    Raw receipt strings ("GV WHL MLK 1GAL") mapped to the canonical item and
+    nutrition the LLM parsed them to, shared across users so recurring
+    lines skip the LLM. Only LLM parse results are learned, never pantry
+    rows users can edit. A string only resolves once at least `min_users`
+    users' parses agree on it and few disagree.
+
+    Votes are saved to `store` in the background and the dictionary is
+    rebuilt from every worker's saved votes, so it survives restarts and
+    is shared between processes. Votes older than `max_vote_age` are
+    dropped on rebuild, so stale mappings fall out.
+    """
+
+    def __init__(
+        self,
+        min_users: int = MIN_USERS,
+        min_agreement: float = MIN_AGREEMENT,
+        max_entries: int = MAX_ENTRIES,
+        max_vote_age: float = MAX_VOTE_AGE,
+        store: Optional[ReceiptDictionaryCRUD] = None,
+    ):
+        self.min_users = min_users
+        self.min_agreement = min_agreement
+        self.max_entries = max_entries
+        self.max_vote_age = max_vote_age
+        self.store = store
+        self._entries: Dict[str, Dict[Signature, ReceiptEntry]] = {}
+        self._unsaved: Dict[Tuple[str, Signature, str], Vote] = {}
+        self._sync_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def learn(
+        self,
+        raw_name: str,
+        item: PantryItemCreate,
+        user_id: UUID,
+        count: float = 1,
+        now: Optional[float] = None,
+    ) -> bool:
+        """Record that the LLM parsed a user's receipt string, bought `count` times, to item"""
+        key = normalize_receipt_string(raw_name)
+        if not key or not has_nutrition(item.nutrition):
+            return False
+
+        # Quantity of one of what the line counts, resolve() multiplies it back
+        data = PantryItemData(
+            name=item.data.name,
+            quantity=round(item.data.quantity / count, 2),
+            unit=item.data.unit,
+            category=item.data.category,
+            notes=None,
+        )
+        vote = Vote(
+            key,
+            data,
+            item.nutrition.model_copy(),
+            str(user_id),
+            time.time() if now is None else now,
+        )
+        self._add(self._entries, vote)
+        if self.store is not None:
+            self._unsaved[vote.id] = vote
+        return True
+
+    def _add(self, entries: Dict[str, Dict[Signature, ReceiptEntry]], vote: Vote) -> None:
+        candidates = entries.get(vote.key)
+        if candidates is None:
+            if len(entries) >= self.max_entries:
+                # Forget the oldest string
+                del entries[next(iter(entries))]
+            candidates = entries[vote.key] = {}
+
+        signature = _signature(vote.data)
+        entry = ReceiptEntry(vote.data, vote.nutrition)
+        previous = candidates.get(signature)
+        if previous is not None:
+            entry.votes = previous.votes
+        if vote.user in entry.votes or len(entry.votes) < MAX_VOTES:
+            entry.votes[vote.user] = max(vote.seen, entry.votes.get(vote.user, 0))
+        candidates[signature] = entry
+
+    def learn_parse(
+        self, lines: List[ReceiptLine], items: List[PantryItemCreate], user_id: UUID
+    ) -> int:
+        """Learn the LLM's items for the receipt lines they name, returns how many"""
+        by_key = {normalize_receipt_string(line.name): line for line in lines}
+        learned = 0
+        for item in items:
+            line = by_key.get(normalize_receipt_string(item.data.original_name or ""))
+            if line is not None:
+                learned += self.learn(line.name, item, user_id, count=_count(line))
+        return learned
+
+    def lookup(self, raw_name: str) -> Optional[ReceiptEntry]:
+        """The item users agree a receipt string is, None if unknown or disputed"""
+        candidates = self._entries.get(normalize_receipt_string(raw_name))
+        entry = self._agreed(candidates) if candidates else None
+        if entry is None:
+            self.misses += 1
+            RECEIPT_DICTIONARY_LOOKUPS.labels("miss").inc()
+        else:
+            self.hits += 1
+            RECEIPT_DICTIONARY_LOOKUPS.labels("hit").inc()
+        return entry
+
+    def _agreed(self, candidates: Dict[Signature, ReceiptEntry]) -> Optional[ReceiptEntry]:
+        best = max(candidates.values(), key=lambda entry: len(entry.votes))
+        votes = sum(len(entry.votes) for entry in candidates.values())
+        if len(best.votes) < self.min_users or len(best.votes) / votes < self.min_agreement:
+            return None
+        return best
+
+    def resolve(self, line: ReceiptLine) -> Optional[PantryItemCreate]:
+        """The pantry item for a receipt line, None if it has to go to the LLM"""
+        entry = self.lookup(line.name)
+        if entry is None:
+            return None
+
+        data = entry.data.model_copy()
+        data.original_name = line.name
+        data.price = line.unit_price if line.unit_price is not None else line.price
+        if line.quantity is not None:
+            if line.unit in _COUNT_UNITS:
+                data.quantity = round(data.quantity * _count(line), 2)
+            elif line.unit.rstrip("s") == data.unit.lower().rstrip("s"):
+                # Weighed at the till in the item's own unit
+                data.quantity = round(line.quantity, 2)
+        return PantryItemCreate(data=data, nutrition=entry.nutrition.model_copy())
+
+    def split(
+        self, lines: List[ReceiptLine]
+    ) -> Tuple[List[PantryItemCreate], List[ReceiptLine]]:
+        """Items for the lines resolved locally, and the lines left for the LLM"""
+        known, unknown = [], []
+        for line in lines:
+            item = self.resolve(line)
+            if item is None:
+                unknown.append(line)
+            else:
+                known.append(item)
+        return known, unknown
+
+    async def save(self) -> int:
+        """Save votes learned since the last save, returns how many"""
+        if self.store is None or not self._unsaved:
+            return 0
+        votes, self._unsaved = self._unsaved, {}
+        try:
+            await self.store.upsert_votes([vote.to_row() for vote in votes.values()])
+        except Exception as e:
+            logger.error(f"Could not save {len(votes)} receipt dictionary votes: {str(e)}")
+            # Try again next time, newer votes win
+            self._unsaved = {**votes, **self._unsaved}
+            return 0
+        return len(votes)
+
+    async def load(self, now: Optional[float] = None) -> int:
+        """Rebuild from the saved votes still recent enough to count, returns strings kept"""
+        started = time.perf_counter()
+        cutoff = datetime.fromtimestamp(
+            (time.time() if now is None else now) - self.max_vote_age, timezone.utc
+        )
+        await self.store.delete_votes_before(cutoff)
+        rows = await self.store.get_votes()
+        entries: Dict[str, Dict[Signature, ReceiptEntry]] = {}
+        for row in rows:
+            self._add(entries, Vote.from_row(row))
+        # Votes learned while loading, or not saved yet
+        for vote in self._unsaved.values():
+            self._add(entries, vote)
+        self._entries = entries
+        logger.info(
+            f"Loaded receipt dictionary with {len(entries)} strings from {len(rows)} votes "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+        return len(entries)
+
+    async def start(
+        self, save_interval: float = SAVE_INTERVAL, rebuild_interval: float = REBUILD_INTERVAL
+    ) -> None:
+        """Load the saved votes, then save and rebuild in the background"""
+        if self._sync_task is not None:
+            return
+        if self.store is None:
+            self.store = ReceiptDictionaryCRUD()
+        try:
+            await self.load()
+        except Exception as e:
+            # Learning starts over, lines go to the LLM until strings are agreed again
+            logger.error(f"Could not load receipt dictionary: {str(e)}")
+        if save_interval > 0:
+            self._sync_task = asyncio.create_task(
+                self._sync_every(save_interval, rebuild_interval)
+            )
+
+    async def stop(self) -> None:
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            await asyncio.gather(self._sync_task, return_exceptions=True)
+            self._sync_task = None
+        await self.save()
+
+    async def _sync_every(self, save_interval: float, rebuild_interval: float) -> None:
+        rebuilt = time.monotonic()
+        while True:
+            await asyncio.sleep(save_interval)
+            await self.save()
+            if rebuild_interval <= 0 or time.monotonic() - rebuilt < rebuild_interval:
+                continue
+            rebuilt = time.monotonic()
+            try:
+                await self.load()
+            except Exception as e:
+                # Keep serving the previous dictionary
+                logger.error(f"Could not rebuild receipt dictionary: {str(e)}")
+
+
+_receipt_dictionary = ReceiptDictionary()
+
+
+def get_receipt_dictionary() -> ReceiptDictionary:
+    return _receipt_dictionary
@@ -0,0 +1,193 @@
+import io
+import logging
+import os
+from typing import List, Optional, Tuple
+
+from PIL import ExifTags, Image
+
+logger = logging.getLogger(__name__)
+
+# Receipt text stays legible for OCR at about this many pixels across the paper
+OCR_TARGET_WIDTH = int(os.getenv("OCR_TARGET_WIDTH", "1000"))
+
+# Long receipts are never sent taller than this
+OCR_MAX_SIDE = int(os.getenv("OCR_MAX_SIDE", "4000"))
+
+JPEG_QUALITY = 85
+
+# Side of the thumbnail the receipt is located on
+LOCATE_SIDE = 256
+
+# Share of a column that must be paper for it to count as receipt
+PAPER_SHARE = 0.5
+
+# Rows are only trimmed when almost all background, a tilted receipt fills little of its last rows
+ROW_PAPER_SHARE = 0.2
+
+# Dips shorter than this share of the side, like a heavy line of print, don't end the receipt
+MAX_GAP_SHARE = 0.04
+
+# A crop smaller than this share of the photo is more likely wrong than a receipt
+MIN_CROP_SHARE = 0.1
+
+# Margin kept around the located receipt, as a share of its size
+CROP_MARGIN = 0.03
+
+# Transpose undoing each EXIF orientation, as ImageOps.exif_transpose applies it
+_ORIENTATIONS = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+
+class PreparedImage:
+    """Bytes to send to OCR, plus what was done to get them"""
+
+    __slots__ = ("content", "size", "original_size", "cropped", "reduced")
+
+    def __init__(
+        self,
+        content: bytes,
+        size: Tuple[int, int],
+        original_size: Tuple[int, int],
+        cropped: bool,
+        reduced: bool,
+    ):
+        self.content = content
+        self.size = size
+        self.original_size = original_size
+        self.cropped = cropped
+        self.reduced = reduced
+
+
+def otsu_threshold(histogram: List[int]) -> int:
+    """Gray level best separating a 256-bin histogram into two classes"""
+    total = sum(histogram)
+    weighted_total = sum(level * count for level, count in enumerate(histogram))
+    best_level, best_variance = 128, -1.0
+    below = weighted_below = 0
+    for level, count in enumerate(histogram):
+        below += count
+        if below == 0:
+            continue
+        above = total - below
+        if above == 0:
+            break
+        weighted_below += level * count
+        mean_below = weighted_below / below
+        mean_above = (weighted_total - weighted_below) / above
+        variance = below * above * (mean_below - mean_above) ** 2
+        if variance > best_variance:
+            best_level, best_variance = level, variance
+    return best_level
+
+
+def _longest_run(shares: bytes, minimum: int, max_gap: int) -> Tuple[int, int]:
+    """Longest stretch of values at least `minimum`, bridging shorter dips"""
+    best = (0, 0)
+    start = end = None
+    for i, share in enumerate(shares):
+        if share < minimum:
+            continue
+        if start is None or i - end > max_gap:
+            start = i
+        end = i + 1
+        if end - start > best[1] - best[0]:
+            best = (start, end)
+    return best
+
+
+def locate_receipt(gray: Image.Image) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Bounding box of the receipt in a grayscale photo, found as the widest
+    band of bright (paper) columns and then the first and last paper rows
+    within it. None if no plausible receipt stands out from the background.
+    """
+    thumb = gray.copy()
+    thumb.thumbnail((LOCATE_SIDE, LOCATE_SIDE))
+    threshold = otsu_threshold(thumb.histogram())
+    paper = thumb.point(lambda v: 255 if v > threshold else 0)
+    minimum = int(255 * PAPER_SHARE)
+
+    # Averaging down to a single row or column gives the paper share of each
+    width, height = paper.size
+    columns = paper.resize((width, 1), Image.Resampling.BOX).tobytes()
+    left, right = _longest_run(columns, minimum, int(width * MAX_GAP_SHARE))
+    if right - left < width * MIN_CROP_SHARE:
+        return None
+    band = paper.crop((left, 0, right, height))
+    # Dense print can make rows look dark, so only trim background off the ends
+    row_minimum = int(255 * ROW_PAPER_SHARE)
+    rows = [
+        i
+        for i, share in enumerate(band.resize((1, height), Image.Resampling.BOX).tobytes())
+        if share >= row_minimum
+    ]
+    if not rows:
+        return None
+    top, bottom = rows[0], rows[-1] + 1
+    if (right - left) * (bottom - top) < width * height * MIN_CROP_SHARE:
+        return None
+
+    scale_x, scale_y = gray.width / width, gray.height / height
+    margin_x, margin_y = (right - left) * CROP_MARGIN, (bottom - top) * CROP_MARGIN
+    return (
+        max(0, int((left - margin_x) * scale_x)),
+        max(0, int((top - margin_y) * scale_y)),
+        min(gray.width, int((right + margin_x) * scale_x)),
+        min(gray.height, int((bottom + margin_y) * scale_y)),
+    )
+
+
+def prepare_receipt_image(
+    content: bytes,
+    target_width: int = OCR_TARGET_WIDTH,
+    max_side: int = OCR_MAX_SIDE,
+) -> PreparedImage:
+    """
+    Decode, auto-orient, crop to the receipt, convert to grayscale and
+    downsample a receipt photo for OCR. CPU bound, run it off the event loop.
+    """
+    with Image.open(io.BytesIO(content)) as image:
+        # Read from the header, nothing may load pixels before draft()
+        orientation = image.getexif().get(ExifTags.Base.Orientation, 1)
+        width, height = image.size
+        # Orientations 5 to 8 are quarter turns
+        original_size = (height, width) if orientation in (5, 6, 7, 8) else (width, height)
+        # JPEG can decode straight to grayscale at 1/2, 1/4 or 1/8 scale
+        image.draft("L", (target_width, target_width))
+        image = image.convert("L")
+    if orientation in _ORIENTATIONS:
+        image = image.transpose(_ORIENTATIONS[orientation])
+
+    box = locate_receipt(image)
+    cropped = box is not None and box != (0, 0, image.width, image.height)
+    if cropped:
+        image = image.crop(box)
+
+    scale = min(
+        1.0,
+        target_width / image.width,
+        max_side / max(image.width, image.height),
+    )
+    if scale < 1.0:
+        image = image.resize(
+            (max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+            Image.Resampling.LANCZOS,
+        )
+
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=JPEG_QUALITY, optimize=True)
+    prepared = buffer.getvalue()
+    return PreparedImage(
+        content=prepared,
+        size=image.size,
+        original_size=original_size,
+        cropped=cropped,
+        reduced=cropped or image.size != original_size,
+    )
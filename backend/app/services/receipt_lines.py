@@ -0,0 +1,199 @@
+import re
+from typing import List, Optional
+
+# Price at the end of a line, with optional sign, currency and tax flag ("4.99 F", "-$0.54", "2.49-")
+_PRICE = re.compile(
+    r"(?:^|\s)(?P<sign>-)?\$?(?P<sign2>-)?(?P<amount>\d{1,4}[.,]\d{2})(?P<sign3>-)?"
+    r"(?:\s+[A-Z]{1,2}\d?)?\s*$"
+)
+
+# Quantity detail lines: "3 @ 0.58", "1.14 lb @ 2.49/ lb", "3EA @ 0.19/EA", "1 @ 2 FOR 4.00"
+_QUANTITY = re.compile(
+    r"(?P<quantity>\d+(?:\.\d+)?)\s*(?P<unit>lbs?|kg|g|oz|ea)?\s*@\s*"
+    r"(?:(?P<deal_count>\d+)\s*for\s*\$?(?P<deal_price>\d+\.\d{2})"
+    r"|\$?(?P<unit_price>\d+\.\d{2})\s*(?:/\s*(?P<per>lbs?|kg|oz|ea))?)",
+    re.IGNORECASE,
+)
+
+# Whole lines that are totals or payment: "SUBTOTAL", "Grand Total", "TAX 1 [$9.98]",
+# "CHANGE DUE", "Visa Debit", "MasterCard *6258", but not "TOTAL CEREAL"
+_TOTALS = re.compile(
+    r"^(?:(?:order|grand|net|items?|gift\s*card)\s+)?"
+    r"(?:sub\s*-?\s*total|total|tax|balance|change|cash|visa|master\s*card|amex|discover|"
+    r"debit|credit|ebt|tender(?:ed)?|payment|amount|sales|you\s+saved|savings|markdown|"
+    r"discount|coupon)"
+    r"(?:\s+(?:due|to|pay|tend|tendered|card|debit|credit|sale|amount|purchase|payment|"
+    r"paid|back|total|tax|savings|saved))*[\s:#*$.,%\[\]\d]*$",
+    re.IGNORECASE,
+)
+
+# Words that only appear on header, footer and payment lines, never in product names
+_NOISE_WORDS = re.compile(
+    r"\b(?:tax|balance|cash|visa|master\s*card|amex|debit|credit|card|tender|tendered|"
+    r"payment|paid|approved|auth|account|acct|aid|terminal|transaction|receipt|returns?|"
+    r"refund|thank|thanks|welcome|cashier|register|manager|phone|tel|survey|feedback|"
+    r"experience|savings?|saved|points|rewards|loyalty|sold|items|open|hours|days|"
+    r"purchase|copy|sales|bathroom|inv|trs|markdown|discount|coupon|earn)\b",
+    re.IGNORECASE,
+)
+_URL = re.compile(r"www\.|https?:|\.com\b", re.IGNORECASE)
+_DATE_TIME = re.compile(r"\b\d{1,2}/\d{1,2}/\d{2,4}\b|\b\d{1,2}:\d{2}(?::\d{2})?\b")
+_PHONE = re.compile(r"\(?\b\d{3}\)?[\s.-]\d{3}[\s.-]\d{4}\b")
+# Case-sensitive, street words as printed: "785 Oak Grove Road", "12 MAIN ST",
+# and "Concord, CA 94518"
+_ADDRESS = re.compile(
+    r"^\d+\s.*\b(?:St|Street|Ave|Avenue|Rd|Road|Blvd|Boulevard|Hwy|Highway|Suite|"
+    r"ST|STREET|AVE|AVENUE|RD|ROAD|BLVD|BOULEVARD|HWY|HIGHWAY|SUITE)\b"
+    r"|^[A-Za-z .'-]+,\s*[A-Z]{2}\s+\d{5}\b"
+)
+_MASKED = re.compile(r"\*{3,}|x{6,}", re.IGNORECASE)
+_DEPARTMENT = re.compile(
+    r"^(?:produce|dairy|grocery|deli|bakery|meat|seafood|frozen|frozen foods|beverages?|"
+    r"household|general merchandise|health|beauty|bulk|floral)(?:\s+dept\.?)?:?$",
+    re.IGNORECASE,
+)
+_LETTERS = re.compile(r"[A-Za-z]{2,}")
+
+# Longer lines are footer prose, not item names
+MAX_ITEM_WORDS = 7
+
+
+class ReceiptLine:
+    """One purchased item as printed on the receipt"""
+
+    __slots__ = ("name", "price", "quantity", "unit", "unit_price")
+
+    def __init__(self, name: str, price: Optional[float] = None):
+        self.name = name
+        self.price = price
+        self.quantity: Optional[float] = None
+        self.unit: Optional[str] = None
+        self.unit_price: Optional[float] = None
+
+    def __repr__(self) -> str:
+        return f"ReceiptLine({self.name!r}, {self.price})"
+
+
+def _price(line: str):
+    """(line without its trailing price, price), price None if there is none"""
+    match = _PRICE.search(line)
+    if match is None:
+        return line, None
+    amount = float(match.group("amount").replace(",", "."))
+    if match.group("sign") or match.group("sign2") or match.group("sign3"):
+        amount = -amount
+    return line[: match.start()].strip(), amount
+
+
+def _is_noise(line: str, priced: bool) -> bool:
+    """
+    Priced lines are items unless the whole line is a total or payment, or
+    a masked card number. Unpriced lines are also checked for header and
+    footer text.
+    """
+    if _TOTALS.match(line) or _MASKED.search(line):
+        return True
+    if priced:
+        return False
+    return bool(
+        _NOISE_WORDS.search(line)
+        or _URL.search(line)
+        or _DATE_TIME.search(line)
+        or _PHONE.search(line)
+        or _ADDRESS.search(line)
+        or line.endswith(("?", "!", ","))
+        or len(line.split()) > MAX_ITEM_WORDS
+    )
+
+
+def _apply_quantity(item: ReceiptLine, match: re.Match) -> None:
+    item.quantity = float(match.group("quantity"))
+    item.unit = (match.group("unit") or match.group("per") or "").lower() or None
+    if match.group("deal_price"):
+        deal_price = float(match.group("deal_price"))
+        item.unit_price = round(deal_price / int(match.group("deal_count")), 2)
+    else:
+        item.unit_price = float(match.group("unit_price"))
+
+
+def segment_receipt(text: str) -> List[ReceiptLine]:
+    """
+    Item lines of OCR'd receipt text, with their prices and any quantity
+    detail printed on the line before or after. Totals, payment lines,
+    store headers and footers are dropped.
+    """
+    lines = [line.strip() for line in text.splitlines()]
+    lines = [line for line in lines if line]
+    items: List[ReceiptLine] = []
+    pending_quantity: Optional[re.Match] = None
+    last_item: Optional[ReceiptLine] = None
+
+    for i, line in enumerate(lines):
+        previous_item, last_item = last_item, None
+
+        quantity = _QUANTITY.search(line)
+        if quantity is not None:
+            _, price = _price(line[quantity.end():])
+            if previous_item is not None and previous_item.quantity is None:
+                # "LIMES PERSIAN" then "3 @ 0.58  1.74"
+                _apply_quantity(previous_item, quantity)
+                if previous_item.price is None:
+                    previous_item.price = price
+            else:
+                # "[Tare: 0.01 lb] 0.25 lb @ $3.99/lb" then "SERRANO PEPPERS"
+                pending_quantity = quantity
+            continue
+
+        name, price = _price(line)
+        if not _LETTERS.search(name):
+            # A price alone on the line after its item, unless a column of prices follows
+            next_line = lines[i + 1] if i + 1 < len(lines) else ""
+            next_is_price = bool(next_line) and not _LETTERS.search(_price(next_line)[0])
+            if (
+                price is not None
+                and previous_item is not None
+                and previous_item.price is None
+                and not next_is_price
+            ):
+                previous_item.price = price
+                last_item = previous_item
+            continue
+        if _DEPARTMENT.match(name):
+            continue
+        if (price is not None and price < 0) or _is_noise(name, price is not None):
+            pending_quantity = None
+            continue
+
+        item = ReceiptLine(name, price)
+        if pending_quantity is not None:
+            _apply_quantity(item, pending_quantity)
+            pending_quantity = None
+        items.append(item)
+        last_item = item
+
+    # Store names and slogans above the first priced item aren't purchases
+    first_priced = next((i for i, item in enumerate(items) if item.price is not None), 0)
+    return items[first_priced:]
+
+
+def _money(value: Optional[float]) -> str:
+    return "" if value is None else f"{value:.2f}"
+
+
+def item_table(items: List[ReceiptLine]) -> str:
+    """Compact table of receipt items for the LLM, one row per item"""
+    rows = ["item | quantity | price"]
+    for item in items:
+        quantity = ""
+        if item.quantity is not None:
+            quantity = " ".join(filter(None, [f"{item.quantity:g}", item.unit]))
+            if item.unit_price is not None:
+                quantity += f" @ {_money(item.unit_price)}"
+        rows.append(f"{item.name} | {quantity} | {_money(item.price)}")
+    return "\n".join(rows)
+
+
+def compact_receipt_text(text: str) -> Optional[str]:
+    """The receipt's items as a table, None if no item lines were found"""
+    items = segment_receipt(text)
+    return item_table(items) if items else None
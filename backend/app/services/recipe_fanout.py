@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import os
+import re
+from difflib import SequenceMatcher
+from typing import Awaitable, Callable, List, Tuple
+
+from ..models.recipes import ListOfRecipeData, RecipeData, RecipePreferences
+
+logger = logging.getLogger(__name__)
+
+# Fan-out is off unless RECIPE_FANOUT=1, it spends more calls and adds batch
+# hints to the prompt's custom preferences in exchange for lower latency
+FANOUT_ENABLED = os.getenv("RECIPE_FANOUT", "0") == "1"
+
+# Recipes per call when there are no meal types or cuisines to split by
+CHUNK_SIZE = int(os.getenv("RECIPE_FANOUT_CHUNK_SIZE", "2"))
+
+# Recipe names at least this similar are treated as the same recipe
+DUPLICATE_NAME_SIMILARITY = 0.85
+
+# Steer plain chunks apart so they don't all come back with the same dishes
+DIVERSITY_HINTS = [
+    "lean towards quick, fresh dishes",
+    "lean towards hearty, slow-cooked dishes",
+    "lean towards baked or roasted dishes",
+    "lean towards bowls, salads or wraps",
+    "lean towards soups, stews or curries",
+    "lean towards stir-fries or grilled dishes",
+    "lean towards street food or snacks",
+    "lean towards something unexpected",
+]
+
+
+def _split_counts(total: int, parts: int) -> List[int]:
+    """Spread total over parts as evenly as possible, earlier parts get extra"""
+    return [total // parts + (1 if i < total % parts else 0) for i in range(parts)]
+
+
+def _groups(preferences: RecipePreferences) -> List[Tuple[int, str, dict]]:
+    """(recipe count, hint, preference updates) per meal type or cuisine"""
+    total = preferences.num_recipes
+    for field in ("meal_types", "cuisine"):
+        values = getattr(preferences, field)[:total]
+        if len(values) > 1:
+            return [
+                (
+                    count,
+                    f"Only make {value} recipes, other batches cover "
+                    + ", ".join(v for v in values if v != value),
+                    {field: [value]},
+                )
+                for value, count in zip(values, _split_counts(total, len(values)))
+            ]
+    return [(total, "Make recipes distinct from the other batches", {})]
+
+
+def plan_fanout(preferences: RecipePreferences) -> List[RecipePreferences]:
+    """
+    Split one request into smaller ones that can be generated concurrently:
+    by meal type if several are asked for, else by cuisine, and then into
+    chunks of at most CHUNK_SIZE recipes. Each part gets a hint so the parts
+    don't all come back with the same dishes.
+    """
+    if preferences.num_recipes <= CHUNK_SIZE:
+        return [preferences]
+
+    planned = []
+    for count, hint, updates in _groups(preferences):
+        chunks = -(-count // max(CHUNK_SIZE, 1))
+        for chunk_count in _split_counts(count, chunks):
+            style = DIVERSITY_HINTS[len(planned) % len(DIVERSITY_HINTS)]
+            planned.append((chunk_count, f"{hint}; {style}", updates))
+
+    custom = preferences.custom_preferences or ""
+    return [
+        preferences.model_copy(
+            update={
+                "num_recipes": count,
+                "custom_preferences": (
+                    f"{custom}\nBatch {i + 1} of {len(planned)}: {hint}".strip()
+                ),
+                **updates,
+            }
+        )
+        for i, (count, hint, updates) in enumerate(planned)
+    ]
+
+
+def _normalize(name: str) -> str:
+    return re.sub(r"[^a-z0-9 ]", "", name.lower()).strip()
+
+
+def merge_recipes(batches: List[List[RecipeData]], limit: int) -> List[RecipeData]:
+    """
+    Interleave batches so every part is represented, dropping recipes whose
+    name matches one already kept, up to limit recipes
+    """
+    merged: List[RecipeData] = []
+    kept_names: List[str] = []
+    longest = max((len(batch) for batch in batches), default=0)
+    for position in range(longest):
+        for batch in batches:
+            if position >= len(batch) or len(merged) >= limit:
+                continue
+            recipe = batch[position]
+            name = _normalize(recipe.name)
+            if any(
+                SequenceMatcher(None, name, kept).ratio() >= DUPLICATE_NAME_SIMILARITY
+                for kept in kept_names
+            ):
+                logger.info(f"Dropping duplicate recipe from fan-out: {recipe.name}")
+                continue
+            merged.append(recipe)
+            kept_names.append(name)
+    return merged
+
+
+async def generate_fanout(
+    generate: Callable[[RecipePreferences], Awaitable[ListOfRecipeData]],
+    preferences: RecipePreferences,
+) -> ListOfRecipeData:
+    """
+    Run generate once per planned part concurrently and merge the results.
+    Parts that fail are logged and skipped unless every part fails.
+    """
+    parts = plan_fanout(preferences)
+    if len(parts) == 1:
+        return await generate(parts[0])
+
+    logger.info(
+        f"Fanning out {preferences.num_recipes} recipes into {len(parts)} calls "
+        f"of {[p.num_recipes for p in parts]}"
+    )
+    results = await asyncio.gather(*(generate(p) for p in parts), return_exceptions=True)
+
+    batches = []
+    errors = []
+    for part, result in zip(parts, results):
+        if isinstance(result, BaseException):
+            logger.error(f"Recipe fan-out part failed ({part.num_recipes} recipes): {result}")
+            errors.append(result)
+        else:
+            batches.append(result.recipes)
+    if not batches:
+        raise errors[0]
+
+    return ListOfRecipeData(recipes=merge_recipes(batches, preferences.num_recipes))
@@ -0,0 +1,72 @@
+import hashlib
+import json
+import math
+import re
+from typing import List, Optional
+
+from ..models.pantry import PantryItem
+from ..models.recipes import RecipePreferences
+
+# Bump when the canonical form changes so old cache entries stop matching
+FINGERPRINT_VERSION = 1
+
+# Quantities and prices are bucketed on a log scale with this step, so a
+# pantry drifting by a few percent between requests keeps the same key
+BUCKET_RATIO = 1.25
+
+AVOID_RECIPES_TEXT = "Please avoid generating these or similar recipes:"
+_AVOID_LINE = re.compile(rf"^\s*{re.escape(AVOID_RECIPES_TEXT)}.*$", re.MULTILINE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize_text(text: str) -> str:
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+
+def bucket(value: Optional[float]) -> Optional[int]:
+    """Log-scale bucket of a positive amount, None for missing or zero"""
+    if value is None or value <= 0:
+        return None
+    return math.floor(math.log(value, BUCKET_RATIO) + 0.5)
+
+
+def canonical_pantry(pantry_items: List[PantryItem]) -> List[list]:
+    """Sorted (name, unit, quantity bucket, price bucket) for each item"""
+    return sorted(
+        [
+            _normalize_text(item.data.name),
+            _normalize_text(item.data.unit),
+            bucket(item.data.quantity),
+            bucket(item.data.price),
+        ]
+        for item in pantry_items
+    )
+
+
+def canonical_preferences(preferences: RecipePreferences) -> dict:
+    """
+    Preferences with list order, case and whitespace normalized and the
+    "avoid these recipes" text left out, as it changes with every request
+    """
+    canonical = preferences.model_dump(mode="json")
+    for field in ("cuisine", "meal_types", "dietary", "nutrition_goals"):
+        canonical[field] = sorted({_normalize_text(v) for v in canonical[field]})
+    custom = _AVOID_LINE.sub("", preferences.custom_preferences or "")
+    canonical["custom_preferences"] = _normalize_text(custom) or None
+    return canonical
+
+
+def recipe_fingerprint(
+    pantry_items: List[PantryItem], preferences: RecipePreferences
+) -> str:
+    """Cache fingerprint for a recipe generation request"""
+    payload = json.dumps(
+        {
+            "version": FINGERPRINT_VERSION,
+            "pantry": canonical_pantry(pantry_items),
+            "preferences": canonical_preferences(preferences),
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
@@ -1,10 +1,11 @@
 import logging
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Set, Tuple
 from uuid import UUID
 
 from ..db.crud import PantryCRUD, RecipeCRUD
-from ..models.pantry import PantryItemUpdate
+from ..logs import LazyPayload
+from ..models.pantry import PantryItem, PantryItemUpdate
 from ..models.recipe_interactions import (
     CookData,
     InteractionType,
@@ -12,8 +13,10 @@ from ..models.recipe_interactions import (
     RecipeInteractionCreate,
 )
 from ..models.recipes import ListOfRecipeData, RecipePreferences, RecipeResponse
-from .llm.providers.claude import ClaudeService
+from .llm.providers import get_llm_service
 from .pantry import get_pantry_manager
+from .recipe_fanout import FANOUT_ENABLED, generate_fanout
+from .recipe_fingerprint import AVOID_RECIPES_TEXT, recipe_fingerprint
 
 logger = logging.getLogger(__name__)
 
@@ -25,42 +28,78 @@ class RecipeManager:
     """
 
     def __init__(self):
-        self.claude_service = ClaudeService()
+        self.claude_service = get_llm_service()
         self.recipe_crud = RecipeCRUD()
         self.pantry_crud = PantryCRUD()
 
+    async def _prepare_generation(
+        self, preferences: RecipePreferences, user_id: UUID
+    ) -> Tuple[List[str], List[PantryItem], Set[str]]:
+        """
+        Add recent unsaved recipes to avoid and describe the user's pantry.
+        Returns the ingredient lines for the prompt, the pantry items they
+        came from and the normalized names of the recipes to avoid.
+        """
+        # Get unsaved recipes from last 24 hours
+        unsaved_recipes = await self.get_unsaved_recipes(user_id)
+        if unsaved_recipes:
+            avoid_text = f"\n{AVOID_RECIPES_TEXT} {', '.join(unsaved_recipes)}"
+            if preferences.custom_preferences:
+                preferences.custom_preferences += avoid_text
+            else:
+                preferences.custom_preferences = avoid_text
+
+        logger.info(
+            "Generating recipe for user %s with preferences: %s",
+            str(user_id),
+            LazyPayload(preferences),
+        )
+        pantry_manager = get_pantry_manager()
+        pantry_items = await pantry_manager.get_items(user_id)
+        ingredients = [
+            f"{item.data.name} ({item.data.quantity} \
+{item.data.unit} ${item.data.price} )"
+            for item in pantry_items
+        ]
+        avoided = {name.strip().lower() for name in unsaved_recipes}
+        return ingredients, pantry_items, avoided
+
     async def generate_recipe(
         self, preferences: RecipePreferences, user_id: UUID
     ) -> List[RecipeResponse]:
         """Generate recipe and link ingredients to pantry items"""
         try:
-            # Get unsaved recipes from last 24 hours
-            unsaved_recipes = await self.get_unsaved_recipes(user_id)
-            if unsaved_recipes:
-                avoid_text = f"\nPlease avoid generating these or similar recipes: {', '.join(unsaved_recipes)}"
-                if preferences.custom_preferences:
-                    preferences.custom_preferences += avoid_text
-                else:
-                    preferences.custom_preferences = avoid_text
-
-            logger.info(
-                f"Generating recipe for user {user_id} with preferences: {preferences}"
+            ingredients, pantry_items, avoided = await self._prepare_generation(
+                preferences, user_id
             )
-            pantry_manager = get_pantry_manager()
-            pantry_items = await pantry_manager.get_items(user_id)
             final_recipes = []
-            ingredients = [
-                f"{item.data.name} ({item.data.quantity} \
-{item.data.unit} ${item.data.price} )"
-                for item in pantry_items
-            ]
-            list_of_recipe_data = await self.claude_service.generate_recipes(
-                ListOfRecipeData,
-                ingredients=ingredients,
-                preferences=preferences,
-                user_id=user_id,
-                use_cache=True,
-            )
+
+            async def generate(part: RecipePreferences) -> ListOfRecipeData:
+                result = await self.claude_service.generate_recipes(
+                    ListOfRecipeData,
+                    ingredients=ingredients,
+                    preferences=part,
+                    user_id=user_id,
+                    use_cache=True,
+                    cache_fingerprint=recipe_fingerprint(pantry_items, part),
+                )
+                if any(r.name.strip().lower() in avoided for r in result.recipes):
+                    # The fingerprint leaves out the avoid list, so a cached
+                    # answer can hold recipes the user just passed on
+                    logger.info("Cached recipes include ones to avoid, regenerating")
+                    result = await self.claude_service.generate_recipes(
+                        ListOfRecipeData,
+                        ingredients=ingredients,
+                        preferences=part,
+                        user_id=user_id,
+                        use_cache=False,
+                    )
+                return result
+
+            if FANOUT_ENABLED:
+                list_of_recipe_data = await generate_fanout(generate, preferences)
+            else:
+                list_of_recipe_data = await generate(preferences)
             for recipe_data in list_of_recipe_data.recipes:
                 recipe_crud = await self.recipe_crud.create_recipe(
                     user_id=user_id,
@@ -73,6 +112,36 @@ class RecipeManager:
             logger.error(f"Error during recipe generation: {str(e)}")
             raise
 
+    async def generate_recipe_stream(
+        self, preferences: RecipePreferences, user_id: UUID
+    ) -> AsyncIterator[RecipeResponse]:
+        """Generate recipes, storing and yielding each one as soon as it is complete"""
+        try:
+            ingredients, pantry_items, avoided = await self._prepare_generation(
+                preferences, user_id
+            )
+            # Streamed recipes can't be taken back, so only share cache entries
+            # through the fingerprint when there is nothing to avoid
+            fingerprint = (
+                None if avoided else recipe_fingerprint(pantry_items, preferences)
+            )
+            async for recipe_data in self.claude_service.stream_recipes(
+                ListOfRecipeData,
+                ingredients=ingredients,
+                preferences=preferences,
+                user_id=user_id,
+                use_cache=True,
+                cache_fingerprint=fingerprint,
+            ):
+                yield await self.recipe_crud.create_recipe(
+                    user_id=user_id,
+                    data=recipe_data,
+                )
+
+        except Exception as e:
+            logger.error(f"Error during streaming recipe generation: {str(e)}")
+            raise
+
     async def link_recipe_ingredients(
         self, recipe_id: str, user_id: UUID
     ) -> RecipeResponse:
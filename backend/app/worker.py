@@ -0,0 +1,40 @@
+"""
+Runs background jobs outside the API process:
+
+    JOB_WORKER_IN_PROCESS=0 uvicorn app.main:app
+    python -m app.worker
+
+Both processes must see the same JOB_QUEUE_PATH.
+"""
+
+import asyncio
+import logging
+import signal
+
+from .logs import configure_logging
+from .services.job_queue import get_job_queue
+from .services.pantry import get_pantry_manager
+
+configure_logging()
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    # Creating the pantry manager registers its job handlers
+    pantry_manager = get_pantry_manager()
+    queue = get_job_queue()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await queue.start()
+    await stop.wait()
+    logger.info("Shutting down job worker")
+    await queue.drain()
+    await pantry_manager.enrichment.drain()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+"""
+Compare one recipe generation call against fanning it out into concurrent
+smaller calls, using the local provider with latency that grows with the
+number of recipes asked for (as output tokens do with a real provider).
+
+Run from backend/:  python -m benchmarks.bench_fanout [num_recipes] [rounds]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+from app.models.recipes import ListOfRecipeData, RecipePreferences
+from app.services.llm.providers.local import LocalLLMService
+from app.services.recipe_fanout import generate_fanout, plan_fanout
+
+INGREDIENTS = ["rice", "eggs", "spinach", "chicken thighs", "garlic", "lemon"]
+
+
+async def measure(generate, preferences: RecipePreferences, rounds: int):
+    latencies = []
+    returned = []
+    for i in range(rounds):
+        round_preferences = preferences.model_copy(
+            update={"custom_preferences": f"round {i}"}
+        )
+        started = time.perf_counter()
+        result = await generate(round_preferences)
+        latencies.append(time.perf_counter() - started)
+        returned.append(len(result.recipes))
+    return sorted(latencies), returned
+
+
+async def main(num_recipes: int = 8, rounds: int = 10):
+    # A real recipe call scaled down 10x: ~1s to start, ~1.5s per recipe
+    service = LocalLLMService(
+        latency_median_ms=100, latency_sigma=0.3, latency_per_unit_ms=150
+    )
+
+    async def generate(part: RecipePreferences) -> ListOfRecipeData:
+        return await service.generate_recipes(
+            ListOfRecipeData, INGREDIENTS, part, use_cache=False
+        )
+
+    for label, preferences in [
+        ("no split field", RecipePreferences(num_recipes=num_recipes)),
+        (
+            "2 meal types",
+            RecipePreferences(num_recipes=num_recipes, meal_types=["Lunch", "Dinner"]),
+        ),
+    ]:
+        parts = plan_fanout(preferences)
+        single, _ = await measure(generate, preferences, rounds)
+        fanned, returned = await measure(
+            lambda p: generate_fanout(generate, p), preferences, rounds
+        )
+        print(f"{num_recipes} recipes, {label}: {len(parts)} calls of "
+              f"{[p.num_recipes for p in parts]}")
+        print(f"  single call p50/max: {statistics.median(single) * 1000:.0f} / "
+              f"{single[-1] * 1000:.0f} ms")
+        print(f"  fan-out     p50/max: {statistics.median(fanned) * 1000:.0f} / "
+              f"{fanned[-1] * 1000:.0f} ms")
+        print(f"  unique recipes kept: {sum(returned)}/{num_recipes * rounds} "
+              f"({num_recipes * rounds - sum(returned)} dropped as duplicates)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(int(arg) for arg in sys.argv[1:3])))
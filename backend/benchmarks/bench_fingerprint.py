@@ -0,0 +1,129 @@
+"""
+Replay a synthetic day of recipe generation traffic and compare the cache
+hit rate of keys built from the exact prompt with keys built from the
+canonical recipe fingerprint.
+
+Between requests pantries drift (quantities used up a little, prices
+re-read), preferences come back with different list order, case and
+spacing, and some requests carry the "avoid these recipes" text.
+
+Run from backend/:  python -m benchmarks.bench_fingerprint [users] [requests_per_user]
+"""
+
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+from app.models.pantry import PantryItem, PantryItemData
+from app.models.recipes import RecipePreferences
+from app.services.llm.llm_cache import CACHE_TTLS, make_cache_key
+from app.services.recipe_fingerprint import AVOID_RECIPES_TEXT, recipe_fingerprint
+
+TTL = CACHE_TTLS["recipe_generation"]
+START = datetime(2024, 1, 1, 7)
+
+STAPLES = [
+    ("rice", "g", 1000), ("eggs", "unit", 12), ("milk", "l", 2), ("chicken", "g", 800),
+    ("spinach", "g", 300), ("tomatoes", "unit", 6), ("onions", "unit", 4),
+    ("garlic", "unit", 1), ("pasta", "g", 500), ("cheddar", "g", 250),
+]
+PREFERENCE_CHOICES = [
+    dict(meal_types=["Dinner"]),
+    dict(meal_types=["Lunch", "Dinner"], dietary=["Vegetarian"]),
+    dict(cuisine=["Italian", "Mexican"], max_prep_time=30),
+    dict(nutrition_goals=["High Protein"], custom_preferences="Something spicy"),
+]
+
+
+def make_pantry(rng: random.Random):
+    return [
+        PantryItem(
+            id=uuid.uuid4(),
+            data=PantryItemData(
+                name=name, quantity=quantity, unit=unit,
+                price=round(rng.uniform(1, 6), 2), category=None, notes=None,
+            ),
+            user_id=uuid.uuid4(),
+            created_at=START,
+            updated_at=START,
+        )
+        for name, unit, quantity in rng.sample(STAPLES, 7)
+    ]
+
+
+def drift(pantry, rng: random.Random):
+    """Use up a little of one item, everything else stays put"""
+    item = rng.choice(pantry)
+    used = round(item.data.quantity * rng.uniform(0, 0.08), 2)
+    item.data.quantity = round(max(item.data.quantity - used, 0.01), 2)
+
+
+def noisy(preferences: dict, rng: random.Random, avoid: list) -> RecipePreferences:
+    values = {
+        key: (rng.sample(value, len(value)) if isinstance(value, list) else value)
+        for key, value in preferences.items()
+    }
+    for key in ("cuisine", "meal_types", "dietary"):
+        if key in values and rng.random() < 0.3:
+            values[key] = [v.lower() for v in values[key]]
+    custom = values.get("custom_preferences") or ""
+    if custom and rng.random() < 0.3:
+        custom = f"  {custom.lower()} "
+    if avoid:
+        custom += f"\n{AVOID_RECIPES_TEXT} {', '.join(avoid)}"
+    values["custom_preferences"] = custom or None
+    return RecipePreferences(num_recipes=4, **values)
+
+
+def prompt_for(pantry, preferences: RecipePreferences) -> str:
+    ingredients = "\n".join(
+        f"- {i.data.name} ({i.data.quantity} {i.data.unit} ${i.data.price} )"
+        for i in pantry
+    )
+    return f"{ingredients}\n{preferences}"
+
+
+def replay(users: int, requests_per_user: int, seed: int = 0):
+    rng = random.Random(seed)
+    trace = []
+    for _ in range(users):
+        pantry = make_pantry(rng)
+        preferences = rng.choice(PREFERENCE_CHOICES)
+        at = START + timedelta(minutes=rng.uniform(0, 600))
+        for n in range(requests_per_user):
+            avoid = [f"Recipe {n - 1}"] if n and rng.random() < 0.5 else []
+            trace.append((at, pantry, noisy(preferences, rng, avoid)))
+            drift(pantry, rng)
+            at += timedelta(minutes=rng.expovariate(1 / 45))
+            pantry = [p.model_copy(deep=True) for p in pantry]
+    trace.sort(key=lambda entry: entry[0])
+
+    results = {}
+    for label, key_for in [
+        ("exact prompt", lambda p, prefs: make_cache_key(prompt_for(p, prefs))),
+        ("fingerprint", lambda p, prefs: make_cache_key(
+            prompt_for(p, prefs), fingerprint=recipe_fingerprint(p, prefs)
+        )),
+    ]:
+        stored = {}
+        hits = 0
+        for at, pantry, preferences in trace:
+            key = key_for(pantry, preferences)
+            if key in stored and at - stored[key] < TTL:
+                hits += 1
+            else:
+                stored[key] = at
+        results[label] = (hits, len(stored))
+    return len(trace), results
+
+
+def main(users: int = 200, requests_per_user: int = 6):
+    total, results = replay(users, requests_per_user)
+    print(f"{total} requests from {users} users, {TTL} TTL")
+    for label, (hits, entries) in results.items():
+        print(f"  {label:<13} hit rate {hits / total:6.1%}  ({entries} entries written)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,91 @@
+"""
+Lookup latency of the ingredient knowledge base, for exact names, names
+users typed, misspellings and unknown items, with a knowledge base the
+size of a well-used pantry table (1500 ingredients).
+
+Run from backend/:  python -m benchmarks.bench_ingredient_kb [lookups]
+"""
+
+import random
+import sys
+import time
+from datetime import date
+
+from app.models.pantry import Nutrition, PantryItemCreate, PantryItemData
+from app.services.ingredient_kb import IngredientKnowledgeBase
+
+STAPLES = """
+apple avocado bacon banana basil beef bread broccoli butter cabbage carrot
+celery cheddar chicken chickpea chili cilantro cinnamon coconut cod corn
+cream cucumber egg eggplant flour garlic ginger grape ham honey kale lamb
+leek lemon lentil lettuce lime mango milk mushroom mustard noodle oat olive
+onion orange oregano paprika parsley pasta peach peanut pear pea pepper
+pork potato quinoa raisin rice salmon salt sausage shrimp spinach squash
+strawberry sugar thyme tofu tomato tortilla tuna turkey vinegar walnut
+yogurt zucchini
+""".split()
+MODIFIERS = """
+organic frozen fresh dried smoked ground whole sliced canned red green
+wild baby sweet greek roasted toasted unsalted light extra
+""".split()
+
+
+def typo(name: str, rng: random.Random) -> str:
+    i = rng.randrange(len(name))
+    return name[:i] + name[i + 1 :] if rng.random() < 0.5 else name[:i] + name[i] + name[i:]
+
+
+def build(rng: random.Random) -> IngredientKnowledgeBase:
+    kb = IngredientKnowledgeBase()
+    names = set(STAPLES)
+    while len(names) < 1500:
+        names.add(f"{rng.choice(MODIFIERS)} {rng.choice(STAPLES)}")
+    for name in names:
+        kb.learn(
+            PantryItemCreate(
+                data=PantryItemData(
+                    name=name, category="food", notes="🥫", expiry_date="2024-01-10"
+                ),
+                nutrition=Nutrition(calories=rng.uniform(10, 500)),
+            ),
+            input_name=f"{name.upper()} 500G",
+            learned_on=date(2024, 1, 1),
+        )
+    return kb
+
+
+def measure(kb: IngredientKnowledgeBase, queries, cached: bool) -> float:
+    if not cached:
+        kb._lookups.clear()
+    started = time.perf_counter()
+    for query in queries:
+        if not cached:
+            kb._lookups.clear()
+        kb.lookup(query)
+    return (time.perf_counter() - started) / len(queries) * 1e6
+
+
+def main(lookups: int = 2000):
+    rng = random.Random(0)
+    started = time.perf_counter()
+    kb = build(rng)
+    print(f"learned {len(kb)} ingredients in {time.perf_counter() - started:.2f}s")
+
+    known = [rng.choice(STAPLES) for _ in range(lookups)]
+    cases = {
+        "exact name": known,
+        "typed name": [f"{name.upper()} 500G" for name in known],
+        "misspelled": [typo(name, rng) for name in known if len(name) > 5],
+        "unknown": [f"xq{name}zz item" for name in known],
+    }
+    for label, queries in cases.items():
+        hits_before = kb.hits
+        cold = measure(kb, queries, cached=False)
+        matched = (kb.hits - hits_before) / len(queries)
+        warm = measure(kb, queries, cached=True)
+        print(f"  {label:<11} {cold:7.1f} µs uncached  {warm:5.1f} µs cached  "
+              f"matched {matched:.0%}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,85 @@
+"""
+CPU spent on the request thread by the logging of one recipe generation:
+the old eager f-strings through basicConfig against lazy payloads through
+the queue handler, both at INFO and writing to /dev/null.
+
+Run from backend/:  python -m benchmarks.bench_logging [requests]
+"""
+
+import logging
+import os
+import random
+import sys
+import time
+
+from app.logs import LazyPayload, StructuredFormatter, configure_logging, log_extra
+from app.models.recipes import ListOfRecipeData
+from app.services.llm.providers.local.generator import SchemaDataGenerator
+
+logger = logging.getLogger("bench.logging")
+
+
+def payloads():
+    response = ListOfRecipeData.model_validate(
+        SchemaDataGenerator(ListOfRecipeData, random.Random(0)).generate(list_length=6)
+    )
+    prompt = "- ingredient (1.0 unit $2.49 )\n" * 60 + "preferences " * 40
+    system = "You are a recipe generator. " * 120
+    params = {
+        "model": "claude",
+        "max_tokens": 4000,
+        "messages": [{"role": "user", "content": prompt}],
+        "system": [{"type": "text", "text": system}],
+    }
+    return prompt, params, response
+
+
+def eager(prompt, params, response):
+    logger.info(f"Generated prompt: {prompt}")
+    logger.info(f"Claude request: {params}")
+    logger.info(f"Claude response: {response.model_dump_json()}")
+    logger.info(f"Generated response: {response}")
+
+
+def lazy(prompt, params, response):
+    logger.debug("Generated prompt: %s", LazyPayload(prompt), extra=log_extra("llm.prompt"))
+    logger.info(
+        "Claude single request",
+        extra=log_extra("llm.request", request_type="recipe_generation", max_tokens=4000),
+    )
+    logger.debug("Claude request params: %s", LazyPayload(params), extra=log_extra("llm.payload"))
+    logger.debug("Claude response: %s", LazyPayload(response), extra=log_extra("llm.response"))
+    logger.debug("Generated response: %s", LazyPayload(response), extra=log_extra("llm.response"))
+
+
+def measure(log, requests: int) -> float:
+    prompt, params, response = payloads()
+    started = time.thread_time()
+    for _ in range(requests):
+        log(prompt, params, response)
+    return (time.thread_time() - started) / requests * 1e6
+
+
+def main(requests: int = 2000):
+    devnull = open(os.devnull, "w")
+    root = logging.getLogger()
+
+    stream = logging.StreamHandler(devnull)
+    stream.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+    root.handlers = [stream]
+    root.setLevel(logging.INFO)
+    before = measure(eager, requests)
+
+    stream = logging.StreamHandler(devnull)
+    stream.setFormatter(StructuredFormatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+    root.handlers = []
+    listener = configure_logging("INFO", handlers=[stream])
+    after = measure(lazy, requests)
+    listener.stop()
+
+    print(f"request thread CPU per recipe generation: {before:.1f} µs eager, "
+          f"{after:.1f} µs lazy + queued ({before / after:.0f}x less)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,50 @@
+"""
+Per-call cost of the metrics instrumentation: a timed CRUD method against
+the bare coroutine, and the HTTP middleware against calling the handler
+directly.
+
+Run from backend/:  python -m benchmarks.bench_metrics [calls]
+"""
+
+import asyncio
+import sys
+import time
+from types import SimpleNamespace
+
+from app.metrics import metrics_middleware, timed_query
+
+
+async def noop(self):
+    return None
+
+
+async def call_next(request):
+    return SimpleNamespace(status_code=200)
+
+
+async def per_call(fn, calls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        await fn()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+async def main(calls: int = 100_000):
+    timed = timed_query("BenchCRUD", noop)
+    request = SimpleNamespace(
+        method="GET", scope={"route": SimpleNamespace(path="/pantry/items")}
+    )
+
+    bare = await per_call(lambda: noop(None), calls)
+    wrapped = await per_call(lambda: timed(None), calls)
+    print(f"CRUD method:     {bare:.2f} µs bare, {wrapped:.2f} µs timed "
+          f"(+{wrapped - bare:.2f} µs per query)")
+
+    bare = await per_call(lambda: call_next(request), calls)
+    wrapped = await per_call(lambda: metrics_middleware(request, call_next), calls)
+    print(f"HTTP middleware: {bare:.2f} µs bare, {wrapped:.2f} µs timed "
+          f"(+{wrapped - bare:.2f} µs per request)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(int(arg) for arg in sys.argv[1:2])))
@@ -0,0 +1,96 @@
+"""
+/health latency while receipts are being processed, with the Vision call
+made inline on the event loop (as before) against through the OCR pool.
+Vision is replaced by a client that blocks for a fixed time.
+
+Run from backend/:  python -m benchmarks.bench_ocr_offload [receipts] [ocr_seconds]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+import httpx
+
+from app.main import app
+from app.models.pantry import ListOfPantryItemsCreate
+from app.services.ocr import OcrPool
+from app.services.ocr.vision import VisionEngine
+from app.services.receipt import ReceiptParser
+
+
+class BlockingVision:
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def text_detection(self, image, timeout=None):
+        time.sleep(self.seconds)
+        return SimpleNamespace(
+            text_annotations=[SimpleNamespace(description="MILK 2.49")],
+            full_text_annotation=SimpleNamespace(pages=[]),
+        )
+
+
+class FakeLLM:
+    async def parse_receipt_text(self, model, text):
+        return ListOfPantryItemsCreate(items=[])
+
+
+class InlineVisionEngine(VisionEngine):
+    """The old behaviour, the blocking call runs on the event loop"""
+
+    async def recognize(self, content):
+        return self._detect_text(content)
+
+
+def make_parser(engine: VisionEngine) -> ReceiptParser:
+    parser = ReceiptParser(engine)
+    parser.claude_service = FakeLLM()
+    return parser
+
+
+async def health_latencies(client: httpx.AsyncClient, stop: asyncio.Event):
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/health")
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.01)
+    return latencies
+
+
+async def run(label: str, parser: ReceiptParser, receipts: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        stop = asyncio.Event()
+        probe = asyncio.create_task(health_latencies(client, stop))
+        started = time.perf_counter()
+        await asyncio.gather(
+            *[parser.parse_receipt(b"receipt", user_id=None) for _ in range(receipts)]
+        )
+        elapsed = time.perf_counter() - started
+        stop.set()
+        latencies = sorted(await probe)
+
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(
+        f"{label:8s} receipts done in {elapsed:5.2f}s   /health n={len(latencies):4d} "
+        f"p50={p50:7.1f}ms  p99={p99:7.1f}ms  max={latencies[-1] * 1000:7.1f}ms"
+    )
+
+
+async def main(receipts: int, ocr_seconds: float) -> None:
+    print(f"{receipts} receipts, {ocr_seconds:.2f}s of blocking OCR each")
+    vision = BlockingVision(ocr_seconds)
+    await run("inline", make_parser(InlineVisionEngine(vision)), receipts)
+    pool = OcrPool(concurrency=4, timeout=60)
+    await run("pool", make_parser(VisionEngine(vision, pool)), receipts)
+
+
+if __name__ == "__main__":
+    receipts = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    ocr_seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 0.3
+    asyncio.run(main(receipts, ocr_seconds))
@@ -0,0 +1,110 @@
+"""
+Compare the legacy first-brace/last-brace parser with extract_json on the
+response shapes we see from Claude.
+
+Run from backend/:  python -m benchmarks.bench_parse
+"""
+
+import json
+import timeit
+
+from app.models.pantry import ListOfPantryItemsCreate
+from app.models.recipes import ListOfRecipeData
+from app.services.llm.providers.claude.handlers import extract_json
+
+
+def legacy_parse(content, model_class):
+    """The parser this benchmark replaced, kept verbatim for comparison"""
+    json_patterns = [
+        (content.find("{"), content.rfind("}")),
+        (content.find("["), content.rfind("]")),
+    ]
+    for start, end in json_patterns:
+        if start != -1 and end != -1:
+            try:
+                data = json.loads(content[start : end + 1])
+                return (
+                    [model_class(**item) for item in data]
+                    if isinstance(data, list)
+                    else model_class(**data)
+                )
+            except json.JSONDecodeError:
+                continue
+    raise ValueError("No valid JSON found in response")
+
+
+def recipe(i):
+    return {
+        "name": f"Recipe {i}",
+        "ingredients": [
+            {"name": n, "quantity": 100 + i, "unit": "grams", "protein": 5.0, "calories": 120}
+            for n in ("rice", "chicken breast", "spinach", "garlic")
+        ],
+        "instructions": [f"🔪 Step {s}: prepare the ingredients carefully" for s in range(6)],
+        "preparation_time": 30,
+        "servings": 2,
+        "category": "Dinner",
+        "price": 7.5,
+        "nutrition": {"standard_unit": "serving", "calories": 540, "protein": 38},
+    }
+
+
+def pantry_item(i):
+    return {
+        "data": {"name": f"item {i}", "quantity": 1, "unit": "units", "category": "produce", "notes": "🥕"},
+        "nutrition": {"calories": 41, "protein": 1, "carbs": 10},
+    }
+
+
+def build_corpus():
+    recipes = json.dumps({"recipes": [recipe(i) for i in range(8)]}, indent=2)
+    items = json.dumps({"items": [pantry_item(i) for i in range(30)]}, indent=2)
+    return [
+        ("clean recipes", recipes, ListOfRecipeData),
+        ("prose wrapped", f"Here are 8 recipes:\n\n{recipes}\n\nEnjoy!", ListOfRecipeData),
+        ("fenced block", f"```json\n{recipes}\n```", ListOfRecipeData),
+        (
+            "stray braces in prose",
+            f"I replaced {{name}} placeholders:\n{recipes}\nNote: prices are estimates}}",
+            ListOfRecipeData,
+        ),
+        ("truncated at max_tokens", recipes[: int(len(recipes) * 0.8)], ListOfRecipeData),
+        ("clean receipt items", items, ListOfPantryItemsCreate),
+        ("truncated receipt items", items[: int(len(items) * 0.6)], ListOfPantryItemsCreate),
+        (
+            "bare list of items",
+            json.dumps([pantry_item(i) for i in range(30)]),
+            ListOfPantryItemsCreate,
+        ),
+    ]
+
+
+def run(parser, content, model):
+    try:
+        result = parser(content, model)
+        if isinstance(result, tuple):
+            result = result[0]
+        return True, result
+    except Exception:
+        return False, None
+
+
+def main(number: int = 200):
+    corpus = build_corpus()
+    print(f"{'shape':28} {'legacy':>8} {'new':>8} {'legacy µs':>10} {'new µs':>8}")
+    avoided = 0
+    for name, content, model in corpus:
+        legacy_ok, _ = run(legacy_parse, content, model)
+        new_ok, _ = run(extract_json, content, model)
+        legacy_us = timeit.timeit(lambda: run(legacy_parse, content, model), number=number)
+        new_us = timeit.timeit(lambda: run(extract_json, content, model), number=number)
+        avoided += new_ok and not legacy_ok
+        print(
+            f"{name:28} {'ok' if legacy_ok else 'FAIL':>8} {'ok' if new_ok else 'FAIL':>8} "
+            f"{legacy_us / number * 1e6:10.1f} {new_us / number * 1e6:8.1f}"
+        )
+    print(f"\nregenerations avoided: {avoided} of {len(corpus)} responses")
+
+
+if __name__ == "__main__":
+    main()
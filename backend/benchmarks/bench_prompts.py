@@ -0,0 +1,75 @@
+"""
+Per-request CPU spent building prompts: summarizing the schema and
+substituting the template on every call, versus a compiled prompt.
+
+Run from backend/:  python -m benchmarks.bench_prompts
+"""
+
+import timeit
+
+from app.models.pantry import ListOfPantryItemsCreate, PantryItemCreate
+from app.models.recipes import ListOfRecipeData
+from app.services.llm.prompt_registry import PromptRegistry
+from app.services.llm.prompts import (
+    INGREDIENT_ANALYSIS_PROMPT_TEMPLATE,
+    INGREDIENT_ANALYSIS_SYSTEM_TEMPLATE,
+    RECIPE_GENERATION_PROMPT_TEMPLATE,
+    RECIPE_GENERATION_SYSTEM_TEMPLATE,
+)
+from app.services.llm.schema_utils import summarize_schema
+
+INGREDIENTS = "\n".join(f"- ingredient {i}: 200 grams" for i in range(25))
+CASES = [
+    (
+        "recipe_generation",
+        RECIPE_GENERATION_PROMPT_TEMPLATE,
+        RECIPE_GENERATION_SYSTEM_TEMPLATE,
+        ListOfRecipeData,
+        {"ingredients": INGREDIENTS, "preferences": "vegetarian, 3 recipes"},
+    ),
+    (
+        "receipt_analysis",
+        INGREDIENT_ANALYSIS_PROMPT_TEMPLATE,
+        INGREDIENT_ANALYSIS_SYSTEM_TEMPLATE,
+        ListOfPantryItemsCreate,
+        {"ingredients": INGREDIENTS, "today": "2024-01-01"},
+    ),
+    (
+        "ingredient_analysis",
+        INGREDIENT_ANALYSIS_PROMPT_TEMPLATE,
+        INGREDIENT_ANALYSIS_SYSTEM_TEMPLATE,
+        PantryItemCreate,
+        {"ingredients": "2 apples", "today": "2024-01-01"},
+    ),
+]
+
+
+def uncompiled(prompt_template, system_template, model, template_vars):
+    """What every request did before prompts were compiled"""
+    schema = summarize_schema(model.model_json_schema())
+    system = system_template.substitute(model=schema)
+    prompt = prompt_template.substitute(template_vars, model=schema)
+    return system, prompt
+
+
+def main(number: int = 2000):
+    registry = PromptRegistry()
+    print(f"{'prompt':22} {'uncompiled µs':>14} {'compiled µs':>12} {'saved':>7}")
+    for name, prompt_template, system_template, model, template_vars in CASES:
+        compiled = registry.compile(name, prompt_template, model, system_template)
+        before = timeit.timeit(
+            lambda: uncompiled(prompt_template, system_template, model, template_vars),
+            number=number,
+        )
+        after = timeit.timeit(
+            lambda: (compiled.system_prompt, compiled.render(template_vars)),
+            number=number,
+        )
+        print(
+            f"{name:22} {before / number * 1e6:14.1f} {after / number * 1e6:12.1f} "
+            f"{1 - after / before:7.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
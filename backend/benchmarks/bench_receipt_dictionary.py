@@ -0,0 +1,80 @@
+"""
+Share of receipt lines the learned receipt dictionary resolves without the
+LLM, as receipts from many users come in. Receipts are drawn from the item
+lines of the transcribed sample receipts (benchmarks/data/receipt_texts.json)
+plus a long tail of strings recombined from their words, with Zipf-like
+popularity. Every line the LLM sees is "parsed" to an item named after it.
+Reports hit rate and LLM prompt tokens per batch.
+
+Run from backend/:  python -m benchmarks.bench_receipt_dictionary
+"""
+
+import json
+import random
+import time
+import uuid
+from pathlib import Path
+
+from app.models.pantry import Nutrition, PantryItemCreate, PantryItemData
+from app.services.llm.token_budget import estimate_input_tokens
+from app.services.receipt_dictionary import ReceiptDictionary
+from app.services.receipt_lines import ReceiptLine, item_table, segment_receipt
+
+SAMPLES = Path(__file__).parent / "data" / "receipt_texts.json"
+USERS = 200
+RECEIPTS = 2000
+BATCH = 250
+LINES_PER_RECEIPT = 12
+LONG_TAIL = 3000
+
+
+def llm_item(line) -> PantryItemCreate:
+    return PantryItemCreate(
+        data=PantryItemData(
+            name=line.name.lower(),
+            original_name=line.name,
+            unit="unit",
+            category="grocery",
+            notes=None,
+        ),
+        nutrition=Nutrition(calories=100),
+    )
+
+
+def main() -> None:
+    lines = [line for s in json.loads(SAMPLES.read_text()) for line in segment_receipt(s["text"])]
+    rng = random.Random(1)
+    words = [word for line in lines for word in line.name.split()]
+    lines += [
+        ReceiptLine(" ".join(rng.sample(words, rng.randint(2, 4))), round(rng.uniform(1, 9), 2))
+        for _ in range(LONG_TAIL)
+    ]
+    # A few staples show up on most receipts
+    weights = [1 / (rank + 1) for rank in range(len(lines))]
+    users = [uuid.uuid4() for _ in range(USERS)]
+    dictionary = ReceiptDictionary()
+
+    tokens = baseline = 0
+    started = time.perf_counter()
+    for receipt in range(1, RECEIPTS + 1):
+        bought = rng.choices(lines, weights, k=LINES_PER_RECEIPT)
+        known, unknown = dictionary.split(bought)
+        baseline += estimate_input_tokens(item_table(bought))
+        if unknown:
+            tokens += estimate_input_tokens(item_table(unknown))
+            dictionary.learn_parse(unknown, [llm_item(line) for line in unknown], rng.choice(users))
+
+        if receipt % BATCH == 0:
+            print(
+                f"after {receipt:5d} receipts  hit rate {dictionary.hit_rate:6.1%}  "
+                f"LLM item tokens {baseline} -> {tokens}  {len(dictionary)} strings"
+            )
+            dictionary.hits = dictionary.misses = 0
+            tokens = baseline = 0
+
+    elapsed = time.perf_counter() - started
+    print(f"\n{elapsed / RECEIPTS * 1000:.3f}ms per receipt for lookups and learning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Item lines recovered from receipt OCR read in Vision's column order versus
+rebuilt from word boxes. Word boxes are synthesized from the transcribed
+sample receipts (benchmarks/data/receipt_texts.json): names on the left,
+prices right aligned, the photo tilted by each skew, and every block read
+top to bottom the way Vision flattens a receipt (names, then prices).
+Reports items that come out with their price, tokens of the flattened text
+versus the item table built from the rows, and layout time.
+
+Run from backend/:  python -m benchmarks.bench_receipt_layout
+"""
+
+import json
+import random
+import re
+import time
+from pathlib import Path
+
+from app.services.llm.token_budget import estimate_input_tokens
+from app.services.ocr import OcrWord, layout_text
+from app.services.receipt_lines import compact_receipt_text, segment_receipt
+
+SAMPLES = Path(__file__).parent / "data" / "receipt_texts.json"
+SKEWS = (0.0, 0.03, 0.06, 0.1, 0.15)
+
+CHAR_WIDTH = 14
+WORD_HEIGHT = 22
+LINE_HEIGHT = 34
+PRICE_RIGHT = 620
+
+_PRICE_COLUMN = re.compile(r"\s+(-?\$?-?\d{1,4}\.\d{2}-?(?:\s+[A-Z]{1,2}\d?)?)$")
+
+
+def photographed(text: str, skew: float, rng: random.Random):
+    """Vision's flattened text and its word boxes for a receipt tilted by `skew`"""
+    names, prices = [], []
+    for i, line in enumerate(text.splitlines()):
+        top = 80 + i * LINE_HEIGHT
+        match = _PRICE_COLUMN.search(line)
+        name, price = (line[: match.start()], match.group(1)) if match else (line, "")
+
+        def place(words, x):
+            placed = []
+            for word in words:
+                width = CHAR_WIDTH * len(word)
+                jitter = rng.uniform(-2, 2)
+                y = top + skew * x + jitter
+                placed.append(OcrWord(word, (x, y, x + width, y + WORD_HEIGHT)))
+                x += width + CHAR_WIDTH
+            return placed
+
+        names.append(place(name.split(), 40))
+        price_words = price.split()
+        width = CHAR_WIDTH * (len(" ".join(price_words)))
+        prices.append(place(price_words, PRICE_RIGHT - width))
+
+    flattened = "\n".join(
+        " ".join(word.text for word in line) for line in names + prices if line
+    )
+    words = [word for line in names + prices for word in line]
+    return flattened, words
+
+
+def priced(text: str, expected):
+    return sum(
+        1 for item in segment_receipt(text) if item.name in expected and item.price is not None
+    )
+
+
+def main() -> None:
+    samples = json.loads(SAMPLES.read_text())
+    rng = random.Random(1)
+
+    for skew in SKEWS:
+        totals = {"expected": 0, "flat": 0, "rows": 0, "flat_tokens": 0, "rows_tokens": 0}
+        elapsed = 0.0
+        for sample in samples:
+            flattened, words = photographed(sample["text"], skew, rng)
+            started = time.perf_counter()
+            rows = layout_text(words)
+            elapsed += time.perf_counter() - started
+
+            expected = sample["items"]
+            totals["expected"] += len(expected)
+            totals["flat"] += priced(flattened, expected)
+            totals["rows"] += priced(rows, expected)
+            totals["flat_tokens"] += estimate_input_tokens(flattened)
+            totals["rows_tokens"] += estimate_input_tokens(compact_receipt_text(rows) or rows)
+
+        print(
+            f"skew {skew:4.2f}  items with their price "
+            f"{totals['flat']:2d} -> {totals['rows']:2d} of {totals['expected']}  "
+            f"tokens {totals['flat_tokens']:4d} -> {totals['rows_tokens']:4d}  "
+            f"layout {elapsed / len(samples) * 1000:.2f}ms per receipt"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Receipt text sent to the LLM with and without the line segmenter, over
+OCR text of the sample receipts in data/ (benchmarks/data/receipt_texts.json,
+transcribed line by line with the items each receipt actually lists).
+Reports estimated prompt tokens, item recall and lines kept that are not items.
+
+Run from backend/:  python -m benchmarks.bench_receipt_lines
+"""
+
+import json
+import time
+from pathlib import Path
+
+from app.services.llm.prompts import INGREDIENT_ANALYSIS_PROMPT_TEMPLATE
+from app.services.llm.token_budget import estimate_input_tokens
+from app.services.receipt_lines import item_table, segment_receipt
+
+SAMPLES = Path(__file__).parent / "data" / "receipt_texts.json"
+
+
+def prompt_tokens(receipt_text: str) -> int:
+    return estimate_input_tokens(
+        INGREDIENT_ANALYSIS_PROMPT_TEMPLATE.substitute(ingredients=receipt_text, today="2024-01-01")
+    )
+
+
+def main() -> None:
+    samples = json.loads(SAMPLES.read_text())
+    totals = {"raw": 0, "table": 0, "expected": 0, "found": 0, "extra": 0}
+
+    for sample in samples:
+        started = time.perf_counter()
+        items = segment_receipt(sample["text"])
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        table = item_table(items)
+
+        names = [item.name for item in items]
+        expected = sample["items"]
+        found = sum(1 for name in expected if name in names)
+        extra = sum(1 for name in names if name not in expected)
+        raw_tokens, table_tokens = prompt_tokens(sample["text"]), prompt_tokens(table)
+
+        totals["raw"] += raw_tokens
+        totals["table"] += table_tokens
+        totals["expected"] += len(expected)
+        totals["found"] += found
+        totals["extra"] += extra
+        print(
+            f"{sample['image']:14s} tokens {raw_tokens:4d} -> {table_tokens:4d}  "
+            f"items {found:2d}/{len(expected):2d}  extra {extra}  {elapsed_ms:.2f}ms"
+        )
+
+    print(
+        f"\nprompt tokens {totals['raw']} -> {totals['table']} "
+        f"({1 - totals['table'] / totals['raw']:.0%} fewer), "
+        f"item recall {totals['found'] / totals['expected']:.1%}, "
+        f"{totals['extra']} non-item lines kept"
+    )
+
+
+if __name__ == "__main__":
+    main()
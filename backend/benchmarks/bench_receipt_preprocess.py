@@ -0,0 +1,92 @@
+"""
+Receipt preprocessing against the sample photos in data/: bytes that
+would be sent to OCR and time spent preparing them. With an OCR engine
+available, OCR_ENGINE=local (needs easyocr) or Vision credentials
+(GOOGLE_APPLICATION_CREDENTIALS_BASE64 or GOOGLE_APPLICATION_CREDENTIALS),
+it also OCRs both versions and reports latency and how many of the full
+resolution read's tokens the preprocessed read recovers.
+
+Run from backend/:  python -m benchmarks.bench_receipt_preprocess [data_dir]
+"""
+
+import asyncio
+import os
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from app.services.receipt_image import prepare_receipt_image
+
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+_TOKEN = re.compile(r"[A-Za-z0-9$.]+")
+
+
+def token_recall(reference: str, candidate: str) -> float:
+    """Share of the reference's tokens found in the candidate, with multiplicity"""
+    expected = Counter(_TOKEN.findall(reference.upper()))
+    found = Counter(_TOKEN.findall(candidate.upper()))
+    total = sum(expected.values())
+    return sum((expected & found).values()) / total if total else 1.0
+
+
+def ocr_reader():
+    if os.getenv("OCR_ENGINE", "vision").lower() == "vision" and not (
+        os.getenv("GOOGLE_APPLICATION_CREDENTIALS_BASE64")
+        or os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+    ):
+        return None
+    from app.services.ocr import get_ocr_engine
+
+    engine = get_ocr_engine()
+    loop = asyncio.new_event_loop()
+
+    def read(content: bytes):
+        started = time.perf_counter()
+        result = loop.run_until_complete(engine.recognize(content))
+        return result.text, time.perf_counter() - started
+
+    return read
+
+
+def main(data_dir: Path) -> None:
+    read = ocr_reader()
+    if read is None:
+        print("No OCR engine available, reporting bytes and preprocessing time only\n")
+
+    totals = Counter()
+    for path in sorted(data_dir.iterdir()):
+        if not path.name.startswith("recei") or path.suffix.lower() not in (".jpg", ".jpeg"):
+            continue
+        content = path.read_bytes()
+        started = time.perf_counter()
+        prepared = prepare_receipt_image(content)
+        prep_ms = (time.perf_counter() - started) * 1000
+        totals["original"] += len(content)
+        totals["prepared"] += len(prepared.content)
+
+        line = (
+            f"{path.name:14s} {len(content) / 1024:7.0f}KB -> {len(prepared.content) / 1024:5.0f}KB "
+            f"{'x'.join(map(str, prepared.original_size)):>9s} -> "
+            f"{'x'.join(map(str, prepared.size)):9s} prep {prep_ms:5.0f}ms"
+        )
+        if read is not None:
+            full_text, full_s = read(content)
+            prep_text, prep_s = read(prepared.content)
+            recall = token_recall(full_text, prep_text)
+            totals["full_s"] += full_s
+            totals["prep_s"] += prep_s + prep_ms / 1000
+            line += f"  ocr {full_s:5.2f}s -> {prep_s:5.2f}s  token recall {recall:6.1%}"
+        print(line)
+
+    print(
+        f"\ntotal {totals['original'] / 1024:.0f}KB -> {totals['prepared'] / 1024:.0f}KB "
+        f"({totals['prepared'] / totals['original']:.0%} of the bytes)"
+    )
+    if read is not None:
+        print(f"ocr time {totals['full_s']:.2f}s -> {totals['prep_s']:.2f}s incl. preprocessing")
+
+
+if __name__ == "__main__":
+    main(Path(sys.argv[1]) if len(sys.argv) > 1 else DATA_DIR)
@@ -0,0 +1,66 @@
+"""
+Drive the LLM layer with the local provider: first with no simulated
+latency to measure our own per-call overhead, then at a given concurrency
+with simulated latency to see throughput and tail latency.
+
+Run from backend/:  python -m benchmarks.load_local_llm [requests] [concurrency]
+
+To load test the whole app instead, start it with LLM_PROVIDER=local
+(optionally LOCAL_LLM_LATENCY_MEDIAN_MS, LOCAL_LLM_ERROR_RATE) and point
+any HTTP load generator at it.
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+from app.models.pantry import ListOfPantryItemsCreate
+from app.models.recipes import ListOfRecipeData, RecipePreferences
+from app.services.llm.providers.local import LocalLLMService
+
+
+async def one(service: LocalLLMService, i: int) -> float:
+    started = time.perf_counter()
+    if i % 4 == 0:
+        await service.generate_recipes(
+            ListOfRecipeData,
+            [f"ingredient {i}"],
+            RecipePreferences(num_recipes=4),
+            use_cache=False,
+        )
+    else:
+        await service.parse_receipt_text(
+            ListOfPantryItemsCreate, f"ITEM {i} 1.99\nMILK 2.49", use_cache=False
+        )
+    return time.perf_counter() - started
+
+
+async def run(service: LocalLLMService, total: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(i: int) -> float:
+        async with semaphore:
+            return await one(service, i)
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(limited(i) for i in range(total)))
+    return sorted(latencies), time.perf_counter() - started
+
+
+async def main(total: int = 400, concurrency: int = 50):
+    idle = LocalLLMService(latency_median_ms=0, latency_per_unit_ms=0)
+    latencies, _ = await run(idle, total, 1)
+    print(f"overhead per call:  {statistics.mean(latencies) * 1000:.2f} ms "
+          f"(p95 {latencies[int(0.95 * total)] * 1000:.2f} ms)")
+
+    loaded = LocalLLMService(latency_median_ms=200, latency_sigma=0.3)
+    latencies, elapsed = await run(loaded, total, concurrency)
+    print(f"throughput:         {total / elapsed:.0f} req/s at concurrency {concurrency}")
+    print(f"latency p50/p95:    {statistics.median(latencies) * 1000:.0f} / "
+          f"{latencies[int(0.95 * total)] * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    asyncio.run(main(*args))
@@ -1,5 +1,23 @@
 import os
 import sys
+from unittest.mock import AsyncMock, patch
+
+import pytest
 
 # Add the project root directory to Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.llm.memory_cache import get_memory_cache  # noqa: E402
+
+
+@pytest.fixture
+def cache_crud():
+    """An empty in-memory LLM cache in front of a mocked database cache"""
+    get_memory_cache().clear()
+    with patch("app.services.llm.llm_cache.LLMCacheCRUD") as mock:
+        crud = mock.return_value
+        crud.get_entry = AsyncMock(return_value=None)
+        crud.upsert_entry = AsyncMock()
+        crud.delete_expired = AsyncMock(return_value=0)
+        yield crud
+    get_memory_cache().clear()
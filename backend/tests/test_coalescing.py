@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+from app.models.pantry import ListOfPantryItemsCreate
+from app.services.llm.base import BaseLLMService
+from app.services.llm.coalescing import SingleFlight
+
+
+class SlowLLMService(BaseLLMService):
+    """Provider stub that takes a while and counts its calls"""
+
+    def __init__(self, delay: float = 0.05, error: Exception = None):
+        super().__init__()
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def _generate_response(self, prompt, response_model, system_prompt=None, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return response_model(items=[])
+
+
+pytestmark = pytest.mark.usefixtures("cache_crud")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_make_one_provider_call(cache_crud):
+    service = SlowLLMService()
+
+    results = await asyncio.gather(
+        *[service.generate("same prompt", ListOfPantryItemsCreate) for _ in range(10)]
+    )
+
+    assert service.calls == 1
+    assert cache_crud.get_entry.await_count == 1
+    assert all(result == ListOfPantryItemsCreate(items=[]) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_different_prompts_are_not_coalesced():
+    service = SlowLLMService()
+
+    await asyncio.gather(
+        service.generate("prompt a", ListOfPantryItemsCreate),
+        service.generate("prompt b", ListOfPantryItemsCreate),
+    )
+
+    assert service.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_waiter_and_release_the_key():
+    service = SlowLLMService(error=RuntimeError("overloaded"))
+
+    results = await asyncio.gather(
+        *[service.generate("prompt", ListOfPantryItemsCreate) for _ in range(5)],
+        return_exceptions=True,
+    )
+
+    assert service.calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    # The failed flight is gone, so the next call goes to the provider again
+    service.error = None
+    await service.generate("prompt", ListOfPantryItemsCreate)
+    assert service.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_shared_call():
+    flight = SingleFlight()
+    started = asyncio.Event()
+
+    async def work():
+        started.set()
+        await asyncio.sleep(0.05)
+        return "done"
+
+    first = asyncio.create_task(flight.do("key", work))
+    second = asyncio.create_task(flight.do("key", work))
+    await started.wait()
+
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+    assert await second == "done"
+    assert flight.executions == 1
+    assert flight.coalesced == 1
+    assert "key" not in flight
@@ -0,0 +1,125 @@
+import asyncio
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from app.models.pantry import (
+    ListOfPantryItemsCreate,
+    Nutrition,
+    PantryItemCreate,
+    PantryItemData,
+)
+from app.services.enrichment import EnrichmentBatcher
+
+
+def make_item(name: str, original_name: str = None) -> PantryItemCreate:
+    return PantryItemCreate(
+        data=PantryItemData(
+            name=name, original_name=original_name or name, category="dairy", notes=None
+        ),
+        nutrition=Nutrition(calories=42),
+    )
+
+
+def make_batcher(window: float = 0.01, max_batch_size: int = 20):
+    claude = MagicMock()
+    claude.parse_ingredient_batch = AsyncMock(
+        side_effect=lambda model, texts: ListOfPantryItemsCreate(
+            items=[make_item(text) for text in texts]
+        )
+    )
+    claude.parse_ingredient_text = AsyncMock(
+        side_effect=lambda model, text, user_id=None: make_item(text)
+    )
+    pantry = MagicMock()
+    pantry.update_item = AsyncMock()
+    return EnrichmentBatcher(claude, pantry, window, max_batch_size), claude, pantry
+
+
+@pytest.mark.asyncio
+async def test_items_within_window_share_one_request():
+    batcher, claude, pantry = make_batcher()
+    user_a, user_b = uuid.uuid4(), uuid.uuid4()
+    item_ids = [uuid.uuid4() for _ in range(5)]
+
+    futures = [
+        batcher.submit(item_id, f"item {i}", user_a if i % 2 else user_b)
+        for i, item_id in enumerate(item_ids)
+    ]
+    results = await asyncio.gather(*futures)
+
+    claude.parse_ingredient_batch.assert_awaited_once()
+    claude.parse_ingredient_text.assert_not_awaited()
+    assert [r.data.name for r in results] == [f"item {i}" for i in range(5)]
+    stored = {call.args[0]: call.args[1] for call in pantry.update_item.await_args_list}
+    assert set(stored) == set(item_ids)
+    assert stored[item_ids[3]].data.name == "item 3"
+
+    await batcher.drain()
+    assert batcher.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_without_waiting():
+    batcher, claude, _ = make_batcher(window=60, max_batch_size=3)
+
+    futures = [batcher.submit(uuid.uuid4(), f"item {i}", uuid.uuid4()) for i in range(3)]
+    await asyncio.wait_for(asyncio.gather(*futures), timeout=1)
+
+    claude.parse_ingredient_batch.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_mismatched_batch_falls_back_to_single_requests():
+    batcher, claude, pantry = make_batcher()
+    claude.parse_ingredient_batch = AsyncMock(
+        return_value=ListOfPantryItemsCreate(items=[make_item("only one")])
+    )
+
+    futures = [batcher.submit(uuid.uuid4(), f"item {i}", uuid.uuid4()) for i in range(3)]
+    await asyncio.gather(*futures)
+
+    assert claude.parse_ingredient_text.await_count == 3
+    assert pantry.update_item.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_batch_results_are_matched_on_name_not_position():
+    batcher, claude, pantry = make_batcher()
+    claude.parse_ingredient_batch = AsyncMock(
+        return_value=ListOfPantryItemsCreate(
+            items=[
+                make_item("egg", original_name="Eggs"),
+                make_item("bread", original_name="??"),
+                make_item("milk", original_name="whole  milk"),
+            ]
+        )
+    )
+    user_id = uuid.uuid4()
+    milk, bread, eggs = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+    await asyncio.gather(
+        batcher.submit(milk, "name: Whole Milk quantity: 1", user_id, name="Whole Milk"),
+        batcher.submit(bread, "name: bread quantity: 1", user_id, name="bread"),
+        batcher.submit(eggs, "name: eggs quantity: 12", user_id, name="eggs"),
+    )
+
+    stored = {call.args[0]: call.args[1] for call in pantry.update_item.await_args_list}
+    assert stored[milk].data.name == "milk"
+    assert stored[eggs].data.name == "egg"
+    # The unmatched one is asked for on its own, as its user
+    claude.parse_ingredient_text.assert_awaited_once_with(
+        PantryItemCreate, "name: bread quantity: 1", user_id=user_id
+    )
+
+
+@pytest.mark.asyncio
+async def test_single_requests_carry_the_user():
+    batcher, claude, _ = make_batcher()
+    user_id = uuid.uuid4()
+
+    await batcher.submit(uuid.uuid4(), "item 0", user_id)
+
+    claude.parse_ingredient_text.assert_awaited_once_with(
+        PantryItemCreate, "item 0", user_id=user_id
+    )
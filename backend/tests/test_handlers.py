@@ -0,0 +1,97 @@
+import json
+import time
+
+import pytest
+from app.models.pantry import ListOfPantryItemsCreate, PantryItemCreate
+from app.models.recipes import ListOfRecipeData
+from app.services.llm.providers.claude.handlers import (
+    extract_json,
+    parse_claude_response,
+)
+
+
+def make_item(name: str) -> dict:
+    return {
+        "data": {"name": name, "quantity": 1, "unit": "units", "category": "produce", "notes": "🍎"},
+        "nutrition": {"calories": 52},
+    }
+
+
+def make_recipe(name: str) -> dict:
+    return {
+        "name": name,
+        "ingredients": [{"name": "rice", "quantity": 200, "unit": "grams"}],
+        "instructions": ["Rinse {the} rice", "Cook it"],
+        "preparation_time": 20,
+        "category": "Dinner",
+    }
+
+
+def test_parses_object_wrapped_in_prose():
+    content = "Here you go:\n" + json.dumps({"items": [make_item("apple")]}) + "\nEnjoy!"
+    result = parse_claude_response(content, ListOfPantryItemsCreate)
+    assert result.items[0].data.name == "apple"
+
+
+def test_skips_stray_braces_in_prose():
+    content = (
+        "I used the {name} placeholder and a [note] before the data: "
+        + json.dumps({"items": [make_item("pear")]})
+        + " (values are estimates}"
+    )
+    result, report = extract_json(content, ListOfPantryItemsCreate)
+    assert result.items[0].data.name == "pear"
+    assert report.skipped_candidates == 2
+
+
+def test_unclosed_stray_brace_before_payload():
+    content = "Use { to start an object: " + json.dumps({"items": [make_item("fig")]})
+    result, report = extract_json(content, ListOfPantryItemsCreate)
+    assert result.items[0].data.name == "fig"
+    assert not report.truncated
+
+
+def test_many_stray_brackets_are_scanned_once():
+    content = "{ [" * 20000 + json.dumps({"items": [make_item("plum")]})
+    started = time.perf_counter()
+    result, _ = extract_json(content, ListOfPantryItemsCreate)
+    assert result.items[0].data.name == "plum"
+    assert time.perf_counter() - started < 2
+
+
+def test_bare_list_is_wrapped_for_list_models():
+    content = json.dumps([make_item("kiwi"), make_item("lime")])
+    result = parse_claude_response(content, ListOfPantryItemsCreate)
+    assert [i.data.name for i in result.items] == ["kiwi", "lime"]
+
+
+def test_bare_list_of_single_models_returns_list():
+    content = json.dumps([make_item("kiwi")])
+    result = parse_claude_response(content, PantryItemCreate)
+    assert isinstance(result, list) and result[0].data.name == "kiwi"
+
+
+def test_truncated_list_salvages_complete_elements():
+    full = json.dumps({"recipes": [make_recipe(f"dish {i}") for i in range(4)]})
+    truncated = full[: full.index("dish 3") + 20]
+
+    result, report = extract_json(truncated, ListOfRecipeData)
+
+    assert [r.name for r in result.recipes] == ["dish 0", "dish 1", "dish 2"]
+    assert report.truncated
+    assert report.salvaged == 3
+    assert report.dropped == 1
+
+
+def test_invalid_elements_are_dropped_not_fatal():
+    recipes = [make_recipe("good"), {"name": "missing everything"}, make_recipe("also good")]
+    result, report = extract_json(json.dumps({"recipes": recipes}), ListOfRecipeData)
+
+    assert [r.name for r in result.recipes] == ["good", "also good"]
+    assert not report.truncated
+    assert report.dropped == 1
+
+
+def test_no_json_raises_value_error():
+    with pytest.raises(ValueError, match="No valid JSON"):
+        parse_claude_response("Sorry, I can't help with {that}.", ListOfPantryItemsCreate)
@@ -0,0 +1,123 @@
+import asyncio
+import uuid
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from app.models.pantry import Nutrition, PantryItemCreate, PantryItemData
+from app.services.ingredient_kb import IngredientKnowledgeBase, normalize_name
+from app.services.pantry import PantryManager
+
+
+def enriched(name: str, original_name: str = None, **data) -> PantryItemCreate:
+    data.setdefault("category", "dairy")
+    data.setdefault("notes", "🥛 keep refrigerated")
+    data.setdefault("expiry_date", "2024-01-08")
+    return PantryItemCreate(
+        data=PantryItemData(name=name, original_name=original_name, unit="l", **data),
+        nutrition=Nutrition(standard_unit="100 ml", calories=64, protein=3.4),
+    )
+
+
+def raw(name: str) -> PantryItemCreate:
+    return PantryItemCreate(
+        data=PantryItemData(name=name, quantity=2, unit="l", category=None, notes=None)
+    )
+
+
+def make_kb() -> IngredientKnowledgeBase:
+    kb = IngredientKnowledgeBase()
+    kb.learn(enriched("milk", original_name="Whole Milk 2L"), learned_on=date(2024, 1, 1))
+    kb.learn(enriched("tomato", category="produce", notes="🍅"), learned_on=date(2024, 1, 1))
+    return kb
+
+
+def test_normalize_name():
+    assert normalize_name("Tomatoes!") == "tomato"
+    assert normalize_name("  Cherries 500g") == "cherry g"
+    assert normalize_name("Swiss cheese") == "swiss cheese"
+
+
+def test_exact_alias_and_fuzzy_matches():
+    kb = make_kb()
+    assert kb.lookup("Milk").name == "milk"
+    assert kb.lookup("whole milk 2l").name == "milk"
+    assert kb.lookup("tomatos").name == "tomato"
+    assert kb.lookup("peanut butter") is None
+    assert (kb.hits, kb.misses) == (3, 1)
+
+
+def test_enrich_fills_facts_but_keeps_user_quantity_and_unit():
+    item = make_kb().enrich(raw("Tomatoes"), today=date(2024, 3, 1))
+    assert item.data.name == "tomato"
+    assert item.data.original_name == "Tomatoes"
+    assert (item.data.quantity, item.data.unit) == (2, "l")
+    assert item.data.category == "produce"
+    assert item.data.notes == "🍅"
+    # Shelf life learned as 7 days from the enrichment date
+    assert item.data.expiry_date == "2024-03-08"
+    assert item.nutrition.calories == 64
+
+
+def test_items_without_nutrition_are_not_learned():
+    kb = IngredientKnowledgeBase()
+    assert not kb.learn(raw("milk"))
+    assert len(kb) == 0
+
+
+@pytest.mark.asyncio
+async def test_warm_learns_only_from_cached_enrichment_responses():
+    cache = MagicMock()
+    cache.get_recent_entries = AsyncMock(
+        return_value=[
+            {
+                "response": {"items": [enriched("bread").model_dump(), {"data": None}]},
+                "created_at": "2024-01-02T09:00:00+00:00",
+            },
+            {
+                "response": enriched("milk").model_dump(),
+                "created_at": "2024-01-01T12:30:00.123+00:00",
+            },
+        ]
+    )
+    kb = IngredientKnowledgeBase()
+    assert await kb.warm(cache) == 2
+
+    cache.get_recent_entries.assert_awaited_once()
+    request_types, _ = cache.get_recent_entries.await_args.args
+    assert set(request_types) == {"ingredient_analysis", "ingredient_batch_analysis"}
+    assert kb.lookup("milk").shelf_life_days == 7
+    assert kb.lookup("bread").shelf_life_days == 6
+
+
+@pytest.mark.asyncio
+async def test_pantry_manager_skips_llm_for_known_items_and_learns_new_ones():
+    manager = PantryManager()
+    manager.knowledge = make_kb()
+    manager.pantry = MagicMock()
+    manager.pantry.create_item = AsyncMock(
+        side_effect=lambda user_id, item: MagicMock(id=uuid.uuid4(), item=item)
+    )
+    manager.jobs = MagicMock()
+    manager.jobs.submit = AsyncMock()
+    future = asyncio.get_running_loop().create_future()
+    manager.enrichment = MagicMock()
+    manager.enrichment.submit = MagicMock(return_value=future)
+
+    known = await manager.add_single_item(raw("milk"), uuid.uuid4())
+    assert known.item.nutrition.calories == 64
+    manager.jobs.submit.assert_not_called()
+
+    user_id = uuid.uuid4()
+    added = await manager.add_single_item(raw("oat milk"), user_id)
+    manager.jobs.submit.assert_called_once()
+    kind, payload = manager.jobs.submit.call_args.args
+    assert kind == "enrich_pantry_item"
+    assert manager.jobs.submit.call_args.kwargs["dedupe_key"] == f"enrich:{added.id}"
+
+    future.set_result(enriched("oat milk", category="dairy alternative"))
+    await manager._run_enrichment_job(payload)
+    manager.enrichment.submit.assert_called_once_with(
+        added.id, payload["text"], user_id, name="oat milk"
+    )
+    assert manager.knowledge.lookup("Oat Milk").category == "dairy alternative"
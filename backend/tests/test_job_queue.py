@@ -0,0 +1,178 @@
+import asyncio
+import time
+
+import pytest
+from app.services import job_queue
+from app.services.job_queue import FAILED, PENDING, RUNNING, JobQueue, JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.sqlite3"))
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(job_queue, "BACKOFF_BASE", 0.0)
+
+
+async def wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_unfinished_jobs_are_deduplicated(store):
+    first = store.enqueue("enrich", {"n": 1}, dedupe_key="enrich:1")
+    assert first is not None
+    assert store.enqueue("enrich", {"n": 2}, dedupe_key="enrich:1") is None
+    assert store.enqueue("enrich", {"n": 3}, dedupe_key="enrich:2") is not None
+
+    [job] = store.claim(["enrich"], 1)
+    assert store.enqueue("enrich", {}, dedupe_key="enrich:1") is None
+    store.complete(job.id)
+    assert store.enqueue("enrich", {}, dedupe_key="enrich:1") is not None
+
+
+def test_expired_leases_are_reclaimed(store):
+    store.enqueue("enrich", {"n": 1})
+    [job] = store.claim(["enrich"], 10, lease=-1)
+    assert job.attempts == 1
+    assert store.counts()[RUNNING] == 1
+
+    # The worker holding it is gone, another one picks it up
+    [again] = store.claim(["enrich"], 10)
+    assert again.id == job.id
+    assert again.attempts == 2
+    assert store.claim(["enrich"], 10) == []
+
+
+def test_jobs_survive_a_new_store(store):
+    store.enqueue("enrich", {"item_id": "abc"})
+    [job] = JobStore(store.path).claim(["enrich"], 10)
+    assert job.payload == {"item_id": "abc"}
+
+
+@pytest.mark.asyncio
+async def test_failed_jobs_are_retried_until_they_succeed(store):
+    calls = []
+
+    async def flaky(payload):
+        calls.append(payload)
+        if len(calls) < 3:
+            raise RuntimeError("provider unavailable")
+
+    queue = JobQueue(store, poll_interval=0.01)
+    queue.register("enrich", flaky)
+    await queue.start()
+    await queue.submit("enrich", {"n": 1})
+    await wait_for(lambda: queue.completed == 1)
+    await queue.drain()
+
+    assert len(calls) == 3
+    assert queue.retried == 2
+    assert store.counts() == {PENDING: 0, RUNNING: 0, FAILED: 0}
+
+
+@pytest.mark.asyncio
+async def test_jobs_fail_after_max_attempts(store):
+    async def broken(payload):
+        raise ValueError("bad input")
+
+    queue = JobQueue(store, poll_interval=0.01)
+    queue.register("enrich", broken, max_attempts=2)
+    await queue.start()
+    await queue.submit("enrich", {"n": 1})
+    await wait_for(lambda: queue.failed == 1)
+    await queue.drain()
+
+    assert queue.retried == 1
+    assert store.counts()[FAILED] == 1
+
+
+@pytest.mark.asyncio
+async def test_retries_wait_out_the_handlers_min_backoff(store):
+    async def unparseable(payload):
+        raise ValueError("could not parse response")
+
+    queue = JobQueue(store, poll_interval=0.01)
+    queue.register("enrich", unparseable, min_backoff=60)
+    await queue.start()
+    await queue.submit("enrich", {"n": 1})
+    await wait_for(lambda: queue.retried == 1)
+    await queue.drain()
+
+    # Not due again until a cached failure would have expired
+    assert store.claim(["enrich"], 1) == []
+    [(run_at,)] = store._connect().execute("SELECT run_at FROM jobs").fetchall()
+    assert run_at >= time.time() + 59
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded(store):
+    running = 0
+    peak = 0
+
+    async def slow(payload):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+
+    queue = JobQueue(store, concurrency=3, poll_interval=0.01)
+    queue.register("enrich", slow)
+    await queue.start()
+    for i in range(10):
+        await queue.submit("enrich", {"n": i})
+    await wait_for(lambda: queue.completed == 10)
+    await queue.drain()
+
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_drain_hands_back_unfinished_jobs(store):
+    started = asyncio.Event()
+
+    async def stuck(payload):
+        started.set()
+        await asyncio.sleep(60)
+
+    queue = JobQueue(store, poll_interval=0.01)
+    queue.register("enrich", stuck)
+    await queue.start()
+    await queue.submit("enrich", {"n": 1})
+    await started.wait()
+    await queue.drain(timeout=0.05)
+
+    assert queue.in_flight == 0
+    assert store.counts()[PENDING] == 1
+    [job] = store.claim(["enrich"], 1)
+    assert job.attempts == 1
+
+
+@pytest.mark.asyncio
+async def test_running_jobs_keep_their_lease(store):
+    finish = asyncio.Event()
+    runs = []
+
+    async def slow(payload):
+        runs.append(payload)
+        await finish.wait()
+
+    queue = JobQueue(store, poll_interval=0.01, lease=0.1)
+    queue.register("enrich", slow)
+    await queue.start()
+    await queue.submit("enrich", {"n": 1})
+    await wait_for(lambda: queue.in_flight == 1)
+
+    # Well past the first lease, neither this worker nor another takes it again
+    await asyncio.sleep(0.3)
+    assert store.claim(["enrich"], 10) == []
+    assert len(runs) == 1
+
+    finish.set()
+    await wait_for(lambda: store.counts()[RUNNING] == 0)
+    await queue.drain()
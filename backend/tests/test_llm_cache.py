@@ -0,0 +1,101 @@
+from unittest.mock import AsyncMock
+
+import pytest
+from app.models.pantry import ListOfPantryItemsCreate, PantryItemCreate
+from app.services.llm.base import BaseLLMService
+from app.services.llm.llm_cache import LLMCache, make_cache_key
+from app.services.llm.memory_cache import MemoryCache, get_memory_cache
+
+
+class FakeLLMService(BaseLLMService):
+    model_version = "fake-1"
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+        self._generate_response = AsyncMock(return_value=response)
+
+    async def _generate_response(self, prompt, response_model, system_prompt=None, **kwargs):
+        raise NotImplementedError
+
+
+def test_cache_key_is_stable_and_content_addressed():
+    key = make_cache_key("prompt", "system", ListOfPantryItemsCreate, "v1")
+    assert key == make_cache_key("prompt", "system", ListOfPantryItemsCreate, "v1")
+    assert key != make_cache_key("prompt", "system", ListOfPantryItemsCreate, "v2")
+    assert key != make_cache_key("prompt", None, ListOfPantryItemsCreate, "v1")
+    assert key != make_cache_key("prompt", "system", PantryItemCreate, "v1")
+
+
+@pytest.mark.asyncio
+async def test_generate_miss_then_hit(cache_crud):
+    response = ListOfPantryItemsCreate(items=[])
+    service = FakeLLMService(response)
+    metadata = {"type": "receipt_analysis"}
+
+    first = await service.generate(
+        "prompt", ListOfPantryItemsCreate, metadata=metadata
+    )
+    assert first == response
+    service._generate_response.assert_awaited_once()
+    upsert = cache_crud.upsert_entry.await_args.kwargs
+    assert upsert["request_type"] == "receipt_analysis"
+
+    # Served from the in-process tier without touching the database
+    second = await service.generate(
+        "prompt", ListOfPantryItemsCreate, metadata=metadata
+    )
+    assert second == response
+    cache_crud.get_entry.assert_awaited_once()
+    assert service.cache.stats.hits["receipt_analysis"] == 1
+
+    get_memory_cache().clear()
+    cache_crud.get_entry.return_value = {"response": upsert["response"]}
+    third = await service.generate(
+        "prompt", ListOfPantryItemsCreate, metadata=metadata
+    )
+    assert third == response
+    service._generate_response.assert_awaited_once()
+    assert service.cache.stats.hits["receipt_analysis"] == 2
+    assert service.cache.stats.misses["receipt_analysis"] == 1
+    assert service.cache.stats.hit_rate() == pytest.approx(2 / 3)
+
+
+@pytest.mark.asyncio
+async def test_eviction_is_throttled(cache_crud):
+    cache = LLMCache()
+    await cache.cache_response("a", {"items": []})
+    await cache.cache_response("b", {"items": []})
+    assert cache_crud.delete_expired.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_parse_failures_are_negatively_cached(cache_crud):
+    service = FakeLLMService(None)
+    service._generate_response.side_effect = ValueError("No valid JSON found")
+
+    for _ in range(2):
+        with pytest.raises(ValueError, match="No valid JSON"):
+            await service.generate("prompt", ListOfPantryItemsCreate)
+    service._generate_response.assert_awaited_once()
+
+
+def test_memory_cache_evicts_least_recently_used_by_bytes():
+    cache = MemoryCache(max_bytes=40)
+    cache.set("a", {"v": "x" * 10}, ttl=60)
+    cache.set("b", {"v": "y" * 10}, ttl=60)
+    assert cache.get("a") is not None  # "a" becomes most recently used
+
+    cache.set("c", {"v": "z" * 10}, ttl=60)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.evictions == 1
+    assert cache.current_bytes <= cache.max_bytes
+
+
+def test_memory_cache_expires_entries():
+    cache = MemoryCache()
+    cache.set("a", {"v": 1}, ttl=-1)
+    assert cache.get("a") is None
+    assert cache.stats()["misses"] == 1
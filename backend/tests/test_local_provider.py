@@ -0,0 +1,82 @@
+from unittest.mock import patch
+
+import pytest
+from app.models.pantry import ListOfPantryItemsCreate, PantryItemCreate
+from app.models.recipes import ListOfRecipeData, RecipePreferences
+from app.services.llm.providers import get_llm_service
+from app.services.llm.providers.local import LocalLLMService
+from app.services.llm.resilience import ResiliencePolicy
+
+
+pytestmark = pytest.mark.usefixtures("cache_crud")
+
+
+def make_service(**kwargs) -> LocalLLMService:
+    kwargs.setdefault("latency_median_ms", 1)
+    kwargs.setdefault("latency_per_unit_ms", 0)
+    return LocalLLMService(**kwargs)
+
+
+@pytest.mark.asyncio
+async def test_responses_are_schema_valid_and_sized_by_request():
+    service = make_service()
+    recipes = await service.generate_recipes(
+        ListOfRecipeData, ["rice", "egg"], RecipePreferences(num_recipes=4), use_cache=False
+    )
+    items = await service.parse_ingredient_batch(
+        ListOfPantryItemsCreate, ["2 apples", "1l milk", "rice"], use_cache=False
+    )
+    item = await service.parse_ingredient_text(PantryItemCreate, "2 apples", use_cache=False)
+
+    assert len(recipes.recipes) == 4
+    assert len(items.items) == 3
+    assert isinstance(item, PantryItemCreate)
+
+
+@pytest.mark.asyncio
+async def test_same_seed_and_prompt_give_same_response():
+    first = await make_service(seed=7).parse_receipt_text(
+        ListOfPantryItemsCreate, "MILK 2.49\nEGGS 3.99", use_cache=False
+    )
+    again = await make_service(seed=7).parse_receipt_text(
+        ListOfPantryItemsCreate, "MILK 2.49\nEGGS 3.99", use_cache=False
+    )
+    other = await make_service(seed=8).parse_receipt_text(
+        ListOfPantryItemsCreate, "MILK 2.49\nEGGS 3.99", use_cache=False
+    )
+    assert first == again
+    assert first != other
+
+
+@pytest.mark.asyncio
+async def test_injected_errors_are_retried_by_the_resilience_layer():
+    service = make_service(error_rate=0.5, seed=3)
+    service.resilience = ResiliencePolicy(
+        service.is_retryable, max_attempts=10, hedged_request_types=set()
+    )
+    with patch("app.services.llm.resilience.BACKOFF_BASE", 0.0001):
+        for i in range(5):
+            await service.parse_ingredient_text(PantryItemCreate, f"item {i}", use_cache=False)
+
+    assert service.failures > 0
+    assert service.calls == 5 + service.failures
+
+
+@pytest.mark.asyncio
+async def test_streams_recipes():
+    service = make_service()
+    recipes = [
+        recipe
+        async for recipe in service.stream_recipes(
+            ListOfRecipeData, ["rice"], RecipePreferences(num_recipes=3), use_cache=False
+        )
+    ]
+    assert len(recipes) == 3
+
+
+def test_provider_is_selected_by_config(monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER", "local")
+    assert isinstance(get_llm_service(), LocalLLMService)
+    monkeypatch.setenv("LLM_PROVIDER", "nope")
+    with pytest.raises(ValueError):
+        get_llm_service()
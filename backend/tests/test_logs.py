@@ -0,0 +1,107 @@
+import logging
+import threading
+
+import pytest
+from app.logs import (
+    DeferredQueueHandler,
+    SAMPLE_RATES,
+    LazyPayload,
+    SamplingFilter,
+    StructuredFormatter,
+    configure_logging,
+    log_extra,
+    parse_sample_rates,
+)
+
+
+class CountingPayload:
+    """Counts renders on the log listener thread, pytest renders on its own"""
+
+    def __init__(self):
+        self.renders = 0
+
+    def __str__(self):
+        if threading.current_thread() is not threading.main_thread():
+            self.renders += 1
+        return "payload"
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+        self.setFormatter(StructuredFormatter("%(levelname)s %(message)s"))
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+
+@pytest.fixture
+def captured():
+    handler = ListHandler()
+    listener = configure_logging("INFO", handlers=[handler])
+    yield handler, listener, logging.getLogger("tests.logs")
+    configure_logging()
+
+
+def test_lazy_payload_truncates_and_serializes():
+    assert str(LazyPayload("x" * 10, limit=4)) == "xxxx... [6 more chars]"
+    assert str(LazyPayload({"a": [1, 2]})) == '{"a": [1, 2]}'
+
+
+def test_payload_is_not_rendered_when_level_or_sampling_drops_it(captured, monkeypatch):
+    monkeypatch.setitem(SAMPLE_RATES, "muted", 0.0)
+    handler, listener, logger = captured
+    payload = CountingPayload()
+
+    logger.debug("Prompt: %s", LazyPayload(payload))
+    logger.info("Prompt: %s", LazyPayload(payload), extra=log_extra("muted"))
+    listener.stop()
+
+    assert payload.renders == 0
+    assert handler.lines == []
+
+
+def test_records_are_rendered_on_the_listener_with_fields(captured):
+    handler, listener, logger = captured
+    payload = CountingPayload()
+    logger.info(
+        "Claude request %s",
+        LazyPayload(payload),
+        extra=log_extra("llm.request", request_type="recipe_generation", max_tokens=900),
+    )
+    listener.stop()
+
+    assert handler.lines == [
+        "INFO Claude request payload | request_type=recipe_generation max_tokens=900"
+    ]
+    assert payload.renders == 1
+
+
+def test_deferred_handler_renders_other_arguments_eagerly():
+    handler = DeferredQueueHandler(None)
+    record = logging.LogRecord("x", logging.INFO, __file__, 1, "%s %s", ({"a": 1}, 2), None)
+    prepared = handler.prepare(record)
+    assert prepared.getMessage() == "{'a': 1} 2"
+
+    lazy = LazyPayload(CountingPayload())
+    record = logging.LogRecord("x", logging.INFO, __file__, 1, "%s", (lazy,), None)
+    assert handler.prepare(record).args == (lazy,)
+
+
+def test_sampling_filter_rates():
+    sampler = SamplingFilter({"noisy": 0.0, "kept": 1.0})
+
+    def record(category):
+        r = logging.LogRecord("x", logging.INFO, __file__, 1, "m", (), None)
+        if category:
+            r.category = category
+        return r
+
+    assert not sampler.filter(record("noisy"))
+    assert sampler.filter(record("kept"))
+    assert sampler.filter(record(None))
+    assert parse_sample_rates("llm.prompt=0.1, http.request=0") == {
+        "llm.prompt": 0.1,
+        "http.request": 0.0,
+    }
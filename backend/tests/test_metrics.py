@@ -0,0 +1,112 @@
+from types import SimpleNamespace
+
+import pytest
+from app.db.crud import BaseCRUD
+from app.main import app
+from app.models.pantry import PantryItemCreate
+from app.services.llm.providers.local import LocalLLMService
+from app.services.llm.resilience import LLMUnavailableError, ResiliencePolicy
+from app.services.llm.usage import TokenUsage
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+client = TestClient(app)
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_metrics_endpoint_reports_route_latency():
+    before = sample(
+        "http_request_duration_seconds_count", method="GET", route="/health", status="200"
+    )
+    client.get("/health")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "enrichments_in_flight" in response.text
+    assert (
+        sample(
+            "http_request_duration_seconds_count",
+            method="GET",
+            route="/health",
+            status="200",
+        )
+        == before + 1
+    )
+
+
+@pytest.mark.asyncio
+async def test_crud_subclasses_are_timed_automatically():
+    class WidgetCRUD(BaseCRUD):
+        async def get_widget(self, fail: bool = False):
+            if fail:
+                raise RuntimeError("boom")
+            return "widget"
+
+        async def _private(self):
+            return "not timed"
+
+    crud = WidgetCRUD.__new__(WidgetCRUD)
+    assert await crud.get_widget() == "widget"
+    with pytest.raises(RuntimeError):
+        await crud.get_widget(fail=True)
+
+    labels = dict(crud="WidgetCRUD", method="get_widget")
+    assert sample("db_query_duration_seconds_count", **labels) == 2
+    assert sample("db_query_errors_total", **labels) == 1
+    assert sample("db_query_duration_seconds_count", crud="WidgetCRUD", method="_private") == 0
+
+
+@pytest.mark.asyncio
+async def test_llm_latency_outcome_and_cache_lookups(cache_crud):
+    service = LocalLLMService(latency_median_ms=1, latency_per_unit_ms=0)
+    labels = dict(provider="LocalLLMService", request_type="ingredient_analysis")
+    ok_before = sample("llm_request_duration_seconds_count", outcome="ok", **labels)
+    hits_before = sample(
+        "llm_cache_lookups_total",
+        request_type="ingredient_analysis",
+        tier="memory",
+        result="hit",
+    )
+
+    await service.parse_ingredient_text(PantryItemCreate, "metrics milk")
+    await service.parse_ingredient_text(PantryItemCreate, "metrics milk")
+
+    assert sample("llm_request_duration_seconds_count", outcome="ok", **labels) == ok_before + 1
+    assert (
+        sample(
+            "llm_cache_lookups_total",
+            request_type="ingredient_analysis",
+            tier="memory",
+            result="hit",
+        )
+        == hits_before + 1
+    )
+
+    failing = LocalLLMService(latency_median_ms=1, latency_per_unit_ms=0, error_rate=1)
+    failing.resilience = ResiliencePolicy(failing.is_retryable, max_attempts=1)
+    errors_before = sample("llm_request_duration_seconds_count", outcome="error", **labels)
+    with pytest.raises(LLMUnavailableError):
+        await failing.parse_ingredient_text(PantryItemCreate, "eggs", use_cache=False)
+    assert (
+        sample("llm_request_duration_seconds_count", outcome="error", **labels)
+        == errors_before + 1
+    )
+
+
+def test_token_usage_is_exported():
+    before = sample("llm_tokens_total", request_type="metrics_test", kind="cache_read")
+    TokenUsage().record(
+        "metrics_test",
+        SimpleNamespace(
+            input_tokens=10,
+            cache_creation_input_tokens=0,
+            cache_read_input_tokens=900,
+            output_tokens=50,
+        ),
+    )
+    assert sample("llm_tokens_total", request_type="metrics_test", kind="cache_read") == before + 900
+    assert sample("llm_tokens_total", request_type="metrics_test", kind="output") >= 50
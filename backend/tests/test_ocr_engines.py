@@ -0,0 +1,94 @@
+import asyncio
+import os
+from types import SimpleNamespace
+
+import pytest
+from app.services.ocr.local import LocalEngine, local_result
+from app.services.ocr.vision import vision_result
+
+_loads = 0
+
+
+class FakeReader:
+    """Stands in for easyocr.Reader, reports which process read and how often it loaded"""
+
+    def __init__(self, languages):
+        global _loads
+        _loads += 1
+        self.languages = languages
+
+    def readtext(self, content):
+        return [
+            ([[0, 0], [100, 0], [100, 20], [0, 20]], content.decode(), 0.9),
+            ([[300, 2], [360, 2], [360, 22], [300, 22]], f"{os.getpid()}:{_loads}", 0.8),
+        ]
+
+
+def test_local_result_groups_fragments_into_lines():
+    corners = lambda x, y: [(x, y), (x + 50, y), (x + 50, y + 20), (x, y + 20)]
+    result = local_result(
+        [
+            (corners(300, 42), "1.99", 0.9),
+            (corners(0, 0), "MILK", 0.9),
+            (corners(0, 40), "BREAD", 0.7),
+            (corners(300, 3), "2.49", 0.9),
+        ]
+    )
+    assert result.text == "MILK 2.49\nBREAD 1.99"
+    assert result.words[0].box == (300, 42, 350, 62)
+    assert result.confidence == pytest.approx(0.85)
+
+
+@pytest.mark.asyncio
+async def test_local_engine_loads_the_model_once_per_worker():
+    engine = LocalEngine(workers=2, languages=["en"], reader_factory=FakeReader)
+    try:
+        results = await asyncio.gather(
+            *[engine.recognize(f"ITEM{i}".encode()) for i in range(8)]
+        )
+    finally:
+        engine.close()
+
+    assert [r.text.split()[0] for r in results] == [f"ITEM{i}" for i in range(8)]
+    workers = {r.text.split()[1] for r in results}
+    assert 1 <= len(workers) <= 2
+    assert all(worker.endswith(":1") for worker in workers)
+
+
+def test_vision_result_keeps_words_and_boxes():
+    def word(text, x):
+        vertices = [SimpleNamespace(x=x, y=10), SimpleNamespace(x=x + 40, y=30)]
+        return SimpleNamespace(
+            symbols=[SimpleNamespace(text=c) for c in text],
+            bounding_box=SimpleNamespace(vertices=vertices),
+            confidence=0.9,
+        )
+
+    response = SimpleNamespace(
+        text_annotations=[SimpleNamespace(description="MILK 2.49")],
+        full_text_annotation=SimpleNamespace(
+            pages=[
+                SimpleNamespace(
+                    blocks=[
+                        SimpleNamespace(
+                            confidence=0.95,
+                            paragraphs=[SimpleNamespace(words=[word("MILK", 0), word("2.49", 300)])],
+                        )
+                    ]
+                )
+            ]
+        ),
+    )
+    result = vision_result(response)
+
+    assert result.text == "MILK 2.49"
+    assert [(w.text, w.box) for w in result.words] == [
+        ("MILK", (0, 10, 40, 30)),
+        ("2.49", (300, 10, 340, 30)),
+    ]
+    assert result.confidence == 0.95
+
+
+def test_vision_result_without_text_is_empty():
+    result = vision_result(SimpleNamespace(text_annotations=[]))
+    assert result.text == "" and result.words == []
@@ -0,0 +1,70 @@
+import random
+
+import pytest
+from app.services.ocr import OcrResult, OcrWord, layout_text
+from app.services.ocr.layout import estimate_skew, group_rows
+from app.services.receipt import ReceiptParser
+
+ROWS = [
+    ("WHOLE MILK", "2.49"),
+    ("WHEAT BREAD", "1.99"),
+    ("BANANAS", "0.57"),
+    ("SUBTOTAL", "5.05"),
+]
+
+
+def receipt_words(rows=ROWS, skew=0.0, line_height=30, word_height=20):
+    """Vision-style words: the name column read top to bottom, then the price column"""
+    names, prices = [], []
+    for i, (name, price) in enumerate(rows):
+        top = 100 + i * line_height
+        x = 50
+        for text in name.split():
+            width = 15 * len(text)
+            names.append(OcrWord(text, (x, top + skew * x, x + width, top + skew * x + word_height)))
+            x += width + 15
+        prices.append(OcrWord(price, (600, top + skew * 600, 660, top + skew * 600 + word_height)))
+    return names + prices
+
+
+def test_names_and_prices_read_as_columns_are_put_back_on_their_rows():
+    assert layout_text(receipt_words()) == (
+        "WHOLE MILK 2.49\nWHEAT BREAD 1.99\nBANANAS 0.57\nSUBTOTAL 5.05"
+    )
+
+
+def test_skewed_photos_are_straightened():
+    # At this slope a row's price sits lower than the next row's name
+    words = receipt_words(skew=0.08)
+    assert estimate_skew(words) == pytest.approx(0.08, abs=0.01)
+    assert layout_text(words).splitlines()[0] == "WHOLE MILK 2.49"
+    assert layout_text(words).splitlines()[2] == "BANANAS 0.57"
+
+
+def test_engine_order_does_not_matter():
+    words = receipt_words(skew=-0.05)
+    expected = layout_text(words)
+    random.Random(7).shuffle(words)
+    assert layout_text(words) == expected
+
+
+def test_tightly_spaced_rows_stay_apart():
+    # Centers closer than the row tolerance, but the words would print over each other
+    words = [
+        OcrWord("EGGS", (0, 0, 60, 20)),
+        OcrWord("3.29", (300, 0, 360, 20)),
+        OcrWord("FLOUR", (0, 9, 75, 29)),
+        OcrWord("4.10", (300, 9, 360, 29)),
+    ]
+    assert [[w.text for w in row] for row in group_rows(words)] == [
+        ["EGGS", "3.29"],
+        ["FLOUR", "4.10"],
+    ]
+
+
+def test_parser_uses_rows_when_word_boxes_are_known():
+    flattened = "WHOLE MILK\nWHEAT BREAD\nBANANAS\nSUBTOTAL\n2.49\n1.99\n0.57\n5.05"
+    result = OcrResult(flattened, receipt_words())
+    assert ReceiptParser.row_text(result).startswith("WHOLE MILK 2.49\n")
+    assert ReceiptParser.row_text(OcrResult(flattened)) == flattened
+    assert layout_text([]) == ""
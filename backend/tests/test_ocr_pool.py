@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from app.services.ocr import OcrPool, OcrQueueFullError, OcrTimeoutError
+
+
+@pytest.mark.asyncio
+async def test_blocking_calls_do_not_stall_the_event_loop():
+    pool = OcrPool(concurrency=2, timeout=5)
+    gaps = []
+
+    async def ticker(stop: asyncio.Event):
+        last = time.perf_counter()
+        while not stop.is_set():
+            await asyncio.sleep(0.005)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    stop = asyncio.Event()
+    ticking = asyncio.create_task(ticker(stop))
+    results = await asyncio.gather(*[pool.run(time.sleep, 0.1) for _ in range(4)])
+    stop.set()
+    await ticking
+
+    assert results == [None] * 4
+    assert max(gaps) < 0.05
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    pool = OcrPool(concurrency=2, timeout=5)
+    lock = threading.Lock()
+    running = peak = 0
+
+    def ocr(n):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+        return n
+
+    assert await asyncio.gather(*[pool.run(ocr, n) for n in range(6)]) == list(range(6))
+    assert peak == 2
+    assert pool.running == pool.waiting == 0
+
+
+@pytest.mark.asyncio
+async def test_timeout_frees_the_slot_once_the_thread_returns():
+    pool = OcrPool(concurrency=1, timeout=0.05)
+    with pytest.raises(OcrTimeoutError):
+        await pool.run(time.sleep, 0.2)
+    assert pool.running == 1
+
+    # Waiting for the busy thread counts against the timeout too
+    with pytest.raises(OcrTimeoutError):
+        await pool.run(time.sleep, 0)
+
+    await asyncio.sleep(0.25)
+    assert pool.running == 0
+    assert await pool.run(lambda: "text") == "text"
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate():
+    pool = OcrPool(concurrency=1, timeout=1)
+
+    def broken():
+        raise RuntimeError("vision unavailable")
+
+    with pytest.raises(RuntimeError, match="vision unavailable"):
+        await pool.run(broken)
+    assert pool.running == 0
+
+
+@pytest.mark.asyncio
+async def test_calls_beyond_the_waiting_limit_are_rejected():
+    pool = OcrPool(concurrency=1, timeout=5, max_waiting=1)
+    running = asyncio.ensure_future(pool.run(time.sleep, 0.1))
+    waiting = asyncio.ensure_future(pool.run(time.sleep, 0))
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(OcrQueueFullError):
+        await pool.run(time.sleep, 0)
+    await asyncio.gather(running, waiting)
@@ -0,0 +1,64 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from app.models.pantry import ListOfPantryItemsCreate
+from app.services.llm.providers.claude.service import ClaudeService
+from app.services.llm.usage import TokenUsage
+
+RESPONSE_TEXT = (
+    '{"items": [{"data": {"name": "apple", "quantity": 1, "unit": "units",'
+    ' "category": "produce", "notes": "🍎"}, "nutrition": {"calories": 52}}]}'
+)
+
+
+def make_message(cache_read: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        content=[SimpleNamespace(text=RESPONSE_TEXT)],
+        stop_reason="end_turn",
+        usage=SimpleNamespace(
+            input_tokens=40,
+            output_tokens=90,
+            cache_creation_input_tokens=0 if cache_read else 1200,
+            cache_read_input_tokens=cache_read,
+        ),
+    )
+
+
+@pytest.fixture
+def service(cache_crud):
+    service = ClaudeService()
+    service.usage = TokenUsage()
+    service.client = MagicMock()
+    service.client.messages.create = AsyncMock(
+        side_effect=[make_message(0), make_message(1200)]
+    )
+    return service
+
+
+@pytest.mark.asyncio
+async def test_static_prefix_is_shared_and_marked_cacheable(service):
+    await service.parse_ingredient_text(ListOfPantryItemsCreate, "1 apple")
+    await service.parse_ingredient_text(ListOfPantryItemsCreate, "2 pears")
+
+    first, second = [c.kwargs for c in service.client.messages.create.await_args_list]
+    assert first["system"] == second["system"]
+    assert first["system"][0]["cache_control"] == {"type": "ephemeral"}
+    assert "name" in first["system"][0]["text"]
+
+    # Only the per-request data goes in the user message
+    assert "1 apple" in first["messages"][0]["content"]
+    assert "Use your best guess" not in first["messages"][0]["content"]
+
+
+@pytest.mark.asyncio
+async def test_usage_separates_cached_and_uncached_input(service):
+    await service.parse_ingredient_text(ListOfPantryItemsCreate, "1 apple")
+    await service.parse_ingredient_text(ListOfPantryItemsCreate, "2 pears")
+
+    totals = service.usage.totals["ingredient_analysis"]
+    assert service.usage.calls["ingredient_analysis"] == 2
+    assert totals["cache_creation_input_tokens"] == 1200
+    assert totals["cache_read_input_tokens"] == 1200
+    assert totals["input_tokens"] == 80
+    assert service.usage.cached_ratio() == pytest.approx(1200 / 2480)
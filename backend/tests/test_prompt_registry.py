@@ -0,0 +1,47 @@
+from string import Template
+from unittest.mock import patch
+
+from app.models.pantry import ListOfPantryItemsCreate
+from app.models.recipes import ListOfRecipeData
+from app.services.llm.llm_cache import make_cache_key
+from app.services.llm.prompt_registry import PromptRegistry
+
+SYSTEM = Template("Return JSON matching:\n$model\n")
+PROMPT = Template("Ingredients:\n$ingredients\n")
+
+
+def test_schema_is_summarized_once_per_pair():
+    registry = PromptRegistry()
+    with patch(
+        "app.services.llm.prompt_registry.summarize_schema", return_value="schema"
+    ) as summarize:
+        for _ in range(5):
+            compiled = registry.compile("recipes", PROMPT, ListOfRecipeData, SYSTEM)
+        registry.compile("items", PROMPT, ListOfPantryItemsCreate, SYSTEM)
+
+    assert summarize.call_count == 2
+    assert len(registry) == 2
+    assert compiled.system_prompt == "Return JSON matching:\nschema\n"
+    assert compiled.render({"ingredients": "- rice"}) == "Ingredients:\n- rice\n"
+
+
+def test_version_tracks_static_content():
+    deployed = PromptRegistry()
+    old = deployed.compile("recipes", PROMPT, ListOfRecipeData, SYSTEM)
+    deployed.compile("items", PROMPT, ListOfPantryItemsCreate, SYSTEM)
+    snapshot = deployed.versions()
+
+    current = PromptRegistry()
+    same = current.compile("items", PROMPT, ListOfPantryItemsCreate, SYSTEM)
+    new = current.compile(
+        "recipes", PROMPT, ListOfRecipeData, Template("Return only JSON matching:\n$model\n")
+    )
+
+    assert same.version == snapshot["items:ListOfPantryItemsCreate"]
+    assert new.version != old.version
+    assert current.changed_since(snapshot) == ["recipes:ListOfRecipeData"]
+    assert "+Return only JSON matching:" in PromptRegistry.diff(old, new)
+
+
+def test_prompt_version_is_part_of_cache_key():
+    assert make_cache_key("p", prompt_version="a") != make_cache_key("p", prompt_version="b")
@@ -0,0 +1,108 @@
+import io
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from app.models.pantry import ListOfPantryItemsCreate, PantryItemCreate, PantryItemData
+from app.services.pantry import PantryManager
+from app.services.receipt_cache import ReceiptCache, perceptual_hash, receipt_hashes
+from PIL import Image, ImageDraw
+
+LINES = ["MILK 2L", "BREAD", "EGGS 12", "APPLES", "RICE 1KG", "PASTA", "CHEESE"]
+
+
+def receipt_image(lines) -> Image.Image:
+    image = Image.new("L", (400, 60 + 22 * len(lines)), 255)
+    draw = ImageDraw.Draw(image)
+    draw.text((150, 15), "FRESH MART", fill=0)
+    for i, line in enumerate(lines):
+        draw.text((20, 50 + 22 * i), line, fill=0)
+        draw.text((320, 50 + 22 * i), f"{i + 1}.99", fill=0)
+    return image
+
+
+def jpeg(image: Image.Image, quality: int = 90) -> bytes:
+    buffer = io.BytesIO()
+    image.convert("RGB").save(buffer, "JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def items(*names):
+    return [PantryItemCreate(data=PantryItemData(name=name, category=None, notes=None)) for name in names]
+
+
+def distance(a: bytes, b: bytes) -> int:
+    return (perceptual_hash(a) ^ perceptual_hash(b)).bit_count()
+
+
+def test_reencoded_copies_are_perceptually_close():
+    image = receipt_image(LINES)
+    original = jpeg(image)
+    resized = jpeg(image.resize((image.width * 2, image.height * 2)), quality=60)
+    blank = jpeg(Image.new("L", image.size, 255))
+
+    assert distance(original, jpeg(image, quality=50)) <= 10
+    assert distance(original, resized) <= 10
+    assert distance(original, blank) > 10
+
+
+def test_unreadable_bytes_have_no_perceptual_hash():
+    sha256, phash = receipt_hashes(b"not an image")
+    assert len(sha256) == 64
+    assert phash is None
+
+
+def test_cache_matches_exact_and_similar_uploads_per_user():
+    cache = ReceiptCache()
+    user, other_user = uuid.uuid4(), uuid.uuid4()
+    image = receipt_image(LINES)
+    original = jpeg(image)
+
+    cache.set(user, *receipt_hashes(original), items("milk", "bread"))
+
+    exact = cache.get(user, *receipt_hashes(original))
+    assert [i.data.name for i in exact] == ["milk", "bread"]
+    similar = cache.get(user, *receipt_hashes(jpeg(image, quality=50)))
+    assert [i.data.name for i in similar] == ["milk", "bread"]
+    assert cache.get(other_user, *receipt_hashes(original)) is None
+    assert (cache.exact_hits, cache.similar_hits, cache.misses) == (1, 1, 1)
+
+    # Returned items are copies
+    exact[0].data.name = "edited"
+    assert cache.get(user, *receipt_hashes(original))[0].data.name == "milk"
+
+
+def test_cache_entries_expire_and_are_bounded():
+    user = uuid.uuid4()
+    expired = ReceiptCache(ttl=-1)
+    expired.set(user, "a", None, items("milk"))
+    assert expired.get(user, "a", None) is None
+
+    cache = ReceiptCache(per_user=2)
+    for key in ("a", "b", "c"):
+        cache.set(user, key, None, items(key))
+    assert cache.get(user, "a", None) is None
+    assert cache.get(user, "c", None) is not None
+
+
+@pytest.mark.asyncio
+async def test_repeat_uploads_skip_the_receipt_parser():
+    manager = PantryManager()
+    manager.receipt_cache = ReceiptCache()
+    manager.receipt_parser = MagicMock()
+    manager.receipt_parser.parse_receipt = AsyncMock(
+        return_value=ListOfPantryItemsCreate(items=items("milk"))
+    )
+    user = uuid.uuid4()
+    content = jpeg(receipt_image(LINES))
+
+    def upload():
+        file = MagicMock()
+        file.read = AsyncMock(return_value=content)
+        return file
+
+    first = await manager.process_receipt(upload(), user)
+    again = await manager.process_receipt(upload(), user)
+
+    assert [i.data.name for i in first] == [i.data.name for i in again] == ["milk"]
+    manager.receipt_parser.parse_receipt.assert_awaited_once()
@@ -0,0 +1,222 @@
+import uuid
+from unittest.mock import AsyncMock
+
+import pytest
+from app.models.pantry import (
+    ListOfPantryItemsCreate,
+    Nutrition,
+    PantryItemCreate,
+    PantryItemData,
+)
+from app.services.ocr import OcrResult
+from app.services.receipt import ReceiptParser
+from app.services.receipt_dictionary import ReceiptDictionary, normalize_receipt_string
+from app.services.receipt_lines import ReceiptLine
+
+ALICE, BOB, CAROL = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+
+DAY = 86400
+
+
+def parsed(name, original_name, quantity=1.0, unit="gallon", category="dairy", notes="🥛"):
+    return PantryItemCreate(
+        data=PantryItemData(
+            name=name,
+            original_name=original_name,
+            quantity=quantity,
+            unit=unit,
+            category=category,
+            notes=notes,
+            expiry_date="2024-01-11",
+        ),
+        nutrition=Nutrition(standard_unit="100 ml", calories=61, protein=3.2),
+    )
+
+
+def milk_dictionary() -> ReceiptDictionary:
+    dictionary = ReceiptDictionary(min_users=2, min_agreement=0.8)
+    for user in (ALICE, BOB):
+        dictionary.learn("GV WHL MLK 1GAL", parsed("milk", "GV WHL MLK 1GAL"), user)
+    return dictionary
+
+
+def test_normalize_receipt_string_drops_item_codes():
+    assert normalize_receipt_string("4011 GV WHL-MLK 1GAL") == "gv whl mlk 1gal"
+
+
+def test_strings_resolve_only_once_users_agree():
+    dictionary = ReceiptDictionary(min_users=2, min_agreement=0.8)
+    dictionary.learn("GV WHL MLK 1GAL", parsed("milk", None), ALICE)
+    # The same user parsing it again doesn't count twice
+    dictionary.learn("GV WHL MLK 1GAL", parsed("milk", None), ALICE)
+    assert dictionary.lookup("GV WHL MLK 1GAL") is None
+
+    dictionary.learn("gv whl mlk 1gal", parsed("milk", None), BOB)
+    assert dictionary.lookup("GV WHL MLK 1GAL").data.name == "milk"
+
+    # A disagreeing parse puts the string back in the LLM's hands
+    dictionary.learn("GV WHL MLK 1GAL", parsed("buttermilk", None), CAROL)
+    assert dictionary.lookup("GV WHL MLK 1GAL") is None
+    assert dictionary.hit_rate == pytest.approx(1 / 3)
+
+
+def test_resolve_fills_the_line_from_the_learned_item():
+    dictionary = ReceiptDictionary(min_users=1)
+    bananas = ReceiptLine("BANANAS", 0.57)
+    bananas.quantity, bananas.unit, bananas.unit_price = 3, "ea", 0.19
+    # The LLM counted 3 for a 3 ea line, so one banana is learned as 1
+    dictionary.learn_parse(
+        [bananas], [parsed("banana", "BANANAS", quantity=3, unit="unit")], ALICE
+    )
+
+    line = ReceiptLine("BANANAS", 0.95)
+    line.quantity, line.unit, line.unit_price = 5, "ea", 0.19
+    item = dictionary.resolve(line)
+
+    assert (item.data.name, item.data.original_name) == ("banana", "BANANAS")
+    assert (item.data.quantity, item.data.unit, item.data.price) == (5, "unit", 0.19)
+    assert item.nutrition.calories == 61
+
+
+def test_nothing_a_user_wrote_is_shared():
+    dictionary = ReceiptDictionary(min_users=1)
+    dictionary.learn("GV WHL MLK 1GAL", parsed("milk", None, notes="my private note"), ALICE)
+
+    item = dictionary.resolve(ReceiptLine("GV WHL MLK 1GAL", 3.48))
+
+    assert item.data.name == "milk"
+    assert (item.data.notes, item.data.expiry_date) == (None, None)
+
+
+class FakeOcr:
+    name = "fake"
+    min_confidence = 0.8
+
+    def __init__(self, text):
+        self.text = text
+
+    async def recognize(self, content):
+        return OcrResult(self.text)
+
+
+class FakeLLM:
+    def __init__(self, items):
+        self.items = items
+        self.texts = []
+
+    async def parse_receipt_text(self, model, text):
+        self.texts.append(text)
+        return model(items=self.items)
+
+
+def make_parser(text, dictionary, llm_items):
+    parser = ReceiptParser(FakeOcr(text), dictionary)
+    parser.claude_service = FakeLLM(llm_items)
+    return parser
+
+
+@pytest.mark.asyncio
+async def test_parser_sends_only_unknown_lines_to_the_llm_and_learns_them():
+    dictionary = milk_dictionary()
+    parser = make_parser(
+        "GV WHL MLK 1GAL 3.48\nORG BNLS CHKN BRST 9.12\nTOTAL 12.60",
+        dictionary,
+        [parsed("chicken breast", "ORG BNLS CHKN BRST", unit="lb", category="meat")],
+    )
+
+    result = await parser.parse_receipt(b"not an image", CAROL)
+
+    assert parser.claude_service.texts == [
+        "item | quantity | price\nORG BNLS CHKN BRST |  | 9.12"
+    ]
+    assert [item.data.name for item in result.items] == ["milk", "chicken breast"]
+    assert result.items[0].data.price == 3.48
+
+    # Learned from Carol's parse, resolves once a second user agrees
+    chicken = parsed("chicken breast", None, unit="lb", category="meat")
+    dictionary.learn("ORG BNLS CHKN BRST", chicken, ALICE)
+    assert dictionary.lookup("ORG BNLS CHKN BRST").data.name == "chicken breast"
+
+
+@pytest.mark.asyncio
+async def test_fully_known_receipts_skip_the_llm():
+    parser = make_parser("GV WHL MLK 1GAL 3.48\nTOTAL 3.48", milk_dictionary(), [])
+
+    result = await parser.parse_receipt(b"not an image", CAROL)
+
+    assert parser.claude_service.texts == []
+    assert isinstance(result, ListOfPantryItemsCreate)
+    assert [item.data.name for item in result.items] == ["milk"]
+
+
+class FakeVoteStore:
+    """Stands in for the receipt_dictionary_votes table"""
+
+    def __init__(self):
+        self.rows = {}
+
+    async def upsert_votes(self, votes):
+        for vote in votes:
+            self.rows[(vote["receipt_key"], vote["signature"], vote["user_id"])] = vote
+
+    async def get_votes(self):
+        return sorted(self.rows.values(), key=lambda row: row["seen_at"])
+
+    async def delete_votes_before(self, before):
+        stale = [key for key, row in self.rows.items() if row["seen_at"] < before.isoformat()]
+        for key in stale:
+            del self.rows[key]
+        return len(stale)
+
+
+@pytest.mark.asyncio
+async def test_saved_votes_are_shared_by_a_new_process():
+    store = FakeVoteStore()
+    first = ReceiptDictionary(min_users=2, store=store)
+    first.learn("GV WHL MLK 1GAL", parsed("milk", None), ALICE)
+    first.learn("GV WHL MLK 1GAL", parsed("milk", None), ALICE)
+    assert await first.save() == 1
+    assert await first.save() == 0
+
+    # Another worker, or this one after a deploy
+    second = ReceiptDictionary(min_users=2, store=store)
+    await second.load()
+    second.learn("GV WHL MLK 1GAL", parsed("milk", None), BOB)
+    assert second.lookup("GV WHL MLK 1GAL").data.name == "milk"
+
+    # Bob's vote isn't saved yet, but survives a rebuild from the store
+    await second.load()
+    assert second.lookup("GV WHL MLK 1GAL") is not None
+    await second.save()
+    assert len(store.rows) == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_saves_are_retried():
+    store = FakeVoteStore()
+    store.upsert_votes = AsyncMock(side_effect=[ConnectionError("down"), None])
+    dictionary = ReceiptDictionary(store=store)
+    dictionary.learn("GV WHL MLK 1GAL", parsed("milk", None), ALICE)
+
+    assert await dictionary.save() == 0
+    assert await dictionary.save() == 1
+
+
+@pytest.mark.asyncio
+async def test_load_drops_stale_votes_and_keeps_per_unit_quantities():
+    store = FakeVoteStore()
+    dictionary = ReceiptDictionary(min_users=1, max_vote_age=30 * DAY, store=store)
+    limes = ReceiptLine("LIMES PERSIAN", 1.74)
+    limes.quantity, limes.unit_price = 3, 0.58
+    lime = parsed("lime", None, quantity=3, unit="unit")
+    dictionary.learn("LIMES PERSIAN", lime, ALICE, count=3, now=0)
+    dictionary.learn("GV WHL MLK 1GAL", parsed("milk", None), BOB, now=0)
+    dictionary.learn("LIMES PERSIAN", lime, BOB, count=3, now=40 * DAY)
+    await dictionary.save()
+
+    assert await dictionary.load(now=45 * DAY) == 1
+    assert dictionary.lookup("GV WHL MLK 1GAL") is None
+    assert len(store.rows) == 1
+    # 3 @ 0.58 is three limes, not three times the three the LLM counted
+    assert dictionary.resolve(limes).data.quantity == 3
@@ -0,0 +1,184 @@
+import io
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from app.services.ocr import OcrEngine, OcrPool, OcrResult
+from app.services.ocr.local import LocalEngine
+from app.services.ocr.vision import VisionEngine
+from app.services.receipt import ReceiptParser
+from app.services.receipt_image import (
+    locate_receipt,
+    otsu_threshold,
+    prepare_receipt_image,
+)
+from PIL import Image, ImageDraw
+
+
+def receipt_photo(size=(3000, 4000), paper=(1000, 500, 2000, 3600)) -> Image.Image:
+    """A white receipt with dark lines of 'text' on a dark table"""
+    image = Image.new("RGB", size, (70, 50, 40))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle(paper, fill=(245, 245, 240))
+    left, top, right, bottom = paper
+    for y in range(top + 100, bottom - 100, 60):
+        draw.rectangle((left + 60, y, right - 200, y + 12), fill=(20, 20, 20))
+    return image
+
+
+def jpeg(image: Image.Image, exif=None) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=90, **({"exif": exif} if exif else {}))
+    return buffer.getvalue()
+
+
+def test_otsu_threshold_splits_a_bimodal_histogram():
+    histogram = [0] * 256
+    histogram[40] = 1000
+    histogram[240] = 500
+    assert 40 <= otsu_threshold(histogram) < 240
+
+
+def test_locate_receipt_finds_the_paper():
+    photo = receipt_photo().convert("L")
+    left, top, right, bottom = locate_receipt(photo)
+    assert 900 <= left <= 1000 and 1990 <= right <= 2100
+    assert 400 <= top <= 500 and 3590 <= bottom <= 3700
+
+
+def test_locate_receipt_leaves_plain_scans_alone():
+    scan = Image.new("L", (800, 1200), 250)
+    ImageDraw.Draw(scan).rectangle((50, 100, 700, 120), fill=10)
+    box = locate_receipt(scan)
+    assert box is None or box == (0, 0, 800, 1200)
+
+
+def test_prepare_crops_grays_and_downsamples():
+    content = jpeg(receipt_photo())
+    prepared = prepare_receipt_image(content, target_width=800)
+
+    assert prepared.cropped and prepared.reduced
+    assert prepared.original_size == (3000, 4000)
+    assert prepared.size[0] <= 800
+    assert len(prepared.content) < len(content) / 4
+    with Image.open(io.BytesIO(prepared.content)) as image:
+        assert image.mode == "L"
+        # Tall like the receipt, not like the photo
+        assert image.height / image.width > 2.5
+
+
+def test_prepare_applies_exif_orientation():
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Rotated 90 degrees clockwise
+    prepared = prepare_receipt_image(jpeg(receipt_photo(), exif=exif), target_width=800)
+    assert prepared.original_size == (4000, 3000)
+    assert prepared.size[0] > prepared.size[1]
+
+
+def test_prepare_decodes_rotated_photos_once_at_reduced_scale(monkeypatch):
+    exif = Image.Exif()
+    exif[0x0112] = 8  # Rotated 90 degrees counter-clockwise
+    content = jpeg(receipt_photo(), exif=exif)
+    decoded = []
+    load = Image.Image.load
+
+    def counting_load(image):
+        if getattr(image, "_im", None) is None:
+            decoded.append(image.size)
+        return load(image)
+
+    monkeypatch.setattr(Image.Image, "load", counting_load)
+    prepared = prepare_receipt_image(content, target_width=800)
+
+    # Only the draft decode, at a fraction of the 3000x4000 photo
+    assert decoded == [(1500, 2000)]
+    assert prepared.original_size == (4000, 3000)
+
+
+def vision_response(text: str, confidence: float):
+    return SimpleNamespace(
+        text_annotations=[SimpleNamespace(description=text)] if text else [],
+        full_text_annotation=SimpleNamespace(
+            pages=[
+                SimpleNamespace(
+                    blocks=[SimpleNamespace(confidence=confidence, paragraphs=[])]
+                )
+            ]
+        ),
+    )
+
+
+class FakeVision:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.sent = []
+
+    def text_detection(self, image, timeout=None):
+        self.sent.append(len(image.content))
+        return self.responses.pop(0)
+
+
+class FakeLLM:
+    def __init__(self):
+        self.texts = []
+
+    async def parse_receipt_text(self, model, text):
+        self.texts.append(text)
+        return model(items=[])
+
+
+def make_parser(vision: FakeVision) -> ReceiptParser:
+    parser = ReceiptParser(VisionEngine(vision, OcrPool(concurrency=1, timeout=10)))
+    parser.claude_service = FakeLLM()
+    return parser
+
+
+@pytest.mark.asyncio
+async def test_confident_reads_of_the_preprocessed_image_are_used():
+    content = jpeg(receipt_photo())
+    vision = FakeVision(vision_response("MILK 2.49", 0.95))
+    parser = make_parser(vision)
+
+    await parser.parse_receipt(content, uuid.uuid4())
+
+    assert len(vision.sent) == 1
+    assert vision.sent[0] < len(content)
+    assert parser.claude_service.texts == ["item | quantity | price\nMILK |  | 2.49"]
+
+
+@pytest.mark.asyncio
+async def test_low_confidence_reads_escalate_to_full_resolution():
+    content = jpeg(receipt_photo())
+    vision = FakeVision(vision_response("M1LK", 0.4), vision_response("MILK 2.49", 0.9))
+    parser = make_parser(vision)
+
+    await parser.parse_receipt(content, uuid.uuid4())
+
+    assert vision.sent[1] == len(content)
+    assert parser.claude_service.texts == ["item | quantity | price\nMILK |  | 2.49"]
+
+
+class FakeEasyOcr(OcrEngine):
+    name = "local"
+    min_confidence = LocalEngine.min_confidence
+
+    def __init__(self, confidence: float):
+        self.confidence = confidence
+        self.sent = []
+
+    async def recognize(self, content):
+        self.sent.append(len(content))
+        return OcrResult("MILK 2.49", confidence=self.confidence)
+
+
+@pytest.mark.asyncio
+async def test_escalation_uses_the_engines_own_confidence_scale():
+    content = jpeg(receipt_photo())
+    # A good easyocr read, well below what Vision would need
+    parser = ReceiptParser(FakeEasyOcr(0.6))
+    parser.claude_service = FakeLLM()
+
+    await parser.parse_receipt(content, uuid.uuid4())
+
+    assert len(parser.ocr.sent) == 1
+    assert parser.ocr.sent[0] < len(content)
@@ -0,0 +1,110 @@
+from app.services.receipt_lines import compact_receipt_text, item_table, segment_receipt
+
+RECEIPT = """TRADER JOE'S
+785 Oak Grove Road
+Concord, CA 94518
+Store #0083 - 925 521-1134
+SALE TRANSACTION
+SOUR CREAM & ONION CORN $2.49
+GREENS KALE 10 OZ $1.99
+BANANAS
+0.57
+3EA @ 0.19/EA
+PRODUCE DEPT.
+[Tare: 0.01 lb] 0.25 lb @ $3.99/lb
+SERRANO PEPPERS $1.00 FW
+Markdown: $1.00
+PUBLIX FF LT VANIL
+1 @ 2 FOR 4.00 2.00 F
+JIF RD FT CREAMY 5.75 F
+**$1 OFF/LB CHEESE -$0.54
+SUBTOTAL $12.31
+TOTAL $12.31
+VISA $12.31
+$ ************6169
+02/03/2016 15:56:15
+Prime members save at Whole Foods Market,
+Go to: http://www.wfm.com/feedback
+HOW WAS YOUR SHOPPING EXPERIENCE?"""
+
+
+def by_name(text):
+    return {item.name: item for item in segment_receipt(text)}
+
+
+def test_keeps_only_item_lines():
+    assert list(by_name(RECEIPT)) == [
+        "SOUR CREAM & ONION CORN",
+        "GREENS KALE 10 OZ",
+        "BANANAS",
+        "SERRANO PEPPERS",
+        "PUBLIX FF LT VANIL",
+        "JIF RD FT CREAMY",
+    ]
+
+
+def test_extracts_prices_and_quantities():
+    items = by_name(RECEIPT)
+    assert items["SOUR CREAM & ONION CORN"].price == 2.49
+
+    # Price on its own line, quantity detail after the item
+    bananas = items["BANANAS"]
+    assert (bananas.price, bananas.quantity, bananas.unit, bananas.unit_price) == (
+        0.57,
+        3,
+        "ea",
+        0.19,
+    )
+
+    # Weighed before the item is printed
+    peppers = items["SERRANO PEPPERS"]
+    assert (peppers.quantity, peppers.unit, peppers.unit_price) == (0.25, "lb", 3.99)
+
+    # Multi-buy deal, the price is on the detail line
+    vanilla = items["PUBLIX FF LT VANIL"]
+    assert (vanilla.quantity, vanilla.unit_price, vanilla.price) == (1, 2.0, 2.0)
+
+
+def test_a_column_of_prices_is_not_attached_to_the_last_name():
+    items = segment_receipt("MILK\nBREAD\n2.49\n1.99\nTOTAL 4.48")
+    assert [(item.name, item.price) for item in items] == [("MILK", None), ("BREAD", None)]
+
+
+def test_item_table_is_compact():
+    table = compact_receipt_text(RECEIPT)
+    assert table.splitlines()[0] == "item | quantity | price"
+    assert "BANANAS | 3 ea @ 0.19 | 0.57" in table
+    assert "SOUR CREAM & ONION CORN |  | 2.49" in table
+    assert len(table) < len(RECEIPT) / 2
+
+
+def test_nothing_recognized_returns_none():
+    assert compact_receipt_text("THANK YOU\nVISA $12.31") is None
+    assert item_table([]) == "item | quantity | price"
+
+
+def test_product_names_that_look_like_totals_or_addresses_are_kept():
+    receipt = """MILK 2.49
+MARKET PANTRY PEANUT BUTTER 3.19
+MEMBER'S MARK EGGS 4.98
+TOTAL CEREAL 3.50
+DAILY CHEF STORE BRAND CODE RED 5.99
+BREAD, WW
+2.00
+12 Grain Bread Rd Style 2.79
+ORANGE JUICE 3.99
+Items Subtotal 29.07
+Tax 1 [$9.98] 0.86
+Grand Total 29.93
+MasterCard *6258 29.93
+CHANGE DUE 0.00"""
+    assert [(item.name, item.price) for item in segment_receipt(receipt)] == [
+        ("MILK", 2.49),
+        ("MARKET PANTRY PEANUT BUTTER", 3.19),
+        ("MEMBER'S MARK EGGS", 4.98),
+        ("TOTAL CEREAL", 3.50),
+        ("DAILY CHEF STORE BRAND CODE RED", 5.99),
+        ("BREAD, WW", 2.00),
+        ("12 Grain Bread Rd Style", 2.79),
+        ("ORANGE JUICE", 3.99),
+    ]
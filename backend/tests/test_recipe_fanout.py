@@ -0,0 +1,95 @@
+import time
+
+import pytest
+from app.models.recipes import ListOfRecipeData, RecipeData, RecipePreferences
+from app.services.llm.providers.local import LocalLLMService
+from app.services.recipe_fanout import generate_fanout, merge_recipes, plan_fanout
+
+
+def recipe(name: str) -> RecipeData:
+    return RecipeData(
+        name=name,
+        ingredients=[],
+        instructions=[],
+        preparation_time=15,
+        category="Dinner",
+    )
+
+
+def test_plan_splits_by_meal_type_then_chunks():
+    parts = plan_fanout(
+        RecipePreferences(num_recipes=7, meal_types=["Lunch", "Dinner"])
+    )
+    assert sum(p.num_recipes for p in parts) == 7
+    assert all(p.num_recipes <= 2 for p in parts)
+    assert {tuple(p.meal_types) for p in parts} == {("Lunch",), ("Dinner",)}
+    # Every part is told it is one of several
+    assert all(f"of {len(parts)}" in p.custom_preferences for p in parts)
+
+
+def test_plan_without_split_field_uses_distinct_chunks():
+    parts = plan_fanout(RecipePreferences(num_recipes=5, custom_preferences="spicy"))
+    assert [p.num_recipes for p in parts] == [2, 2, 1]
+    assert len({p.custom_preferences for p in parts}) == 3
+    assert all(p.custom_preferences.startswith("spicy") for p in parts)
+
+
+def test_small_request_is_not_split():
+    preferences = RecipePreferences(num_recipes=2, meal_types=["Lunch", "Dinner"])
+    assert plan_fanout(preferences) == [preferences]
+
+
+def test_merge_interleaves_and_drops_near_duplicates():
+    merged = merge_recipes(
+        [
+            [recipe("Garlic Fried Rice"), recipe("Tomato Soup")],
+            [recipe("Garlic fried rice!"), recipe("Egg Curry")],
+        ],
+        limit=4,
+    )
+    assert [r.name for r in merged] == ["Garlic Fried Rice", "Tomato Soup", "Egg Curry"]
+    assert len(merge_recipes([[recipe("A"), recipe("B")], [recipe("C")]], 2)) == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_part_is_skipped_unless_all_fail():
+    calls = 0
+    dishes = ["Pad Thai", "Shakshuka", "Minestrone", "Bibimbap", "Paella", "Tacos"]
+
+    async def flaky(part: RecipePreferences) -> ListOfRecipeData:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise ConnectionError("overloaded")
+        return ListOfRecipeData(
+            recipes=[recipe(dishes.pop()) for _ in range(part.num_recipes)]
+        )
+
+    result = await generate_fanout(flaky, RecipePreferences(num_recipes=6))
+    assert calls == 3
+    assert len(result.recipes) == 4
+
+    async def broken(part: RecipePreferences) -> ListOfRecipeData:
+        raise ConnectionError("down")
+
+    with pytest.raises(ConnectionError):
+        await generate_fanout(broken, RecipePreferences(num_recipes=6))
+
+
+@pytest.mark.asyncio
+async def test_parts_run_concurrently(cache_crud):
+    service = LocalLLMService(latency_median_ms=100, latency_sigma=0, latency_per_unit_ms=0)
+
+    async def generate(part: RecipePreferences) -> ListOfRecipeData:
+        return await service.generate_recipes(
+            ListOfRecipeData, ["rice", "egg"], part, use_cache=False
+        )
+
+    started = time.perf_counter()
+    result = await generate_fanout(generate, RecipePreferences(num_recipes=6))
+    elapsed = time.perf_counter() - started
+
+    assert service.calls == 3
+    assert 0 < len(result.recipes) <= 6
+    # Three 100ms calls in parallel, not in sequence
+    assert elapsed < 0.25
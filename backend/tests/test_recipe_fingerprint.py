@@ -0,0 +1,79 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from app.models.pantry import PantryItem, PantryItemData
+from app.models.recipes import ListOfRecipeData, RecipePreferences
+from app.services.llm.llm_cache import make_cache_key
+from app.services.llm.providers.local import LocalLLMService
+from app.services.recipe_fingerprint import AVOID_RECIPES_TEXT, recipe_fingerprint
+
+
+def make_item(name: str, quantity: float, unit: str = "g", price: float = 2.5):
+    return PantryItem(
+        id=uuid.uuid4(),
+        data=PantryItemData(
+            name=name, quantity=quantity, unit=unit, price=price, category=None, notes=None
+        ),
+        user_id=uuid.uuid4(),
+        created_at=datetime.now(),
+        updated_at=datetime.now(),
+    )
+
+
+PANTRY = [make_item("Rice", 500), make_item("eggs", 6, "unit"), make_item("Milk", 1, "l")]
+
+
+def test_small_quantity_drift_and_item_order_keep_the_fingerprint():
+    preferences = RecipePreferences(num_recipes=4)
+    drifted = [make_item("eggs", 6, "unit"), make_item("milk ", 0.99, "l"), make_item("rice", 490)]
+    assert recipe_fingerprint(PANTRY, preferences) == recipe_fingerprint(
+        drifted, preferences
+    )
+
+
+def test_large_quantity_change_or_new_item_changes_the_fingerprint():
+    preferences = RecipePreferences(num_recipes=4)
+    base = recipe_fingerprint(PANTRY, preferences)
+    assert recipe_fingerprint([*PANTRY[:2], make_item("Milk", 3, "l")], preferences) != base
+    assert recipe_fingerprint([*PANTRY, make_item("tofu", 200)], preferences) != base
+
+
+def test_preferences_are_normalized_and_avoid_text_ignored():
+    plain = RecipePreferences(
+        cuisine=["Italian", "Mexican"], custom_preferences="Spicy  please"
+    )
+    noisy = RecipePreferences(
+        cuisine=["mexican", "italian "],
+        custom_preferences=f"spicy please\n{AVOID_RECIPES_TEXT} Pad Thai, Tacos",
+    )
+    assert recipe_fingerprint(PANTRY, plain) == recipe_fingerprint(PANTRY, noisy)
+    assert recipe_fingerprint(PANTRY, plain) != recipe_fingerprint(
+        PANTRY, plain.model_copy(update={"num_recipes": 2})
+    )
+
+
+def test_fingerprint_replaces_prompt_in_cache_key():
+    assert make_cache_key("prompt a", fingerprint="f") == make_cache_key(
+        "prompt b", fingerprint="f"
+    )
+    assert make_cache_key("prompt a") != make_cache_key("prompt b")
+
+
+@pytest.mark.asyncio
+async def test_requests_with_the_same_fingerprint_share_a_cache_entry(cache_crud):
+    service = LocalLLMService(latency_median_ms=1, latency_per_unit_ms=0)
+    preferences = RecipePreferences(num_recipes=2)
+    fingerprint = recipe_fingerprint(PANTRY, preferences)
+
+    first = await service.generate_recipes(
+        ListOfRecipeData, ["rice (500.0 g $2.5 )"], preferences,
+        cache_fingerprint=fingerprint,
+    )
+    second = await service.generate_recipes(
+        ListOfRecipeData, ["rice (490.0 g $2.5 )"], preferences,
+        cache_fingerprint=fingerprint,
+    )
+
+    assert service.calls == 1
+    assert first == second
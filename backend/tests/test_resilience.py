@@ -0,0 +1,246 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from app.models.pantry import ListOfPantryItemsCreate
+from app.services.llm.base import BaseLLMService
+from app.services.llm.resilience import (
+    HEDGE_MIN_SAMPLES,
+    CircuitBreaker,
+    LLMUnavailableError,
+    ResiliencePolicy,
+)
+from app.services.llm.scheduler import Priority, RequestScheduler
+
+
+class Overloaded(ConnectionError):
+    pass
+
+
+def make_policy(**kwargs) -> ResiliencePolicy:
+    kwargs.setdefault("hedged_request_types", set())
+    return ResiliencePolicy(lambda e: isinstance(e, ConnectionError), **kwargs)
+
+
+class FlakyLLMService(BaseLLMService):
+    def __init__(self, outcomes):
+        super().__init__()
+        self.resilience = make_policy(breaker=CircuitBreaker(failure_threshold=2))
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    async def _generate_response(self, prompt, response_model, system_prompt=None, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried():
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise Overloaded("529 overloaded")
+        return "ok"
+
+    with patch("app.services.llm.resilience.BACKOFF_BASE", 0.001):
+        assert await make_policy().call(call, deadline=5) == "ok"
+    assert len(attempts) == 3
+
+
+@pytest.mark.asyncio
+async def test_permanent_errors_are_not_retried():
+    call = AsyncMock(side_effect=ValueError("No valid JSON found in response"))
+    with pytest.raises(ValueError):
+        await make_policy().call(call, deadline=5)
+    assert call.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_deadline_bounds_the_whole_call():
+    async def hang():
+        await asyncio.sleep(10)
+
+    policy = make_policy()
+    with pytest.raises(LLMUnavailableError):
+        await policy.call(hang, deadline=0.05)
+    assert policy.breaker.failures == 1
+
+
+@pytest.mark.asyncio
+async def test_time_spent_queued_for_a_slot_is_not_a_provider_failure():
+    # The only request this minute is taken, so the call waits in the queue
+    scheduler = RequestScheduler(requests_per_minute=1)
+    scheduler.requests.take(1)
+
+    async def call():
+        async with scheduler.slot(Priority.BACKGROUND, None, 10):
+            return "ok"
+
+    policy = make_policy()
+    with pytest.raises(LLMUnavailableError):
+        await policy.call(call, deadline=0.05)
+    assert policy.breaker.failures == 0
+    assert policy.breaker.state == CircuitBreaker.CLOSED
+
+
+async def collect(chunks) -> list:
+    return [chunk async for chunk in chunks]
+
+
+@pytest.mark.asyncio
+async def test_stream_failing_before_output_is_retried():
+    attempts = []
+
+    async def stream():
+        attempts.append(1)
+        if len(attempts) < 2:
+            raise Overloaded("529 overloaded")
+        yield "a"
+        yield "b"
+
+    policy = make_policy()
+    policy.breaker.record_failure()
+    with patch("app.services.llm.resilience.BACKOFF_BASE", 0.001):
+        assert await collect(policy.stream(stream, deadline=5)) == ["a", "b"]
+    assert len(attempts) == 2
+    assert policy.breaker.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_failing_after_output_is_not_retried():
+    attempts = []
+
+    async def stream():
+        attempts.append(1)
+        yield "a"
+        raise Overloaded("connection reset")
+
+    policy = make_policy()
+    chunks = []
+    with pytest.raises(LLMUnavailableError):
+        async for chunk in policy.stream(stream, deadline=5):
+            chunks.append(chunk)
+    assert chunks == ["a"] and len(attempts) == 1
+    assert policy.breaker.failures == 1
+
+
+@pytest.mark.asyncio
+async def test_deadline_bounds_the_whole_stream():
+    async def stream():
+        yield "a"
+        await asyncio.sleep(10)
+        yield "b"
+
+    policy = make_policy()
+    with pytest.raises(LLMUnavailableError):
+        await collect(policy.stream(stream, deadline=0.05))
+    assert policy.breaker.failures == 1
+
+
+@pytest.mark.asyncio
+async def test_abandoned_stream_is_not_a_success():
+    closed = []
+
+    async def stream():
+        try:
+            yield "a"
+            yield "b"
+        finally:
+            closed.append(True)
+
+    policy = make_policy()
+    policy.breaker.record_failure()
+    chunks = policy.stream(stream, deadline=5)
+    assert await anext(chunks) == "a"
+    await chunks.aclose()
+
+    assert closed == [True]
+    assert policy.breaker.failures == 1
+
+
+def open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    return breaker
+
+
+@pytest.mark.asyncio
+async def test_a_cancelled_trial_call_reopens_the_breaker():
+    policy = make_policy(breaker=open_breaker())
+
+    task = asyncio.create_task(policy.call(lambda: asyncio.sleep(10), deadline=5))
+    await asyncio.sleep(0.01)
+    assert policy.breaker.state == CircuitBreaker.HALF_OPEN
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    # Open for another reset timeout, then the next call gets to be the trial
+    assert policy.breaker.state == CircuitBreaker.OPEN
+    assert await policy.call(AsyncMock(return_value="ok"), deadline=5) == "ok"
+    assert policy.breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_an_expired_deadline_does_not_take_the_trial():
+    policy = make_policy(breaker=open_breaker())
+    call = AsyncMock(return_value="ok")
+
+    with pytest.raises(LLMUnavailableError):
+        await policy.call(call, deadline=0)
+    assert call.await_count == 0
+    assert policy.breaker.state == CircuitBreaker.OPEN
+
+
+@pytest.mark.asyncio
+async def test_slow_call_is_hedged_and_first_result_wins():
+    policy = make_policy(hedged_request_types={"recipe_generation"})
+    for _ in range(HEDGE_MIN_SAMPLES):
+        policy.latencies.record("recipe_generation", 0.01)
+
+    delays = [5, 0]
+
+    async def call():
+        delay = delays.pop(0)
+        await asyncio.sleep(delay)
+        return f"slept {delay}"
+
+    result = await policy.call(call, "recipe_generation", deadline=1)
+    assert result == "slept 0"
+    assert policy.hedges == 1 and policy.hedge_wins == 1
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_serves_stale_cache(cache_crud):
+    stale = ListOfPantryItemsCreate(items=[]).model_dump(mode="json")
+    cache_crud.get_entry.side_effect = lambda key, include_expired=False: (
+        {"response": stale} if include_expired else None
+    )
+    service = FlakyLLMService([Overloaded("down")] * 2)
+
+    with patch("app.services.llm.resilience.BACKOFF_BASE", 0.001):
+        result = await service.generate("prompt", ListOfPantryItemsCreate)
+
+    assert result == ListOfPantryItemsCreate(items=[])
+    assert service.resilience.breaker.state == CircuitBreaker.OPEN
+
+    # Fails fast without touching the provider while open
+    result = await service.generate("another prompt", ListOfPantryItemsCreate)
+    assert result == ListOfPantryItemsCreate(items=[])
+    assert service.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_without_cache_raises(cache_crud):
+    service = FlakyLLMService([])
+    service.resilience.breaker.record_failure()
+    service.resilience.breaker.record_failure()
+
+    with pytest.raises(LLMUnavailableError):
+        await service.generate("prompt", ListOfPantryItemsCreate)
+    assert service.calls == 0
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+from app.services.llm.scheduler import Priority, QueueFullError, RequestScheduler
+
+
+async def run_ordered(scheduler, calls):
+    """Start calls while the only slot is held, return the order they ran in"""
+    order = []
+    release = asyncio.Event()
+
+    async def blocker():
+        async with scheduler.slot(Priority.INTERACTIVE, "blocker", 1):
+            await release.wait()
+
+    async def call(name, priority, user):
+        async with scheduler.slot(priority, user, 1):
+            order.append(name)
+
+    blocking = asyncio.create_task(blocker())
+    await asyncio.sleep(0)
+    tasks = []
+    for name, priority, user in calls:
+        tasks.append(asyncio.create_task(call(name, priority, user)))
+        await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(blocking, *tasks)
+    return order
+
+
+@pytest.mark.asyncio
+async def test_interactive_calls_jump_ahead_of_background():
+    scheduler = RequestScheduler(max_concurrency=1)
+    order = await run_ordered(
+        scheduler,
+        [
+            ("enrich-1", Priority.BACKGROUND, "a"),
+            ("enrich-2", Priority.BACKGROUND, "a"),
+            ("recipes", Priority.INTERACTIVE, "b"),
+        ],
+    )
+    assert order == ["recipes", "enrich-1", "enrich-2"]
+
+
+@pytest.mark.asyncio
+async def test_users_take_turns_within_a_priority():
+    scheduler = RequestScheduler(max_concurrency=1)
+    order = await run_ordered(
+        scheduler,
+        [
+            ("a1", Priority.BACKGROUND, "a"),
+            ("a2", Priority.BACKGROUND, "a"),
+            ("a3", Priority.BACKGROUND, "a"),
+            ("b1", Priority.BACKGROUND, "b"),
+        ],
+    )
+    assert order == ["a1", "b1", "a2", "a3"]
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_new_calls():
+    scheduler = RequestScheduler(
+        max_concurrency=1, max_queue={Priority.INTERACTIVE: 1, Priority.BACKGROUND: 1}
+    )
+    async with scheduler.slot(Priority.INTERACTIVE, "a", 1):
+        waiting = asyncio.create_task(
+            scheduler.slot(Priority.BACKGROUND, "a", 1).__aenter__()
+        )
+        await asyncio.sleep(0)
+        with pytest.raises(QueueFullError):
+            async with scheduler.slot(Priority.BACKGROUND, "b", 1):
+                pass
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+    assert scheduler.queue_depth() == 0
+    assert scheduler.running == 0
+    assert scheduler.stats[Priority.BACKGROUND].rejected == 1
+
+
+@pytest.mark.asyncio
+async def test_token_budget_delays_calls_and_records_wait():
+    scheduler = RequestScheduler(tokens_per_minute=6000)
+    async with scheduler.slot(Priority.INTERACTIVE, "a", 6000) as ticket:
+        ticket.settle(6000)
+    async with scheduler.slot(Priority.INTERACTIVE, "a", 20):
+        pass
+
+    stats = scheduler.stats_dict()["interactive"]
+    assert stats["granted"] == 2
+    assert stats["max_wait"] >= 0.15
+
+
+@pytest.mark.asyncio
+async def test_settle_refunds_unused_tokens():
+    scheduler = RequestScheduler(tokens_per_minute=6000)
+    async with scheduler.slot(Priority.INTERACTIVE, "a", 6000) as ticket:
+        ticket.settle(100)
+    assert scheduler.tokens.wait_time(5000) == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_call_refunds_its_reservation():
+    scheduler = RequestScheduler(tokens_per_minute=6000)
+    with pytest.raises(RuntimeError):
+        async with scheduler.slot(Priority.INTERACTIVE, "a", 6000):
+            raise RuntimeError("429")
+    assert scheduler.tokens.wait_time(5000) == 0
+    assert scheduler.running == 0
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+from app.models.recipes import ListOfRecipeData
+from app.services.llm.base import BaseLLMService
+from app.services.llm.json_stream import JSONArrayStreamer
+
+RECIPE = {
+    "name": "Shakshuka {spicy}",
+    "ingredients": [{"name": "egg", "quantity": 4, "unit": "units"}],
+    "instructions": ["Simmer the \"sauce\"", "Crack in the eggs"],
+    "preparation_time": 25,
+    "category": "Breakfast",
+}
+
+
+def make_response(count: int) -> str:
+    recipes = [dict(RECIPE, name=f"{RECIPE['name']} {i}") for i in range(count)]
+    return "Here are your recipes:\n" + json.dumps({"recipes": recipes})
+
+
+class StreamingLLMService(BaseLLMService):
+    def __init__(self, text: str, chunk_size: int = 7):
+        super().__init__()
+        self.text = text
+        self.chunk_size = chunk_size
+        self.chunks_sent = 0
+
+    async def _generate_response(self, prompt, response_model, system_prompt=None, **kwargs):
+        raise NotImplementedError
+
+    async def _stream_response(self, prompt, system_prompt=None, **kwargs):
+        for start in range(0, len(self.text), self.chunk_size):
+            self.chunks_sent += 1
+            yield self.text[start : start + self.chunk_size]
+
+
+pytestmark = pytest.mark.usefixtures("cache_crud")
+
+
+def test_streamer_emits_elements_as_they_close():
+    streamer = JSONArrayStreamer(key="recipes")
+    text = make_response(3)
+    emitted_at = []
+    for position, char in enumerate(text):
+        for element in streamer.feed(char):
+            emitted_at.append(position)
+            assert json.loads(element)["instructions"] == RECIPE["instructions"]
+
+    assert len(emitted_at) == 3
+    assert emitted_at[0] < len(text) // 2
+    assert streamer.array_closed
+
+
+def test_streamer_ignores_other_keys_and_top_level_prose():
+    streamer = JSONArrayStreamer(key="recipes")
+    elements = streamer.feed(
+        'Sure {not json} -> {"notes": ["x"], "recipes": [{"a": "]"}, {"b": [1]}]}'
+    )
+    assert elements == ['{"a": "]"}', '{"b": [1]}']
+
+
+@pytest.mark.asyncio
+async def test_generate_stream_yields_recipes_before_response_ends(cache_crud):
+    service = StreamingLLMService(make_response(4))
+    total_chunks = -(-len(service.text) // service.chunk_size)
+
+    names = []
+    async for recipe in service.generate_stream("prompt", ListOfRecipeData):
+        if not names:
+            assert service.chunks_sent < total_chunks
+        names.append(recipe.name)
+
+    assert names == [f"{RECIPE['name']} {i}" for i in range(4)]
+    cached = cache_crud.upsert_entry.await_args.kwargs["response"]
+    assert len(cached["recipes"]) == 4
+
+
+@pytest.mark.asyncio
+async def test_truncated_stream_keeps_complete_recipes_without_caching(cache_crud):
+    text = make_response(3)
+    service = StreamingLLMService(text[: text.rindex("Crack")])
+
+    recipes = [recipe async for recipe in service.generate_stream("prompt", ListOfRecipeData)]
+
+    assert len(recipes) == 2
+    cache_crud.upsert_entry.assert_not_awaited()
@@ -0,0 +1,143 @@
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from app.models.recipes import ListOfRecipeData, RecipePreferences
+from app.services.llm.providers.claude.service import ClaudeService
+from app.services.llm.token_budget import MAX_OUTPUT_TOKENS, TokenBudget
+from app.services.llm.usage import TokenUsage
+
+RECIPES = json.dumps(
+    {
+        "recipes": [
+            {
+                "name": f"Dal {i}",
+                "ingredients": [{"name": "lentils", "quantity": 200, "unit": "grams"}],
+                "instructions": ["Rinse", "Simmer"],
+                "preparation_time": 30,
+                "category": "Dinner",
+            }
+            for i in range(3)
+        ]
+    }
+)
+
+
+def make_message(text: str, stop_reason: str, output_tokens: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        content=[SimpleNamespace(text=text)],
+        stop_reason=stop_reason,
+        usage=SimpleNamespace(input_tokens=50, output_tokens=output_tokens),
+    )
+
+
+@pytest.fixture
+def service(cache_crud):
+    service = ClaudeService()
+    service.usage = TokenUsage()
+    service.budget = TokenBudget()
+    service.client = MagicMock()
+    return service
+
+
+def test_estimate_scales_with_request_shape():
+    budget = TokenBudget()
+    one = budget.estimate("ingredient_analysis", 1)
+    many = budget.estimate("ingredient_batch_analysis", 20)
+    assert one < many <= MAX_OUTPUT_TOKENS
+    assert budget.estimate("recipe_generation", 8) > budget.estimate("recipe_generation", 2)
+
+
+def test_history_refines_estimate_but_ignores_truncated_responses():
+    budget = TokenBudget()
+    before = budget.estimate("recipe_generation", 4)
+
+    budget.observe("recipe_generation", 4, output_tokens=200, truncated=True)
+    assert budget.estimate("recipe_generation", 4) == before
+
+    for _ in range(20):
+        budget.observe("recipe_generation", 4, output_tokens=4 * 1200, truncated=False)
+    assert budget.estimate("recipe_generation", 4) > before
+
+
+@pytest.mark.asyncio
+async def test_truncated_response_is_continued_not_restarted(service):
+    cut = RECIPES.index('{"name": "Dal 2"')
+    service.client.messages.create = AsyncMock(
+        side_effect=[
+            make_message(RECIPES[:cut] + "  ", "max_tokens", 900),
+            make_message(RECIPES[cut:], "end_turn", 300),
+        ]
+    )
+
+    result = await service.generate_recipes(
+        ListOfRecipeData, ["lentils"], RecipePreferences(num_recipes=3)
+    )
+
+    assert [r.name for r in result.recipes] == ["Dal 0", "Dal 1", "Dal 2"]
+    first, second = [c.kwargs for c in service.client.messages.create.await_args_list]
+    assert first["max_tokens"] == TokenBudget().estimate("recipe_generation", 3)
+    assert second["messages"][-1] == {"role": "assistant", "content": RECIPES[:cut].rstrip()}
+    assert service.budget.continuations["recipe_generation"] == 1
+    assert service.budget.truncation_rate("recipe_generation") == 1.0
+
+
+# Cut off just after the space in "Simmer beans"
+BEANS = RECIPES.replace('"Simmer"', '"Simmer beans"')
+BEANS_CUT = BEANS.index("Simmer beans") + len("Simmer ")
+
+
+@pytest.mark.parametrize("continued", ["", " "])
+@pytest.mark.asyncio
+async def test_whitespace_inside_a_cut_off_string_survives_the_continuation(
+    service, continued
+):
+    service.client.messages.create = AsyncMock(
+        side_effect=[
+            make_message(BEANS[:BEANS_CUT], "max_tokens", 900),
+            make_message(continued + BEANS[BEANS_CUT:], "end_turn", 300),
+        ]
+    )
+
+    result = await service.generate_recipes(
+        ListOfRecipeData, ["lentils"], RecipePreferences(num_recipes=3)
+    )
+
+    assert result.recipes[0].instructions == ["Rinse", "Simmer beans"]
+    second = service.client.messages.create.await_args_list[1].kwargs
+    assert second["messages"][-1]["content"].endswith('"Simmer')
+
+
+class FakeStream:
+    def __init__(self, chunks, stop_reason):
+        self.chunks = chunks
+        self.message = make_message("".join(chunks), stop_reason, 100)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    @property
+    async def text_stream(self):
+        for chunk in self.chunks:
+            yield chunk
+
+    async def get_final_message(self):
+        return self.message
+
+
+@pytest.mark.asyncio
+async def test_streamed_continuation_does_not_repeat_held_back_whitespace(service):
+    service.client.messages.stream = MagicMock(
+        side_effect=[
+            FakeStream([BEANS[:BEANS_CUT]], "max_tokens"),
+            FakeStream([" ", BEANS[BEANS_CUT:]], "end_turn"),
+        ]
+    )
+
+    text = "".join([chunk async for chunk in service._stream_response("prompt", metadata={})])
+
+    assert text == BEANS